@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for Legitimate Free Books API
+
+Run from the project root, e.g. `python -m benchmarks.bench_grouping`
+"""
@@ -0,0 +1,96 @@
+"""
+Benchmark: relevance sort in search_all_sources
+
+Compares the original quadratic `books_similar` sort (kept here as the
+reference implementation) with the indexed grouping engine on synthetic
+multi-source result sets.
+
+Usage: python -m benchmarks.bench_grouping
+"""
+
+import random
+import time
+
+from models import BookBase
+from services.grouping import rank_by_cluster_size
+
+WORDS = [
+    "pride", "prejudice", "war", "peace", "great", "expectations", "time",
+    "machine", "history", "python", "data", "science", "ocean", "island",
+    "night", "garden", "secret", "journey", "empire", "river", "stars",
+]
+SOURCES = ["Open Library", "Project Gutenberg", "Google Books"]
+
+
+def make_books(n: int, seed: int = 42) -> list:
+    """Generate `n` books where many titles recur with subtitle variants"""
+    rng = random.Random(seed)
+    authors = [f"Author {i}" for i in range(max(n // 10, 1))]
+    works = [(" ".join(rng.sample(WORDS, 3)).title(), rng.choice(authors)) for _ in range(max(n // 3, 1))]
+
+    books = []
+    for i in range(n):
+        title, author = rng.choice(works)
+        if rng.random() < 0.3:
+            title = f"{title}: A Novel"
+        books.append(BookBase(
+            id=str(i),
+            title=title,
+            authors=[author],
+            source=rng.choice(SOURCES),
+        ))
+    return books
+
+
+def books_similar(book1: BookBase, book2: BookBase) -> bool:
+    """Check if two books are similar (likely the same book)"""
+    # Normalize titles for comparison
+    title1 = book1.title.lower().strip()
+    title2 = book2.title.lower().strip()
+    
+    # Check if titles are very similar
+    if title1 == title2:
+        return True
+    
+    # Check if one title contains the other (for subtitle variations)
+    if title1 in title2 or title2 in title1:
+        # Also check if they have common authors
+        authors1 = set(a.lower() for a in book1.authors)
+        authors2 = set(a.lower() for a in book2.authors)
+        if authors1 & authors2:  # If there's any author overlap
+            return True
+    
+    return False
+
+
+def quadratic_sort(unique_books, all_books):
+    return sorted(
+        unique_books,
+        key=lambda x: sum(1 for b in all_books if books_similar(x, b)),
+        reverse=True
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n: int):
+    books = make_books(n)
+    unique = list({(b.title.lower(), b.authors[0].lower()): b for b in books}.values())
+
+    baseline, baseline_time = timed(quadratic_sort, unique, books)
+    indexed, indexed_time = timed(rank_by_cluster_size, unique, books)
+
+    assert [b.id for b in baseline] == [b.id for b in indexed], "rankings differ"
+    print(
+        f"{n:>6} books | quadratic {baseline_time * 1000:9.1f} ms | "
+        f"indexed {indexed_time * 1000:7.1f} ms | speedup {baseline_time / indexed_time:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    for n in (300, 3000):
+        run(n)
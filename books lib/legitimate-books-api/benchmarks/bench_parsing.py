@@ -0,0 +1,129 @@
+"""
+Benchmark: upstream payload -> response bytes for the three parse functions
+
+For a 100-result page of each source, times decoding the upstream body,
+running the parse function over every item, and encoding the SearchResult
+the way the API sends it. "before" is the standard library json module,
+"after" the configured fast backend (JSON_BACKEND, orjson when installed).
+
+Usage: python -m benchmarks.bench_parsing
+"""
+
+import json
+import time
+
+from models import SearchResult
+from routers.googlebooks import parse_google_book
+from routers.gutenberg import parse_gutenberg_book
+from routers.openlibrary import parse_openlibrary_book
+from services import json_codec
+
+WORDS = ["pride", "prejudice", "war", "peace", "great", "expectations", "ocean", "island", "night", "garden"]
+
+
+def openlibrary_page(n: int) -> dict:
+    return {"numFound": 5000, "docs": [{
+        "key": f"/works/OL{i}W",
+        "title": f"{WORDS[i % 10].title()} and {WORDS[(i * 3) % 10].title()}",
+        "author_name": ["Jane Austen", "Another Author"],
+        "first_publish_year": 1813,
+        "isbn": ["0141439513", "9780141439518"],
+        "number_of_pages_median": 432,
+        "language": ["eng"],
+        "publisher": ["Penguin Classics"],
+        "cover_i": 8739161,
+        "subject": [f"Subject {k}" for k in range(12)],
+        "has_fulltext": True,
+        "ebook_access": "borrowable",
+        "ia": [f"prideprejudice{i}"],
+    } for i in range(n)]}
+
+
+def gutenberg_page(n: int) -> dict:
+    return {"count": 5000, "next": None, "previous": None, "results": [{
+        "id": i,
+        "title": f"{WORDS[i % 10].title()} and {WORDS[(i * 3) % 10].title()}",
+        "authors": [{"name": "Austen, Jane", "birth_year": 1775, "death_year": 1817}],
+        "subjects": [f"Subject {k} -- Fiction" for k in range(6)],
+        "bookshelves": ["Best Books Ever Listings", "Harvard Classics"],
+        "languages": ["en"],
+        "copyright": False,
+        "media_type": "Text",
+        "formats": {
+            "text/html": f"https://www.gutenberg.org/ebooks/{i}.html.images",
+            "application/epub+zip": f"https://www.gutenberg.org/ebooks/{i}.epub3.images",
+            "application/x-mobipocket-ebook": f"https://www.gutenberg.org/ebooks/{i}.kf8.images",
+            "text/plain; charset=us-ascii": f"https://www.gutenberg.org/ebooks/{i}.txt.utf-8",
+            "image/jpeg": f"https://www.gutenberg.org/cache/epub/{i}/pg{i}.cover.medium.jpg",
+        },
+        "download_count": 50000 - i,
+    } for i in range(n)]}
+
+
+def googlebooks_page(n: int) -> dict:
+    return {"totalItems": 5000, "items": [{
+        "id": f"vol{i}",
+        "volumeInfo": {
+            "title": f"{WORDS[i % 10].title()} and {WORDS[(i * 3) % 10].title()}",
+            "authors": ["Jane Austen"],
+            "publisher": "Penguin",
+            "publishedDate": "2003-04-29",
+            "description": "A classic novel of manners. " * 20,
+            "industryIdentifiers": [
+                {"type": "ISBN_10", "identifier": "0141439513"},
+                {"type": "ISBN_13", "identifier": "9780141439518"},
+            ],
+            "pageCount": 480,
+            "categories": ["Fiction"],
+            "averageRating": 4.5,
+            "ratingsCount": 120,
+            "language": "en",
+            "imageLinks": {"smallThumbnail": "http://books.google.com/t?id=1&zoom=5", "thumbnail": "http://books.google.com/t?id=1&zoom=1"},
+            "previewLink": "http://books.google.com/books?id=1&printsec=frontcover",
+            "infoLink": "http://books.google.com/books?id=1",
+        },
+        "accessInfo": {"viewability": "PARTIAL", "pdf": {"isAvailable": True}, "epub": {"isAvailable": False}},
+    } for i in range(n)]}
+
+
+CASES = [
+    ("openlibrary", openlibrary_page, "docs", parse_openlibrary_book),
+    ("gutenberg", gutenberg_page, "results", parse_gutenberg_book),
+    ("googlebooks", googlebooks_page, "items", parse_google_book),
+]
+
+
+def stdlib_dumps(value) -> bytes:
+    return json.dumps(value).encode()
+
+
+def pipeline(body: bytes, items_key: str, parse, loads, dumps) -> bytes:
+    data = loads(body)
+    books = [parse(item) for item in data.get(items_key, [])]
+    result = SearchResult(query="q", total_results=len(books), sources={"x": len(books)}, books=books)
+    return dumps(result.model_dump(mode="json"))
+
+
+def best_of(fn, *args, repeat: int = 30) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n: int = 100):
+    print(f"{n}-result pages, JSON backend: {json_codec.name}")
+    for source, make_page, items_key, parse in CASES:
+        body = json.dumps(make_page(n)).encode()
+        before = best_of(pipeline, body, items_key, parse, json.loads, stdlib_dumps)
+        after = best_of(pipeline, body, items_key, parse, json_codec.loads, json_codec.dumps)
+        print(
+            f"{source:>12} | before {before * 1000:7.2f} ms ({before / n * 1e6:5.1f} us/book) | "
+            f"after {after * 1000:7.2f} ms ({after / n * 1e6:5.1f} us/book) | speedup {before / after:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,180 @@
+"""
+Application settings loaded from environment variables / .env
+"""
+
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ValidationInfo, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class UpstreamSettings(BaseModel):
+    """Connection settings for a single upstream book source"""
+    base_url: str
+    timeout: float = 30.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    cache_ttl: int = 3600
+    hedge: bool = False
+    # Outbound governor: requests per second (None = unlimited), burst size,
+    # concurrent requests, and how long a request may queue for a slot
+    rate_limit: Optional[float] = 10.0
+    rate_limit_burst: int = 20
+    max_in_flight: int = 20
+    max_queue_wait: float = 2.0
+
+
+UPSTREAM_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "openlibrary": {
+        "base_url": "https://openlibrary.org",
+        "http2": True,
+        "cache_ttl": 6 * 3600,
+        "hedge": True,
+        "rate_limit": 5.0,
+        "rate_limit_burst": 10,
+    },
+    "gutenberg": {
+        "base_url": "https://gutendex.com",
+        "cache_ttl": 24 * 3600,
+    },
+    "googlebooks": {
+        "base_url": "https://www.googleapis.com/books/v1",
+        "http2": True,
+        "cache_ttl": 6 * 3600,
+        "hedge": True,
+    },
+}
+
+
+class Settings(BaseSettings):
+    """
+    Application settings
+
+    Nested upstream values can be overridden with a double underscore,
+    e.g. `GOOGLEBOOKS__MAX_CONNECTIONS=50`.
+    """
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_nested_delimiter="__",
+        extra="ignore",
+    )
+
+    user_agent: str = "LegitimateFreeBooksAPI/1.0"
+
+    # JSON backend for upstream bodies, cached values and responses:
+    # auto (orjson, then msgspec, then stdlib), orjson, msgspec or stdlib
+    json_backend: str = "auto"
+
+    # Inbound rate limit per client (0 disables); burst defaults to the per-minute limit
+    # and is at least 3, the cost of a fan-out search.
+    # "redis" shares buckets between workers (uses REDIS_URL)
+    rate_limit_per_minute: int = 60
+    rate_limit_burst: Optional[int] = None
+    rate_limit_backend: str = "memory"
+    rate_limit_trust_forwarded: bool = False
+
+    # Load shedding: 503 once this many requests are in flight (0 disables);
+    # fan-out searches are shed earlier, at this fraction of the limit
+    shed_max_in_flight: int = 200
+    shed_fanout_fraction: float = 0.5
+    shed_retry_after: int = 2
+
+    # Response cache: "memory" (per process) or "redis" (shared by workers)
+    cache_backend: str = "memory"
+    cache_max_entries: int = 10000
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Warm-start snapshot of the hottest in-process cache entries, saved every
+    # CACHE_SNAPSHOT_INTERVAL seconds and on shutdown (empty path disables)
+    cache_snapshot_path: Optional[str] = "cache_snapshot.sqlite"
+    cache_snapshot_interval: float = 300.0
+    cache_snapshot_max_entries: int = 2000
+
+    # Negative cache for upstream 404s and empty result pages (per process,
+    # with a Bloom filter in front)
+    negative_cache_ttl: int = 300
+    negative_cache_max_entries: int = 50_000
+
+    # Stale-while-revalidate: expired entries are still served for this long
+    # while a background refresh (at most REFRESH_MAX_CONCURRENT) runs
+    cache_stale_ttl: int = 300
+    refresh_max_concurrent: int = 4
+    # Every REFRESH_INTERVAL seconds the REFRESH_TOP_N most requested keys
+    # expiring within REFRESH_AHEAD seconds are refreshed ahead of time
+    refresh_top_n: int = 50
+    refresh_interval: float = 30.0
+    refresh_ahead: float = 60.0
+
+    # Fuzzy de-duplication of merged search results (MinHash/LSH)
+    dedup_threshold: float = 0.8
+    dedup_num_perm: int = 96
+    dedup_bands: int = 12
+    dedup_require_author_match: bool = True
+    dedup_isbn_match: bool = True
+    dedup_isbn_conflict_distinct: bool = False
+
+    # Cache merged ISBN records for /search/isbn (0 disables)
+    isbn_cache_ttl: int = 24 * 3600
+
+    # Local Gutenberg catalog (built with `python ingest_catalog.py`)
+    gutenberg_catalog_path: Optional[str] = "gutenberg_catalog.sqlite"
+
+    # Gutenberg author scans (when the local catalog is absent): upstream pages
+    # fetched concurrently per step, and matches remembered per author
+    gutenberg_author_prefetch: int = 4
+    gutenberg_author_max_matches: int = 500
+
+    # Local BM25 index over parsed and ingested books (the `local` search source)
+    local_index_max_docs: int = 200_000
+    local_index_catalog: bool = True
+    # Queries scoring more postings than this (about 0.8 us each) run in a worker thread
+    local_search_thread_postings: int = 2000
+    suggest_max_entries: int = 500_000
+
+    # Per-source circuit breakers (rolling window of recent calls)
+    breaker_window_size: int = 50
+    breaker_min_calls: int = 10
+    breaker_failure_rate: float = 0.5
+    breaker_slow_call_seconds: float = 5.0
+    breaker_open_seconds: float = 30.0
+
+    # Upstream timeouts follow the observed p95 latency, capped by the source timeout
+    adaptive_timeout_multiplier: float = 2.0
+    adaptive_timeout_min: float = 1.0
+
+    # Hedged requests for sources with `hedge` set (e.g. GUTENBERG__HEDGE=true):
+    # at most this fraction of requests may send a second copy
+    hedge_budget_ratio: float = 0.05
+
+    # Default latency budget for multi-source search (/search/all, /search/compare)
+    search_deadline_ms: int = 1000
+
+    # Merged /search/all result windows behind cursor pagination
+    search_window_ttl: int = 600
+    search_window_max_books: int = 1000
+
+    # Open Library author resolution in /openlibrary/book
+    author_fetch_concurrency: int = 4
+    author_cache_ttl: int = 7 * 24 * 3600
+    author_cache_max_entries: int = 20000
+
+    openlibrary: UpstreamSettings = UpstreamSettings(**UPSTREAM_DEFAULTS["openlibrary"])
+    gutenberg: UpstreamSettings = UpstreamSettings(**UPSTREAM_DEFAULTS["gutenberg"])
+    googlebooks: UpstreamSettings = UpstreamSettings(**UPSTREAM_DEFAULTS["googlebooks"])
+
+    @field_validator("openlibrary", "gutenberg", "googlebooks", mode="before")
+    @classmethod
+    def _merge_upstream_defaults(cls, value: Any, info: ValidationInfo) -> Any:
+        """Let `GUTENBERG__CACHE_TTL=...` override one field without dropping the rest"""
+        if isinstance(value, dict):
+            return {**UPSTREAM_DEFAULTS[info.field_name], **value}
+        return value
+
+    def upstream(self, source: str) -> UpstreamSettings:
+        """Get the upstream settings for a source name"""
+        return getattr(self, source)
+
+
+settings = Settings()
@@ -0,0 +1,30 @@
+"""
+Build the local Project Gutenberg catalog used by the Gutenberg routes
+
+Usage:
+    python ingest_catalog.py pg_catalog.csv
+    python ingest_catalog.py gutendex_export.json --db gutenberg_catalog.sqlite
+"""
+
+import argparse
+
+from config import settings
+from services.gutenberg_catalog import ingest, read_dump
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local Gutenberg catalog from a dump")
+    parser.add_argument("dump", help="pg_catalog.csv feed or saved Gutendex JSON")
+    parser.add_argument(
+        "--db",
+        default=settings.gutenberg_catalog_path or "gutenberg_catalog.sqlite",
+        help="Output SQLite file"
+    )
+    args = parser.parse_args()
+
+    count = ingest(read_dump(args.dump), args.db)
+    print(f"Ingested {count} books into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,15 @@ A comprehensive API service aggregating legal free book sources including:
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 from typing import Optional, List
 import logging
 
 from routers import openlibrary, gutenberg, googlebooks, search
 from models import APIInfo
+from config import settings
+from services import http_clients, cache, cache_snapshot, json_codec, circuit_breaker, governor, upstream, gutenberg_catalog, indexing, rate_limit
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +26,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    await http_clients.registry.start()
+    await cache.init_cache()
+    await rate_limit.init_buckets()
+    catalog = gutenberg_catalog.open_catalog(settings.gutenberg_catalog_path)
+    refresh_task = asyncio.create_task(upstream.run_refresh_scheduler())
+    snapshotter = cache_snapshot.snapshotter
+    snapshot_task = None
+    if snapshotter is not None:
+        # Restores in the background; requests are served while it loads
+        snapshot_task = asyncio.create_task(snapshotter.run(settings.cache_snapshot_interval))
+    index_task = None
+    if catalog is not None and settings.local_index_catalog:
+        index_task = asyncio.create_task(
+            indexing.index_catalog(catalog, gutenberg.parse_gutenberg_book)
+        )
+    yield
+    refresh_task.cancel()
+    await upstream.refresher.aclose()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+        try:
+            await snapshotter.save(cache.response_cache)
+        except Exception as e:
+            logger.warning(f"Cache snapshot on shutdown failed: {e}")
+    if index_task is not None:
+        index_task.cancel()
+    gutenberg_catalog.close_catalog()
+    await cache.close_cache()
+    await rate_limit.close_buckets()
+    await http_clients.registry.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Legitimate Free Books API",
@@ -45,9 +85,14 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=json_codec.FastJSONResponse,
 )
 
-# CORS middleware
+# Load shedding and per-client rate limits
+app.add_middleware(rate_limit.AdmissionMiddleware)
+
+# CORS middleware (added last so it also wraps rate-limit responses)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -101,10 +146,26 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    breakers = circuit_breaker.breaker_states()
+    degraded = any(state["state"] != circuit_breaker.CLOSED for state in breakers.values())
     return {
-        "status": "healthy",
+        "status": "degraded" if degraded else "healthy",
         "service": "Legitimate Free Books API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "upstreams": breakers,
+        "cache": await cache.response_cache.stats(),
+        "cache_warmth": (
+            cache_snapshot.snapshotter.stats(cache.response_cache)
+            if cache_snapshot.snapshotter is not None else None
+        ),
+        "negative_cache": upstream.negative_cache.stats(),
+        "coalescing": upstream.inflight.stats(),
+        "refresh": upstream.refresher.stats(),
+        "hedging": upstream.hedging_stats(),
+        "outbound": governor.governor_states(),
+        "admission": rate_limit.admission_stats(),
+        "local_index": indexing.local_index.stats(),
+        "suggest_index": indexing.suggest_index.stats()
     }
 
 
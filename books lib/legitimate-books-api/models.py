@@ -2,8 +2,8 @@
 Pydantic models for API request/response validation
 """
 
-from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Discriminator, Field, HttpUrl, SerializeAsAny, Tag
+from typing import Annotated, Optional, List, Dict, Any, Union
 from datetime import datetime
 
 
@@ -64,6 +64,11 @@ class OpenLibraryBook(BookBase):
     read_url: Optional[str] = None
 
 
+class OpenLibraryBookDetail(OpenLibraryBook):
+    """Open Library book with its resolved author records"""
+    authors_detail: List[BookAuthor] = []
+
+
 class GutenbergBook(BookBase):
     """Project Gutenberg specific book model"""
     gutenberg_id: int
@@ -86,24 +91,59 @@ class GoogleBook(BookBase):
     viewability: Optional[str] = None
 
 
+class MergedBook(BookBase):
+    """Book record merged from several sources sharing an ISBN"""
+    isbn_13: Optional[str] = None
+    merged_sources: List[str] = []
+    source_ids: Dict[str, str] = {}
+    links: Dict[str, str] = {}
+    subjects: List[str] = []
+
+
+def _result_book_kind(value: Any) -> str:
+    if isinstance(value, dict):
+        return "merged" if "merged_sources" in value else "book"
+    return "merged" if isinstance(value, MergedBook) else "book"
+
+
+# A book in a search result: merged records keep their merge fields, other
+# books are serialized with the common BookBase fields
+ResultBook = Annotated[
+    Union[Annotated[MergedBook, Tag("merged")], Annotated[BookBase, Tag("book")]],
+    Discriminator(_result_book_kind),
+]
+
+
 class SearchResult(BaseModel):
     """Multi-source search result"""
     query: str
-    total_results: int
+    total_results: int = Field(
+        ...,
+        description="Matches reported by the source; for /search/all, the merged results fetched so far"
+    )
     sources: Dict[str, int] = Field(
         ..., 
         description="Number of results from each source"
     )
-    books: List[BookBase]
+    books: List[ResultBook]
     page: int = 1
     per_page: int = 20
+    timed_out_sources: List[str] = Field(
+        default_factory=list,
+        description="Sources dropped because they missed the request deadline"
+    )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Pass as `cursor` to get the next page (multi-source search)"
+    )
 
 
 class BookDetail(BaseModel):
     """Detailed book information"""
-    book: BookBase
+    # Serialized as the actual source model, not just the BookBase fields
+    book: SerializeAsAny[BookBase]
     authors_detail: Optional[List[BookAuthor]] = None
-    related_books: Optional[List[BookBase]] = None
+    related_books: Optional[List[SerializeAsAny[BookBase]]] = None
     reviews: Optional[List[Dict[str, Any]]] = None
 
 
@@ -4,32 +4,66 @@ Provides access to Google Books metadata and previews
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from typing import Optional
 import httpx
 import logging
 
 from models import GoogleBook, SearchResult, BookCover
+from services.fieldsets import FIELDS_DESCRIPTION, FieldSet, dump_books, parse_fields, sparse_result, wanted
+from services.indexing import observe_books
+from services.upstream import UpstreamNotFound, fetch_json
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-GOOGLE_BOOKS_API = "https://www.googleapis.com/books/v1"
+# Volume attributes behind each book field, as paths for the `fields`
+# partial-response parameter (id and volumeInfo/title are always requested)
+VOLUME_FIELDS = {
+    "authors": "volumeInfo/authors",
+    "published_date": "volumeInfo/publishedDate",
+    "description": "volumeInfo/description",
+    "isbn": "volumeInfo/industryIdentifiers",
+    "pages": "volumeInfo/pageCount",
+    "language": "volumeInfo/language",
+    "publisher": "volumeInfo/publisher",
+    "cover": "volumeInfo/imageLinks/thumbnail",
+    "thumbnail": "volumeInfo/imageLinks/thumbnail",
+    "preview_link": "volumeInfo/previewLink",
+    "info_link": "volumeInfo/infoLink",
+    "categories": "volumeInfo/categories",
+    "average_rating": "volumeInfo/averageRating",
+    "ratings_count": "volumeInfo/ratingsCount",
+    "viewability": "accessInfo/viewability",
+}
 
 
 async def fetch_google_books(endpoint: str, params: dict = None) -> dict:
     """Fetch data from Google Books API"""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{GOOGLE_BOOKS_API}{endpoint}", params=params)
-            response.raise_for_status()
-            return response.json()
+        return await fetch_json("googlebooks", endpoint, params)
+    except UpstreamNotFound:
+        raise HTTPException(status_code=404, detail="Not found")
     except httpx.HTTPError as e:
         logger.error(f"Error fetching from Google Books: {e}")
         raise HTTPException(status_code=503, detail="Google Books API unavailable")
 
 
-def parse_google_book(volume: dict) -> GoogleBook:
-    """Parse Google Books volume data into our model"""
+def volume_fields(fields: FieldSet) -> Optional[str]:
+    """Value of the `fields` parameter of /volumes for a fieldset (None for everything)"""
+    if fields is None:
+        return None
+    paths = {"volumeInfo": ["title"]}
+    for field, path in VOLUME_FIELDS.items():
+        if field in fields:
+            part, rest = path.split("/", 1)
+            if rest not in paths.setdefault(part, []):
+                paths[part].append(rest)
+    items = ",".join(["id"] + [f"{part}({','.join(rests)})" for part, rests in paths.items()])
+    return f"totalItems,items({items})"
+
+
+def parse_google_book(volume: dict, fields: FieldSet = None) -> GoogleBook:
+    """Parse Google Books volume data into our model (optional attributes only if in `fields`)"""
     
     volume_info = volume.get("volumeInfo", {})
     
@@ -38,14 +72,14 @@ def parse_google_book(volume: dict) -> GoogleBook:
     
     # Extract ISBNs
     isbn_list = []
-    for identifier in volume_info.get("industryIdentifiers", []):
-        if identifier.get("type") in ["ISBN_10", "ISBN_13"]:
-            isbn_list.append(identifier.get("identifier"))
+    for identifier in volume_info.get("industryIdentifiers", []) if wanted(fields, "isbn") else []:
+        if identifier.get("type") in ["ISBN_10", "ISBN_13"] and identifier.get("identifier"):
+            isbn_list.append(identifier["identifier"])
     
     # Get cover/thumbnail
     cover = None
     thumbnail = volume_info.get("imageLinks", {}).get("thumbnail")
-    if thumbnail:
+    if thumbnail and wanted(fields, "cover"):
         # Google Books thumbnails are small by default, construct larger versions
         large_thumb = thumbnail.replace("&zoom=1", "&zoom=3")
         cover = BookCover(
@@ -95,7 +129,8 @@ def parse_google_book(volume: dict) -> GoogleBook:
 async def search_books(
     q: str = Query(..., description="Search query", min_length=1),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(20, ge=1, le=40, description="Results per page (max 40)")
+    limit: int = Query(20, ge=1, le=40, description="Results per page (max 40)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Search books in Google Books
@@ -111,7 +146,9 @@ async def search_books(
     - `/search?q=python programming`
     - `/search?q=intitle:pride+inauthor:austen`
     - `/search?q=isbn:9780134685991`
+    - `/search?q=dune&fields=title,authors,cover` - Only these fields (and `id`)
     """
+    fieldset = parse_fields(fields)
     try:
         start_index = (page - 1) * limit
         params = {
@@ -121,25 +158,30 @@ async def search_books(
             "printType": "books"
         }
         
+        if fieldset is not None:
+            params["fields"] = volume_fields(fieldset)
         data = await fetch_google_books("/volumes", params)
         
         books = []
         for item in data.get("items", []):
             try:
-                book = parse_google_book(item)
+                book = parse_google_book(item, fieldset)
                 books.append(book)
             except Exception as e:
                 logger.warning(f"Error parsing book: {e}")
                 continue
+        if fieldset is None:
+            # Sparse records would stay in the local index as they are
+            observe_books(books)
         
-        return SearchResult(
+        return sparse_result(SearchResult(
             query=q,
             total_results=data.get("totalItems", 0),
             sources={"googlebooks": len(books)},
             books=books,
             page=page,
             per_page=limit
-        )
+        ), fieldset)
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -157,11 +199,13 @@ async def get_book(volume_id: str):
     """
     try:
         data = await fetch_google_books(f"/volumes/{volume_id}")
-        return parse_google_book(data)
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
+        book = parse_google_book(data)
+        observe_books([book])
+        return book
+    except HTTPException as e:
+        if e.status_code == 404:
             raise HTTPException(status_code=404, detail="Book not found")
-        raise HTTPException(status_code=503, detail="Google Books API error")
+        raise
     except Exception as e:
         logger.error(f"Get book error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -187,7 +231,9 @@ async def get_book_by_isbn(isbn: str):
         if not items:
             raise HTTPException(status_code=404, detail="Book not found with this ISBN")
         
-        return parse_google_book(items[0])
+        book = parse_google_book(items[0])
+        observe_books([book])
+        return book
     except HTTPException:
         raise
     except Exception as e:
@@ -199,7 +245,8 @@ async def get_book_by_isbn(isbn: str):
 async def get_books_by_author(
     author_name: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=40)
+    limit: int = Query(20, ge=1, le=40),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by a specific author
@@ -208,6 +255,7 @@ async def get_books_by_author(
     - `/author/j k rowling`
     - `/author/shakespeare`
     """
+    fieldset = parse_fields(fields)
     try:
         start_index = (page - 1) * limit
         params = {
@@ -216,13 +264,17 @@ async def get_books_by_author(
             "maxResults": min(limit, 40)
         }
         
+        if fieldset is not None:
+            params["fields"] = volume_fields(fieldset)
         data = await fetch_google_books("/volumes", params)
-        books = [parse_google_book(item) for item in data.get("items", [])]
+        books = [parse_google_book(item, fieldset) for item in data.get("items", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "author": author_name,
             "total": data.get("totalItems", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -235,7 +287,8 @@ async def get_books_by_author(
 async def get_books_by_subject(
     subject: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=40)
+    limit: int = Query(20, ge=1, le=40),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by subject/category
@@ -245,6 +298,7 @@ async def get_books_by_subject(
     - `/subject/computers`
     - `/subject/science`
     """
+    fieldset = parse_fields(fields)
     try:
         start_index = (page - 1) * limit
         params = {
@@ -253,13 +307,17 @@ async def get_books_by_subject(
             "maxResults": min(limit, 40)
         }
         
+        if fieldset is not None:
+            params["fields"] = volume_fields(fieldset)
         data = await fetch_google_books("/volumes", params)
-        books = [parse_google_book(item) for item in data.get("items", [])]
+        books = [parse_google_book(item, fieldset) for item in data.get("items", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "subject": subject,
             "total": data.get("totalItems", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -271,7 +329,8 @@ async def get_books_by_subject(
 @router.get("/free-ebooks")
 async def get_free_ebooks(
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=40)
+    limit: int = Query(20, ge=1, le=40),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books that have free full-text access
@@ -280,6 +339,7 @@ async def get_free_ebooks(
     - `/free-ebooks`
     - `/free-ebooks?page=1&limit=30`
     """
+    fieldset = parse_fields(fields)
     try:
         start_index = (page - 1) * limit
         params = {
@@ -289,12 +349,16 @@ async def get_free_ebooks(
             "maxResults": min(limit, 40)
         }
         
+        if fieldset is not None:
+            params["fields"] = volume_fields(fieldset)
         data = await fetch_google_books("/volumes", params)
-        books = [parse_google_book(item) for item in data.get("items", [])]
+        books = [parse_google_book(item, fieldset) for item in data.get("items", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "total": data.get("totalItems", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -306,7 +370,8 @@ async def get_free_ebooks(
 @router.get("/bestsellers/{category}")
 async def get_bestsellers(
     category: str = "fiction",
-    limit: int = Query(20, ge=1, le=40)
+    limit: int = Query(20, ge=1, le=40),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get bestselling books by category (approximation using orderBy relevance)
@@ -322,6 +387,7 @@ async def get_bestsellers(
     - `/bestsellers/fiction`
     - `/bestsellers/computers`
     """
+    fieldset = parse_fields(fields)
     try:
         params = {
             "q": f"subject:{category}",
@@ -329,12 +395,16 @@ async def get_bestsellers(
             "maxResults": min(limit, 40)
         }
         
+        if fieldset is not None:
+            params["fields"] = volume_fields(fieldset)
         data = await fetch_google_books("/volumes", params)
-        books = [parse_google_book(item) for item in data.get("items", [])]
+        books = [parse_google_book(item, fieldset) for item in data.get("items", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "category": category,
-            "books": books
+            "books": dump_books(books, fieldset)
         }
     except Exception as e:
         logger.error(f"Bestsellers error: {e}")
@@ -4,18 +4,26 @@ Provides access to 70,000+ public domain books
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 import httpx
+import asyncio
 import logging
+import math
 from bs4 import BeautifulSoup
 import re
 
 from models import GutenbergBook, SearchResult, DownloadFormat, BookCover
+from config import settings
+from services import cache, gutenberg_catalog
+from services.fieldsets import FIELDS_DESCRIPTION, FieldSet, dump_books, parse_fields, sparse_result, wanted
+from services.gutenberg_catalog import PAGE_SIZE, author_matches
+from services.indexing import observe_books
+from services.singleflight import SingleFlight
+from services.upstream import UpstreamNotFound, fetch_json
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-GUTENBERG_API = "https://gutendex.com"
 GUTENBERG_MIRRORS = [
     "https://www.gutenberg.org/ebooks",
     "https://www.gutenberg.org/cache/epub"
@@ -25,24 +33,176 @@ GUTENBERG_MIRRORS = [
 async def fetch_gutendex(endpoint: str, params: dict = None) -> dict:
     """Fetch data from Gutendex API (Gutenberg metadata API)"""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{GUTENBERG_API}{endpoint}", params=params)
-            response.raise_for_status()
-            return response.json()
+        return await fetch_json("gutenberg", endpoint, params)
+    except UpstreamNotFound:
+        raise HTTPException(status_code=404, detail="Not found")
     except httpx.HTTPError as e:
         logger.error(f"Error fetching from Gutendex: {e}")
         raise HTTPException(status_code=503, detail="Gutenberg API unavailable")
 
 
-def parse_gutenberg_book(book_data: dict) -> GutenbergBook:
-    """Parse Gutendex book data into our model"""
+async def query_books(params: dict) -> dict:
+    """Answer a Gutendex /books query from the local catalog, falling back to Gutendex"""
+    catalog = gutenberg_catalog.get_catalog()
+    if catalog is not None:
+        try:
+            return await asyncio.to_thread(catalog.query, params)
+        except ValueError as e:
+            # A query the catalog can't answer (e.g. popularity order without download counts)
+            logger.debug(f"Local catalog can't answer {params}, using Gutendex: {e}")
+        except Exception as e:
+            logger.warning(f"Local catalog query failed, using Gutendex: {e}")
+    return await fetch_gutendex("/books", params)
+
+
+async def assemble_page(params: dict, page: int, limit: int) -> dict:
+    """
+    Answer a (page, limit) request from Gutendex's fixed 32-book pages
+    
+    Fetches only the upstream pages overlapping the requested slice, all at
+    once, and cuts the slice out. Upstream pages go through the response
+    cache, so overlapping requests with other limits reuse them.
+    """
+    start = (page - 1) * limit
+    first = start // PAGE_SIZE + 1
+    last = (start + limit - 1) // PAGE_SIZE + 1
+    
+    pages = await asyncio.gather(
+        *(query_books({**params, "page": number}) for number in range(first, last + 1)),
+        return_exceptions=True
+    )
+    
+    count = None
+    results = []
+    for data in pages:
+        if isinstance(data, HTTPException) and data.status_code == 404:
+            # Gutendex answers 404 past the last page
+            break
+        if isinstance(data, Exception):
+            raise data
+        count = data.get("count", 0)
+        results.extend(data.get("results", []))
+    
+    if count is None:
+        # The whole slice is past the end; the total still comes from page 1
+        # (usually cached already, from the request that paged this far)
+        count = 0
+        if first > 1:
+            try:
+                count = (await query_books({**params, "page": 1})).get("count", 0)
+            except HTTPException as e:
+                if e.status_code != 404:
+                    raise
+    
+    offset = start - (first - 1) * PAGE_SIZE
+    return {"count": count, "results": results[offset:offset + limit]}
+
+
+async def get_book_data(book_id: int) -> dict:
+    """Get a single Gutendex book document, from the local catalog when available"""
+    catalog = gutenberg_catalog.get_catalog()
+    if catalog is not None:
+        try:
+            data = await asyncio.to_thread(catalog.get, book_id)
+            if data is not None:
+                return data
+        except Exception as e:
+            logger.warning(f"Local catalog lookup failed, using Gutendex: {e}")
+    return await fetch_gutendex(f"/books/{book_id}")
+
+
+# One Gutendex scan per author at a time
+author_scans = SingleFlight()
+
+
+def author_scan_key(author_name: str) -> str:
+    return cache.make_key("gutenberg-author", "/books", {"author": author_name.lower()})
+
+
+async def scan_author_books(author_name: str, needed: int) -> Dict[str, Any]:
+    """
+    Collect Gutendex books by an author until `needed` matches are found
+    
+    Gutendex search also matches titles, so pages are filtered by author.
+    The first page tells how many pages exist; later ones are fetched
+    GUTENBERG_AUTHOR_PREFETCH at a time. Matches and the next page to scan
+    are cached per author, so deeper pages continue where the last scan stopped.
+    """
+    key = author_scan_key(author_name)
+    cached = await cache.response_cache.get(key)
+    state = {
+        "next_page": cached["next_page"] if cached else 1,
+        "pages": cached["pages"] if cached else None,
+        "matches": list(cached["matches"]) if cached else [],
+    }
+    needed = min(needed, settings.gutenberg_author_max_matches)
+    scanned = False
+    
+    while len(state["matches"]) < needed and (state["pages"] is None or state["next_page"] <= state["pages"]):
+        first = state["next_page"]
+        count = 1 if state["pages"] is None else min(
+            settings.gutenberg_author_prefetch, state["pages"] - first + 1
+        )
+        pages = await asyncio.gather(
+            *(fetch_gutendex("/books", {"search": author_name, "page": p}) for p in range(first, first + count)),
+            return_exceptions=True
+        )
+        scanned = True
+        
+        for page_number, data in enumerate(pages, first):
+            if isinstance(data, HTTPException) and data.status_code == 404:
+                # Past the last page (the count changed since we looked)
+                state["pages"] = page_number - 1
+                break
+            if isinstance(data, Exception):
+                raise data
+            if state["pages"] is None:
+                state["pages"] = math.ceil(data.get("count", 0) / PAGE_SIZE)
+            state["matches"].extend(
+                book for book in data.get("results", []) if author_matches(author_name, book)
+            )
+            state["next_page"] = page_number + 1
+    
+    if scanned:
+        await cache.response_cache.set(key, state, ttl=settings.upstream("gutenberg").cache_ttl)
+    return state
+
+
+async def find_author_books(author_name: str, needed: int) -> Dict[str, Any]:
+    """Matching Gutendex-shaped books (at least `needed` if there are that many)"""
+    catalog = gutenberg_catalog.get_catalog()
+    if catalog is not None:
+        try:
+            return {"matches": await asyncio.to_thread(catalog.books_by_author, author_name), "complete": True}
+        except ValueError as e:
+            logger.debug(f"Local catalog can't list books by {author_name!r}, using Gutendex: {e}")
+        except Exception as e:
+            logger.warning(f"Local catalog author lookup failed, using Gutendex: {e}")
+    
+    key = author_scan_key(author_name)
+    
+    def scan():
+        return scan_author_books(author_name, needed)
+    
+    state = await author_scans.do(key, scan)
+    if len(state["matches"]) < needed and state["next_page"] <= state["pages"]:
+        # We joined a scan for a shallower page; continue it for ours
+        state = await author_scans.do(key, scan)
+    return {
+        "matches": state["matches"],
+        "complete": state["next_page"] > state["pages"],
+    }
+
+
+def parse_gutenberg_book(book_data: dict, fields: FieldSet = None) -> GutenbergBook:
+    """Parse Gutendex book data into our model (optional attributes only if in `fields`)"""
     
     # Extract authors
-    authors = [author["name"] for author in book_data.get("authors", [])]
+    authors = [author["name"] for author in book_data.get("authors", [])] if wanted(fields, "authors") else []
     
     # Extract formats/download links
     formats = []
-    for format_type, url in book_data.get("formats", {}).items():
+    for format_type, url in book_data.get("formats", {}).items() if wanted(fields, "formats") else ():
         if any(ext in format_type.lower() for ext in ["epub", "pdf", "txt", "html", "mobi"]):
             format_name = format_type.split(";")[0].strip()
             formats.append(DownloadFormat(
@@ -54,7 +214,7 @@ def parse_gutenberg_book(book_data: dict) -> GutenbergBook:
     # Get cover image
     cover = None
     cover_url = book_data.get("formats", {}).get("image/jpeg")
-    if cover_url:
+    if cover_url and wanted(fields, "cover"):
         cover = BookCover(
             small=cover_url,
             medium=cover_url,
@@ -94,7 +254,8 @@ def parse_gutenberg_book(book_data: dict) -> GutenbergBook:
 async def search_books(
     q: str = Query(..., description="Search query", min_length=1),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(20, ge=1, le=100, description="Results per page")
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Search books in Project Gutenberg
@@ -102,25 +263,30 @@ async def search_books(
     **Examples:**
     - `/search?q=shakespeare`
     - `/search?q=science fiction&page=1&limit=10`
+    - `/search?q=austen&fields=title,authors,cover` - Only these fields (and `id`)
     """
+    fieldset = parse_fields(fields)
     try:
         params = {
-            "search": q,
-            "page": page
+            "search": q
         }
         
-        data = await fetch_gutendex("/books", params)
+        data = await assemble_page(params, page, limit)
         
-        books = [parse_gutenberg_book(book) for book in data.get("results", [])]
+        books = [parse_gutenberg_book(book, fieldset) for book in data.get("results", [])]
         
-        return SearchResult(
+        if fieldset is None:
+            # Sparse records would stay in the local index as they are
+            observe_books(books)
+        
+        return sparse_result(SearchResult(
             query=q,
             total_results=data.get("count", 0),
             sources={"gutenberg": len(books)},
             books=books,
             page=page,
             per_page=limit
-        )
+        ), fieldset)
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -138,12 +304,14 @@ async def get_book(book_id: int):
     - `/book/11` (Alice's Adventures in Wonderland)
     """
     try:
-        data = await fetch_gutendex(f"/books/{book_id}")
-        return parse_gutenberg_book(data)
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
+        data = await get_book_data(book_id)
+        book = parse_gutenberg_book(data)
+        observe_books([book])
+        return book
+    except HTTPException as e:
+        if e.status_code == 404:
             raise HTTPException(status_code=404, detail="Book not found")
-        raise HTTPException(status_code=503, detail="Gutenberg API error")
+        raise
     except Exception as e:
         logger.error(f"Get book error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,7 +320,8 @@ async def get_book(book_id: int):
 @router.get("/popular")
 async def get_popular_books(
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get most popular/downloaded books from Project Gutenberg
@@ -161,18 +330,20 @@ async def get_popular_books(
     - `/popular`
     - `/popular?page=1&limit=50`
     """
+    fieldset = parse_fields(fields)
     try:
         params = {
-            "page": page,
             "sort": "popular"
         }
         
-        data = await fetch_gutendex("/books", params)
-        books = [parse_gutenberg_book(book) for book in data.get("results", [])]
+        data = await assemble_page(params, page, limit)
+        books = [parse_gutenberg_book(book, fieldset) for book in data.get("results", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "total": data.get("count", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -185,37 +356,39 @@ async def get_popular_books(
 async def get_books_by_author(
     author_name: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by a specific author
     
+    Books are matched on author name (not title). Without the local catalog,
+    Gutendex pages are scanned until the requested page is full; `total`
+    counts the matches found so far and `has_more` tells if the scan can go on.
+    
     **Examples:**
     - `/author/shakespeare`
-    - `/author/jane austen`
+    - `/author/jane austen?page=2&limit=10`
     """
+    fieldset = parse_fields(fields)
     try:
-        params = {
-            "search": author_name,
-            "page": page
-        }
+        found = await find_author_books(author_name, page * limit)
+        matches = found["matches"]
         
-        data = await fetch_gutendex("/books", params)
-        
-        # Filter to only books where author name matches
-        all_books = [parse_gutenberg_book(book) for book in data.get("results", [])]
-        filtered_books = [
-            book for book in all_books 
-            if any(author_name.lower() in author.lower() for author in book.authors)
-        ]
+        books = [parse_gutenberg_book(book, fieldset) for book in matches[(page - 1) * limit:page * limit]]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "author": author_name,
-            "total": len(filtered_books),
-            "books": filtered_books,
+            "total": len(matches),
+            "has_more": len(matches) > page * limit or not found["complete"],
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Author search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -225,7 +398,8 @@ async def get_books_by_author(
 async def get_books_by_subject(
     subject: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by subject/topic
@@ -235,19 +409,21 @@ async def get_books_by_subject(
     - `/subject/science`
     - `/subject/history`
     """
+    fieldset = parse_fields(fields)
     try:
         params = {
-            "topic": subject,
-            "page": page
+            "topic": subject
         }
         
-        data = await fetch_gutendex("/books", params)
-        books = [parse_gutenberg_book(book) for book in data.get("results", [])]
+        data = await assemble_page(params, page, limit)
+        books = [parse_gutenberg_book(book, fieldset) for book in data.get("results", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "subject": subject,
             "total": data.get("count", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -281,7 +457,8 @@ async def get_available_languages():
 async def get_books_by_language(
     lang_code: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books in a specific language
@@ -291,19 +468,21 @@ async def get_books_by_language(
     - `/language/fr` (French)
     - `/language/de` (German)
     """
+    fieldset = parse_fields(fields)
     try:
         params = {
-            "languages": lang_code,
-            "page": page
+            "languages": lang_code
         }
         
-        data = await fetch_gutendex("/books", params)
-        books = [parse_gutenberg_book(book) for book in data.get("results", [])]
+        data = await assemble_page(params, page, limit)
+        books = [parse_gutenberg_book(book, fieldset) for book in data.get("results", [])]
+        if fieldset is None:
+            observe_books(books)
         
         return {
             "language": lang_code,
             "total": data.get("count", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
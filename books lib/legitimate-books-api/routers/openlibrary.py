@@ -5,10 +5,16 @@ Provides access to Internet Archive's Open Library
 
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
+import asyncio
 import httpx
 import logging
 
-from models import OpenLibraryBook, SearchResult, BookCover
+from config import settings
+from models import OpenLibraryBook, OpenLibraryBookDetail, SearchResult, BookCover, BookAuthor
+from services.cache import MemoryCache
+from services.fieldsets import FIELDS_DESCRIPTION, FieldSet, dump_books, parse_fields, sparse_result, wanted
+from services.indexing import observe_books
+from services.upstream import UpstreamNotFound, fetch_json
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -16,21 +22,93 @@ router = APIRouter()
 OPENLIBRARY_API = "https://openlibrary.org"
 COVERS_API = "https://covers.openlibrary.org/b"
 
+# Search document fields behind each book field (key and title are always requested)
+SEARCH_FIELDS = {
+    "id": ["key"],
+    "key": ["key"],
+    "title": ["title"],
+    "authors": ["author_name"],
+    "published_date": ["first_publish_year"],
+    "isbn": ["isbn"],
+    "cover": ["cover_i"],
+    "subjects": ["subject"],
+    "pages": ["number_of_pages_median"],
+    "language": ["language"],
+    "publisher": ["publisher"],
+    "has_fulltext": ["has_fulltext"],
+    "lending_available": ["lending_edition", "ia"],
+    "borrow_url": ["key"],
+    "read_url": ["key", "has_fulltext"],
+}
+
+# Resolved author records change rarely; keep them much longer than responses
+author_cache = MemoryCache(max_entries=settings.author_cache_max_entries)
+
+# Bounds author record fetches across all requests, not just within one book
+author_fetch_slots = asyncio.Semaphore(settings.author_fetch_concurrency)
+
 
 async def fetch_openlibrary(endpoint: str, params: dict = None) -> dict:
     """Fetch data from Open Library API"""
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{OPENLIBRARY_API}{endpoint}", params=params)
-            response.raise_for_status()
-            return response.json()
+        return await fetch_json("openlibrary", endpoint, params)
+    except UpstreamNotFound:
+        raise HTTPException(status_code=404, detail="Not found")
     except httpx.HTTPError as e:
         logger.error(f"Error fetching from Open Library: {e}")
         raise HTTPException(status_code=503, detail="Open Library API unavailable")
 
 
-def parse_openlibrary_book(doc: dict) -> OpenLibraryBook:
-    """Parse Open Library document into our model"""
+def parse_openlibrary_author(author_key: str, data: dict) -> BookAuthor:
+    """Parse an Open Library author record into our model"""
+    bio = data.get("bio")
+    if isinstance(bio, dict):
+        bio = bio.get("value")
+    
+    return BookAuthor(
+        name=data.get("name", "Unknown"),
+        key=data.get("key", author_key),
+        birth_date=data.get("birth_date"),
+        death_date=data.get("death_date"),
+        bio=bio
+    )
+
+
+async def fetch_author(author_key: str) -> Optional[BookAuthor]:
+    """Resolve an author key, using the long-lived author cache"""
+    cached = await author_cache.get(author_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        async with author_fetch_slots:
+            data = await fetch_openlibrary(f"{author_key}.json")
+    except HTTPException as e:
+        logger.warning(f"Could not resolve author {author_key}: {e.detail}")
+        return None
+    
+    author = parse_openlibrary_author(author_key, data)
+    await author_cache.set(author_key, author, ttl=settings.author_cache_ttl)
+    return author
+
+
+async def resolve_authors(author_keys: List[str]) -> List[BookAuthor]:
+    """Resolve several author keys concurrently (bounded), keeping their order"""
+    authors = await asyncio.gather(*(fetch_author(key) for key in author_keys))
+    return [author for author in authors if author is not None]
+
+
+def search_fields(fields: FieldSet = None) -> str:
+    """Value of the `fields` parameter of /search.json for a fieldset"""
+    names = ["key", "title"]
+    for field, doc_fields in SEARCH_FIELDS.items():
+        if wanted(fields, field):
+            names.extend(name for name in doc_fields if name not in names)
+    return ",".join(names)
+
+
+def parse_openlibrary_book(doc: dict, fields: FieldSet = None) -> OpenLibraryBook:
+    """Parse Open Library document into our model (optional attributes only if in `fields`)"""
     
     # Extract authors
     authors = []
@@ -38,11 +116,11 @@ def parse_openlibrary_book(doc: dict) -> OpenLibraryBook:
         authors = doc["author_name"]
     
     # Extract ISBNs
-    isbns = doc.get("isbn", [])
+    isbns = doc.get("isbn", []) if wanted(fields, "isbn") else []
     
     # Get cover URLs
     cover = None
-    if "cover_i" in doc:
+    if "cover_i" in doc and wanted(fields, "cover"):
         cover_id = doc["cover_i"]
         cover = BookCover(
             small=f"{COVERS_API}/id/{cover_id}-S.jpg",
@@ -51,7 +129,7 @@ def parse_openlibrary_book(doc: dict) -> OpenLibraryBook:
         )
     
     # Extract subjects
-    subjects = doc.get("subject", [])[:10]  # Limit to first 10
+    subjects = doc.get("subject", [])[:10] if wanted(fields, "subjects") else []  # Limit to first 10
     
     book_key = doc.get("key", "")
     
@@ -69,8 +147,8 @@ def parse_openlibrary_book(doc: dict) -> OpenLibraryBook:
         cover=cover,
         source="Open Library",
         subjects=subjects,
-        has_fulltext=doc.get("has_fulltext", False),
-        lending_available=doc.get("lending_edition", False) or doc.get("ia", None) is not None,
+        has_fulltext=bool(doc.get("has_fulltext")),
+        lending_available=bool(doc.get("lending_edition")) or doc.get("ia") is not None,
         borrow_url=f"{OPENLIBRARY_API}{book_key}" if book_key else None,
         read_url=f"{OPENLIBRARY_API}{book_key}" if doc.get("has_fulltext") else None
     )
@@ -80,7 +158,8 @@ def parse_openlibrary_book(doc: dict) -> OpenLibraryBook:
 async def search_books(
     q: str = Query(..., description="Search query", min_length=1),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(20, ge=1, le=100, description="Results per page")
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Search books in Open Library
@@ -88,37 +167,43 @@ async def search_books(
     **Examples:**
     - `/search?q=python programming`
     - `/search?q=shakespeare&page=1&limit=10`
+    - `/search?q=dune&fields=title,authors,cover` - Only these fields (and `id`)
     """
+    fieldset = parse_fields(fields)
     try:
         offset = (page - 1) * limit
         params = {
             "q": q,
             "offset": offset,
             "limit": limit,
-            "fields": "key,title,author_name,first_publish_year,isbn,cover_i,subject,number_of_pages_median,language,publisher,has_fulltext,lending_edition,ia"
+            "fields": search_fields(fieldset)
         }
         
         data = await fetch_openlibrary("/search.json", params)
         
-        books = [parse_openlibrary_book(doc) for doc in data.get("docs", [])]
+        books = [parse_openlibrary_book(doc, fieldset) for doc in data.get("docs", [])]
+        
+        if fieldset is None:
+            # Sparse records would stay in the local index as they are
+            observe_books(books)
         
-        return SearchResult(
+        return sparse_result(SearchResult(
             query=q,
             total_results=data.get("numFound", 0),
             sources={"openlibrary": len(books)},
             books=books,
             page=page,
             per_page=limit
-        )
+        ), fieldset)
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/book/{book_id:path}", response_model=OpenLibraryBook)
+@router.get("/book/{book_id:path}", response_model=OpenLibraryBookDetail)
 async def get_book(book_id: str):
     """
-    Get detailed information about a specific book
+    Get detailed information about a specific book, with resolved author records
     
     **book_id** can be:
     - Open Library ID (e.g., `/works/OL45804W`)
@@ -141,16 +226,13 @@ async def get_book(book_id: str):
         title = data.get("title", "Unknown Title")
         
         # Get authors
-        authors = []
-        if "authors" in data:
-            for author in data["authors"]:
-                author_key = author.get("author", {}).get("key") if isinstance(author.get("author"), dict) else author.get("key")
-                if author_key:
-                    try:
-                        author_data = await fetch_openlibrary(f"{author_key}.json")
-                        authors.append(author_data.get("name", "Unknown"))
-                    except:
-                        pass
+        author_keys = []
+        for author in data.get("authors", []):
+            author_key = author.get("author", {}).get("key") if isinstance(author.get("author"), dict) else author.get("key")
+            if author_key:
+                author_keys.append(author_key)
+        authors_detail = await resolve_authors(author_keys)
+        authors = [author.name for author in authors_detail]
         
         # Get cover
         cover = None
@@ -168,7 +250,7 @@ async def get_book(book_id: str):
             desc = data["description"]
             description = desc.get("value") if isinstance(desc, dict) else str(desc)
         
-        return OpenLibraryBook(
+        book = OpenLibraryBookDetail(
             id=book_id,
             key=data.get("key", book_id),
             title=title,
@@ -185,12 +267,15 @@ async def get_book(book_id: str):
             has_fulltext=False,
             lending_available=False,
             borrow_url=f"{OPENLIBRARY_API}/{book_id}",
-            read_url=None
+            read_url=None,
+            authors_detail=authors_detail
         )
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
+        observe_books([book])
+        return book
+    except HTTPException as e:
+        if e.status_code == 404:
             raise HTTPException(status_code=404, detail="Book not found")
-        raise HTTPException(status_code=503, detail="Open Library API error")
+        raise
     except Exception as e:
         logger.error(f"Get book error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -200,7 +285,8 @@ async def get_book(book_id: str):
 async def get_books_by_subject(
     subject: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by subject/topic
@@ -210,6 +296,7 @@ async def get_books_by_subject(
     - `/subjects/history`
     - `/subjects/programming`
     """
+    fieldset = parse_fields(fields)
     try:
         offset = (page - 1) * limit
         data = await fetch_openlibrary(
@@ -250,15 +337,16 @@ async def get_books_by_subject(
                 read_url=None
             )
             books.append(book)
+        observe_books(books)
         
-        return SearchResult(
+        return sparse_result(SearchResult(
             query=f"subject:{subject}",
             total_results=data.get("work_count", 0),
             sources={"openlibrary": len(books)},
             books=books,
             page=page,
             per_page=limit
-        )
+        ), fieldset)
     except Exception as e:
         logger.error(f"Subject search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -268,7 +356,8 @@ async def get_books_by_subject(
 async def get_author_books(
     author_id: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get books by a specific author
@@ -278,6 +367,7 @@ async def get_author_books(
     **Example:**
     - `/author/OL23919A` (J.K. Rowling)
     """
+    fieldset = parse_fields(fields)
     try:
         offset = (page - 1) * limit
         data = await fetch_openlibrary(
@@ -307,11 +397,12 @@ async def get_author_books(
                 read_url=None
             )
             books.append(book)
+        observe_books(books)
         
         return {
             "author_id": author_id,
             "total_works": data.get("size", 0),
-            "books": books,
+            "books": dump_books(books, fieldset),
             "page": page,
             "per_page": limit
         }
@@ -4,17 +4,38 @@ Aggregates results from multiple book sources
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
-import httpx
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import Any, Awaitable, Dict, Optional, List, Tuple
 import asyncio
+import base64
+import hashlib
+import json
 import logging
 
-from models import SearchResult, BookBase
-from routers import openlibrary, gutenberg, googlebooks
+from config import settings
+from models import SearchResult, BookBase, MergedBook, ResultBook
+from routers import openlibrary, googlebooks
+from services.dedup import FuzzyDeduplicator, dump_keys, load_keys
+from services.grouping import rank_by_cluster_size
+from services.isbn import normalize_isbn
+from services.merge import merge_by_isbn, merge_records, cache_merged_records, isbn_cache_key
+from services import cache, indexing, json_codec
+from services.fieldsets import (
+    FIELDS_DESCRIPTION, dump_books, parse_fields, project, result_data, sparse_result,
+)
+from services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Serializes books the same way SearchResult.books does (merged records
+# keep their merge fields, also in cached windows)
+BOOK_LIST = TypeAdapter(List[ResultBook])
+
+# One window extension per query at a time
+window_flight = SingleFlight()
+
 
 @router.get("/all", response_model=SearchResult)
 async def search_all_sources(
@@ -23,8 +44,19 @@ async def search_all_sources(
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
     sources: Optional[str] = Query(
         None, 
-        description="Comma-separated sources: openlibrary,gutenberg,googlebooks"
-    )
+        description="Comma-separated sources: openlibrary,gutenberg,googlebooks,local"
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="`next_cursor` from the previous page (takes precedence over page)"
+    ),
+    deadline_ms: Optional[int] = Query(
+        None,
+        ge=50,
+        le=30000,
+        description="Latency budget; sources still pending are dropped (see timed_out_sources)"
+    ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Search across all book sources simultaneously
@@ -33,86 +65,388 @@ async def search_all_sources(
     - `openlibrary` - Open Library (Internet Archive)
     - `gutenberg` - Project Gutenberg
     - `googlebooks` - Google Books
+    - `local` - Books already seen or ingested by this server (no upstream calls)
     
     **Examples:**
     - `/all?q=python programming` - Search all sources
+    - `/all?q=pride and prejudice&sources=local` - Answer from the local index only
     - `/all?q=shakespeare&sources=gutenberg,openlibrary` - Search specific sources
     - `/all?q=data science&page=1&limit=30` - Custom pagination
+    - `/all?q=dune&cursor=...` - Next page, using `next_cursor` from the previous response
+    - `/all?q=dune&deadline_ms=500` - Return whatever has arrived after 500 ms
+    - `/all?q=dune&fields=title,authors,cover` - Only these book fields (and `id`)
+    
+    Results come from a cached, merged window per query that grows by one
+    upstream page per source only when a page past its end is requested.
+    Windows hold full records (merging needs them), so `fields` only trims
+    the response.
+    
+    `total_results` counts the merged results fetched so far, so it grows as
+    deeper pages are requested; `next_cursor` tells whether more exist.
     """
+    fieldset = parse_fields(fields)
     try:
-        # Determine which sources to search
-        if sources:
-            source_list = [s.strip().lower() for s in sources.split(",")]
-        else:
-            source_list = ["openlibrary", "gutenberg", "googlebooks"]
+        source_list = parse_sources(sources)
+        key = window_key(q, source_list, limit)
+        offset = decode_cursor(cursor, key) if cursor else (page - 1) * limit
         
-        # Create tasks for parallel searching
-        tasks = []
+        window, timed_out = await get_window(q, source_list, limit, offset, deadline_ms)
+        books = window["books"][offset:offset + limit]
         
-        if "openlibrary" in source_list:
-            tasks.append(search_openlibrary(q, page, limit))
-        
-        if "gutenberg" in source_list:
-            tasks.append(search_gutenberg(q, page, limit))
-        
-        if "googlebooks" in source_list:
-            tasks.append(search_googlebooks(q, page, limit))
-        
-        # Execute all searches in parallel
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Combine results
-        all_books = []
-        source_counts = {}
-        total_results = 0
-        
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.warning(f"Source {source_list[i]} failed: {result}")
-                continue
-            
-            if isinstance(result, dict) and "books" in result:
-                books = result["books"]
-                source_name = source_list[i]
-                source_counts[source_name] = len(books)
-                all_books.extend(books)
-                total_results += result.get("total_results", len(books))
-        
-        # Remove duplicates based on title similarity
-        unique_books = deduplicate_books(all_books)
-        
-        # Sort by relevance (books appearing in multiple sources first)
-        sorted_books = sorted(
-            unique_books,
-            key=lambda x: sum(1 for b in all_books if books_similar(x, b)),
-            reverse=True
+        has_more = len(window["books"]) > offset + limit or (
+            len(window["books"]) < settings.search_window_max_books and any(
+                source not in window["exhausted"] for source in window["offsets"]
+            )
         )
         
-        # Apply pagination to combined results
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_books = sorted_books[start_idx:end_idx]
-        
-        return SearchResult(
+        return sparse_result(SearchResult(
             query=q,
-            total_results=len(unique_books),
-            sources=source_counts,
-            books=paginated_books,
-            page=page,
-            per_page=limit
-        )
+            total_results=len(window["books"]),
+            sources=window["counts"],
+            books=BOOK_LIST.validate_python(books),
+            page=offset // limit + 1,
+            per_page=limit,
+            timed_out_sources=timed_out,
+            next_cursor=encode_cursor(offset + limit, key) if has_more else None
+        ), fieldset)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Multi-source search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/stream")
+async def stream_search(
+    q: str = Query(..., description="Search query", min_length=1),
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page"),
+    sources: Optional[str] = Query(
+        None, 
+        description="Comma-separated sources: openlibrary,gutenberg,googlebooks,local"
+    ),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Search across sources, streaming each source's books as soon as they arrive
+    
+    Emits one `source` event per source (in completion order), then a
+    `summary` event with the merged, de-duplicated result (same shape as `/all`).
+    
+    **Examples:**
+    - `/stream?q=python programming` - Newline-delimited JSON
+    - `/stream?q=shakespeare&format=sse` - Server-Sent Events
+    - `/stream?q=dune&fields=title,authors` - Only these book fields (and `id`)
+    """
+    source_list = parse_sources(sources)
+    fieldset = parse_fields(fields)
+    
+    async def run(source: str):
+        return source, await SOURCE_SEARCHES[source](q, page, limit)
+    
+    async def events():
+        tasks = [asyncio.ensure_future(run(source)) for source in source_list]
+        completed = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    source_name, result = await next_done
+                except Exception as e:
+                    logger.warning(f"Streaming source failed: {e}")
+                    continue
+                
+                completed.append((source_name, result))
+                yield encode_event(format, "source", {
+                    "source": source_name,
+                    "total_results": result.get("total_results", 0),
+                    "books": project(BOOK_LIST.dump_python(result["books"], mode="json"), fieldset)
+                })
+            
+            summary = await combine_results(q, page, limit, completed)
+            yield encode_event(format, "summary", result_data(summary, fieldset))
+        except Exception as e:
+            logger.error(f"Streaming search error: {e}")
+            yield encode_event(format, "error", {"error": str(e)})
+        finally:
+            # Client went away or a source failed: don't leave searches running
+            for task in tasks:
+                task.cancel()
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def encode_event(format: str, event: str, data: dict) -> str:
+    """Encode one stream event as an NDJSON line or an SSE message"""
+    if format == "sse":
+        return f"event: {event}\ndata: {json_codec.dumps(data).decode()}\n\n"
+    return json_codec.dumps({"event": event, **data}).decode() + "\n"
+
+
+def window_key(q: str, source_list: List[str], limit: int) -> str:
+    """Cache key of the merged result window for a query"""
+    return cache.make_key("search-window", "/all", {
+        "q": q.lower(),
+        "sources": ",".join(source_list),
+        "limit": limit,
+    })
+
+
+def _window_tag(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def encode_cursor(offset: int, key: str) -> str:
+    """Opaque cursor: an offset into the window, tied to the query it came from"""
+    token = json.dumps({"o": offset, "w": _window_tag(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str) -> int:
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset = int(token["o"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if token.get("w") != _window_tag(key) or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor does not belong to this query")
+    return offset
+
+
+def new_window(source_list: List[str]) -> Dict[str, Any]:
+    return {
+        "offsets": {source: 0 for source in source_list},
+        "exhausted": [],
+        "counts": {source: 0 for source in source_list},
+        "books": [],
+        # Dedup keys of the books above, so extensions don't rebuild them
+        "dedup_keys": [],
+    }
+
+
+async def search_from(source: str, q: str, offset: int, limit: int) -> dict:
+    """
+    Up to `limit` of a source's results starting at `offset`, plus the
+    offset to continue from
+    
+    Sources are paged, so this fetches the page holding `offset` in a size
+    the source returns whole and drops the books before `offset`.
+    """
+    size = min(limit, SOURCE_PAGE_LIMITS.get(source, limit))
+    page, skip = divmod(offset, size)
+    result = await SOURCE_SEARCHES[source](q, page + 1, size)
+    books = result.get("books", [])
+    if books and skip >= len(books):
+        # The page came back short (records the source could not parse),
+        # so everything it had was seen already: go on with the next one
+        page, skip = page + 1, 0
+        result = await SOURCE_SEARCHES[source](q, page + 1, size)
+        books = result.get("books", [])
+    return {
+        "books": books[skip:],
+        "total_results": result.get("total_results", 0),
+        "offset": page * size + len(books),
+    }
+
+
+async def extend_window(q: str, limit: int, window: Dict[str, Any], deadline_ms: float) -> List[str]:
+    """
+    Fetch the next books of every unfinished source and append the ones not
+    already in the window; returns the sources that missed the deadline
+    
+    Books already in the window keep their positions, so earlier cursors
+    stay valid; the new books are ranked among themselves.
+    """
+    active = [source for source in window["offsets"] if source not in window["exhausted"]]
+    completed, timed_out = await search_with_deadline(
+        {source: search_from(source, q, window["offsets"][source], limit) for source in active},
+        deadline_ms
+    )
+    
+    new_books = []
+    for source_name, result in completed:
+        books = result["books"]
+        window["offsets"][source_name] = result["offset"]
+        window["counts"][source_name] += len(books)
+        if not books or result["offset"] >= result["total_results"]:
+            window["exhausted"].append(source_name)
+        new_books.extend(books)
+    
+    merged_books = merge_by_isbn(new_books)
+    await cache_merged_records(merged_books)
+    
+    unique_books, keys = FuzzyDeduplicator.from_settings().deduplicate_after(
+        load_keys(window["dedup_keys"]), merged_books
+    )
+    sorted_books = rank_by_cluster_size(unique_books, new_books)
+    window["books"].extend(BOOK_LIST.dump_python(sorted_books, mode="json"))
+    window["dedup_keys"].extend(dump_keys(keys))
+    return timed_out
+
+
+async def fill_window(
+    q: str,
+    source_list: List[str],
+    limit: int,
+    offset: int,
+    deadline: float
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Extend the cached window until it covers offset + limit books, nothing
+    is left or the deadline (event loop time) passes; returns the window and
+    the sources whose fetch was still pending at the deadline
+    """
+    key = window_key(q, source_list, limit)
+    cached = await cache.response_cache.get(key)
+    is_new = cached is None
+    if cached is not None:
+        # Copy the containers: the memory cache hands out the stored object
+        window = {name: type(value)(value) for name, value in cached.items()}
+    else:
+        window = new_window(source_list)
+    
+    loop = asyncio.get_running_loop()
+    timed_out: List[str] = []
+    extended = False
+    
+    while len(window["books"]) < min(offset + limit, settings.search_window_max_books):
+        if all(source in window["exhausted"] for source in window["offsets"]):
+            break
+        remaining_ms = (deadline - loop.time()) * 1000
+        if remaining_ms <= 0:
+            # Out of time between extensions: the sources that answered did
+            # not time out, the page is just shorter (next_cursor continues it)
+            break
+        
+        progress = dict(window["offsets"])
+        timed_out = await extend_window(q, limit, window, remaining_ms)
+        extended = True
+        if window["offsets"] == progress:
+            break
+    
+    # A first page missing timed-out sources is not kept: the next request
+    # rebuilds it, by then usually from upstream responses already cached
+    if extended and not (is_new and timed_out):
+        await cache.response_cache.set(key, window, ttl=settings.search_window_ttl)
+    return window, timed_out
+
+
+async def get_window(
+    q: str,
+    source_list: List[str],
+    limit: int,
+    offset: int,
+    deadline_ms: Optional[int]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Window covering offset + limit, extending it at most once per request in flight"""
+    key = window_key(q, source_list, limit)
+    # One deadline for the whole request, even if it has to extend twice
+    deadline = asyncio.get_running_loop().time() + (deadline_ms or settings.search_deadline_ms) / 1000
+    
+    def fill():
+        return fill_window(q, source_list, limit, offset, deadline)
+    
+    window, timed_out = await window_flight.do(key, fill)
+    if len(window["books"]) < offset + limit and not timed_out:
+        # We joined an extension made for a shallower page; extend for ours
+        window, timed_out = await window_flight.do(key, fill)
+    return window, timed_out
+
+
+def parse_sources(sources: Optional[str]) -> List[str]:
+    """Known sources from a comma-separated list (defaults to all upstream sources)"""
+    if not sources:
+        return DEFAULT_SOURCES
+    requested = [s.strip().lower() for s in sources.split(",")]
+    return [s for s in SOURCE_SEARCHES if s in requested]
+
+
+async def search_with_deadline(
+    searches: Dict[str, Awaitable[dict]],
+    deadline_ms: Optional[int] = None
+) -> Tuple[List[Tuple[str, dict]], List[str]]:
+    """
+    Run per-source searches concurrently until the deadline
+    
+    Returns the (source, result) pairs that completed and the names of the
+    sources that were cancelled because they ran out of time.
+    """
+    deadline = (deadline_ms or settings.search_deadline_ms) / 1000
+    tasks = {asyncio.ensure_future(search): source for source, search in searches.items()}
+    if not tasks:
+        return [], []
+    
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    
+    completed = []
+    for task, source_name in tasks.items():
+        if task not in done:
+            continue
+        if task.exception() is not None:
+            logger.warning(f"Source {source_name} failed: {task.exception()}")
+            continue
+        completed.append((source_name, task.result()))
+    
+    timed_out = [tasks[task] for task in tasks if task in pending]
+    if timed_out:
+        logger.warning(f"Sources timed out after {deadline * 1000:.0f} ms: {', '.join(timed_out)}")
+    return completed, timed_out
+
+
+async def combine_results(
+    q: str,
+    page: int,
+    limit: int,
+    results: List[Tuple[str, dict]],
+    timed_out: Optional[List[str]] = None
+) -> SearchResult:
+    """Merge, de-duplicate and rank one page of per-source results into one SearchResult"""
+    all_books = []
+    source_counts = {}
+    
+    for source_name, result in results:
+        if isinstance(result, dict) and "books" in result:
+            books = result["books"]
+            source_counts[source_name] = len(books)
+            all_books.extend(books)
+    
+    # Join records from different sources on normalized ISBN
+    merged_books = merge_by_isbn(all_books)
+    await cache_merged_records(merged_books)
+    
+    # Remove duplicates based on title similarity
+    unique_books = deduplicate_books(merged_books)
+    
+    # Sort by relevance (books appearing in multiple sources first)
+    sorted_books = rank_by_cluster_size(unique_books, all_books)
+    
+    # Each source already returned page `page`, so the merged list is that
+    # page as a whole (slicing it again would skip into an empty range)
+    return SearchResult(
+        query=q,
+        total_results=len(unique_books),
+        sources=source_counts,
+        books=sorted_books,
+        page=page,
+        per_page=limit,
+        timed_out_sources=timed_out or []
+    )
+
+
 async def search_openlibrary(q: str, page: int, limit: int) -> dict:
     """Search Open Library"""
     try:
         # Import here to avoid circular imports
         from routers.openlibrary import search_books
-        result = await search_books(q=q, page=page, limit=limit)
+        result = await search_books(q=q, page=page, limit=limit, fields=None)
         return {
             "books": result.books,
             "total_results": result.total_results
@@ -126,7 +460,7 @@ async def search_gutenberg(q: str, page: int, limit: int) -> dict:
     """Search Project Gutenberg"""
     try:
         from routers.gutenberg import search_books
-        result = await search_books(q=q, page=page, limit=limit)
+        result = await search_books(q=q, page=page, limit=limit, fields=None)
         return {
             "books": result.books,
             "total_results": result.total_results
@@ -140,7 +474,7 @@ async def search_googlebooks(q: str, page: int, limit: int) -> dict:
     """Search Google Books"""
     try:
         from routers.googlebooks import search_books
-        result = await search_books(q=q, page=page, limit=limit)
+        result = await search_books(q=q, page=page, limit=limit, fields=None)
         return {
             "books": result.books,
             "total_results": result.total_results
@@ -150,49 +484,111 @@ async def search_googlebooks(q: str, page: int, limit: int) -> dict:
         return {"books": [], "total_results": 0}
 
 
-def books_similar(book1: BookBase, book2: BookBase) -> bool:
-    """Check if two books are similar (likely the same book)"""
-    # Normalize titles for comparison
-    title1 = book1.title.lower().strip()
-    title2 = book2.title.lower().strip()
-    
-    # Check if titles are very similar
-    if title1 == title2:
-        return True
+async def search_local(q: str, page: int, limit: int) -> dict:
+    """Search the local BM25 index of books seen so far"""
+    try:
+        return await indexing.search_local(q, page, limit)
+    except Exception as e:
+        logger.error(f"Local search failed: {e}")
+        return {"books": [], "total_results": 0}
+
+
+SOURCE_SEARCHES = {
+    "openlibrary": search_openlibrary,
+    "gutenberg": search_gutenberg,
+    "googlebooks": search_googlebooks,
+    "local": search_local,
+}
+
+DEFAULT_SOURCES = ["openlibrary", "gutenberg", "googlebooks"]
+
+# Largest page a source returns whole (Google Books caps maxResults at 40)
+SOURCE_PAGE_LIMITS = {"googlebooks": 40}
+
+
+def deduplicate_books(books: List[BookBase]) -> List[BookBase]:
+    """Remove duplicate books from list (fuzzy title match with author/ISBN checks)"""
+    return FuzzyDeduplicator.from_settings().deduplicate(books)
+
+
+@router.get("/suggest")
+async def suggest(
+    prefix: str = Query(..., description="What the user has typed so far", min_length=1),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions")
+):
+    """
+    Typeahead suggestions for titles and authors
     
-    # Check if one title contains the other (for subtitle variations)
-    if title1 in title2 or title2 in title1:
-        # Also check if they have common authors
-        authors1 = set(a.lower() for a in book1.authors)
-        authors2 = set(a.lower() for a in book2.authors)
-        if authors1 & authors2:  # If there's any author overlap
-            return True
+    Served from an in-memory prefix index of the local catalog and books
+    seen in earlier results, ranked by popularity. Never calls upstream APIs.
     
-    return False
+    **Examples:**
+    - `/suggest?prefix=pride`
+    - `/suggest?prefix=jane aus&limit=5`
+    """
+    return {
+        "prefix": prefix,
+        "suggestions": indexing.suggest_index.suggest(prefix, limit)
+    }
 
 
-def deduplicate_books(books: List[BookBase]) -> List[BookBase]:
-    """Remove duplicate books from list"""
-    unique_books = []
-    seen_combinations = set()
-    
-    for book in books:
-        # Create a unique identifier from title and first author
-        title_key = book.title.lower().strip()
-        author_key = book.authors[0].lower().strip() if book.authors else ""
-        combination = (title_key, author_key)
-        
-        if combination not in seen_combinations:
-            seen_combinations.add(combination)
-            unique_books.append(book)
+@router.get("/isbn/{isbn}", response_model=MergedBook)
+async def get_book_by_isbn(isbn: str):
+    """
+    Look up a book by ISBN in all sources and merge the records
+    
+    Accepts ISBN-10 or ISBN-13, with or without hyphens.
     
-    return unique_books
+    **Examples:**
+    - `/isbn/9780141439518`
+    - `/isbn/0-14-143951-3`
+    """
+    isbn_13 = normalize_isbn(isbn)
+    if not isbn_13:
+        raise HTTPException(status_code=400, detail="Invalid ISBN")
+    
+    cached = await cache.response_cache.get(isbn_cache_key(isbn_13))
+    if cached is not None:
+        return cached
+    
+    try:
+        results = await asyncio.gather(
+            openlibrary.fetch_openlibrary("/search.json", {"isbn": isbn_13}),
+            googlebooks.fetch_google_books("/volumes", {"q": f"isbn:{isbn_13}"}),
+            return_exceptions=True
+        )
+        
+        books = []
+        if not isinstance(results[0], Exception):
+            books.extend(openlibrary.parse_openlibrary_book(doc) for doc in results[0].get("docs", [])[:1])
+        if not isinstance(results[1], Exception):
+            books.extend(googlebooks.parse_google_book(item) for item in results[1].get("items", [])[:1])
+        
+        if not books:
+            raise HTTPException(status_code=404, detail="Book not found with this ISBN")
+        
+        merged = merge_records(books)
+        merged.isbn_13 = isbn_13
+        await cache_merged_records([merged])
+        return merged
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ISBN lookup error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/compare")
 async def compare_sources(
     q: str = Query(..., description="Search query", min_length=1),
-    limit: int = Query(10, ge=1, le=50, description="Results per source")
+    limit: int = Query(10, ge=1, le=50, description="Results per source"),
+    deadline_ms: Optional[int] = Query(
+        None,
+        ge=50,
+        le=30000,
+        description="Latency budget; sources still pending are reported as timed out"
+    ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Compare search results across all sources side-by-side
@@ -202,33 +598,28 @@ async def compare_sources(
     **Examples:**
     - `/compare?q=machine learning`
     - `/compare?q=shakespeare&limit=5`
+    - `/compare?q=dune&fields=title,authors` - Only these book fields (and `id`)
     """
+    fieldset = parse_fields(fields)
     try:
-        # Search all sources in parallel
-        tasks = [
-            search_openlibrary(q, 1, limit),
-            search_gutenberg(q, 1, limit),
-            search_googlebooks(q, 1, limit)
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Search all sources in parallel, within the latency budget
+        completed, timed_out = await search_with_deadline(
+            {source: SOURCE_SEARCHES[source](q, 1, limit) for source in DEFAULT_SOURCES},
+            deadline_ms
+        )
+        results = dict(completed)
         
         comparison = {
             "query": q,
             "sources": {
-                "openlibrary": {
-                    "total": results[0].get("total_results", 0) if not isinstance(results[0], Exception) else 0,
-                    "books": results[0].get("books", []) if not isinstance(results[0], Exception) else []
-                },
-                "gutenberg": {
-                    "total": results[1].get("total_results", 0) if not isinstance(results[1], Exception) else 0,
-                    "books": results[1].get("books", []) if not isinstance(results[1], Exception) else []
-                },
-                "googlebooks": {
-                    "total": results[2].get("total_results", 0) if not isinstance(results[2], Exception) else 0,
-                    "books": results[2].get("books", []) if not isinstance(results[2], Exception) else []
+                source: {
+                    "total": results.get(source, {}).get("total_results", 0),
+                    "books": dump_books(results.get(source, {}).get("books", []), fieldset),
+                    "timed_out": source in timed_out
                 }
-            }
+                for source in DEFAULT_SOURCES
+            },
+            "timed_out_sources": timed_out
         }
         
         return comparison
@@ -240,7 +631,8 @@ async def compare_sources(
 
 @router.get("/random")
 async def get_random_books(
-    count: int = Query(10, ge=1, le=50, description="Number of random books")
+    count: int = Query(10, ge=1, le=50, description="Number of random books"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get random books from various sources
@@ -248,7 +640,9 @@ async def get_random_books(
     **Examples:**
     - `/random`
     - `/random?count=20`
+    - `/random?fields=title,cover` - Only these book fields (and `id`)
     """
+    fieldset = parse_fields(fields)
     try:
         # Get popular books from different sources as "random"
         tasks = [
@@ -270,7 +664,7 @@ async def get_random_books(
         
         return {
             "count": len(all_books[:count]),
-            "books": all_books[:count]
+            "books": dump_books(all_books[:count], fieldset)
         }
         
     except Exception as e:
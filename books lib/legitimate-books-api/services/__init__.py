@@ -0,0 +1,17 @@
+"""
+Shared services for Legitimate Free Books API
+"""
+
+from . import (
+    json_codec, http_clients, cache, negative_cache, singleflight, refresh,
+    circuit_breaker, hedging, governor, upstream, cache_snapshot,
+    grouping, isbn, merge, dedup, gutenberg_catalog,
+    search_index, suggest, indexing, rate_limit, fieldsets,
+)
+
+__all__ = [
+    "json_codec", "http_clients", "cache", "negative_cache", "singleflight", "refresh",
+    "circuit_breaker", "hedging", "governor", "upstream", "cache_snapshot",
+    "grouping", "isbn", "merge", "dedup", "gutenberg_catalog",
+    "search_index", "suggest", "indexing", "rate_limit", "fieldsets",
+]
@@ -0,0 +1,228 @@
+"""
+Response cache for upstream fetches
+Bounded in-process LRU/TTL cache or Redis (shared between workers)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+import logging
+import time
+
+from config import settings
+from services import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(source: str, endpoint: str, params: Optional[dict] = None) -> str:
+    """Build a normalized cache key from source, endpoint and query params"""
+    endpoint = "/" + endpoint.strip().strip("/")
+    normalized = []
+    for name, value in sorted((params or {}).items()):
+        if value is None:
+            continue
+        normalized.append((name, " ".join(str(value).split())))
+    query = urlencode(normalized)
+    return f"{source}:{endpoint}?{query}" if query else f"{source}:{endpoint}"
+
+
+class CacheBackend:
+    """
+    Base class for response cache backends
+
+    Entries are kept for `stale_ttl` seconds past their TTL: `get()` only
+    returns fresh values, `get_entry()` also returns stale ones so callers
+    can serve them while revalidating.
+    """
+
+    def __init__(self, stale_ttl: int = 0):
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, seconds until it goes stale) or None, without touching the counters"""
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self._lookup(key)
+        if entry is None or entry[1] <= 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Like get(), but stale entries are returned too (with a negative expiry)"""
+        entry = await self._lookup(key)
+        if entry is None:
+            self.misses += 1
+        elif entry[1] > 0:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    async def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until `key` goes stale (negative if it already is), or None if absent"""
+        entry = await self._lookup(key)
+        return entry[1] if entry is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    async def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for this process"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Bounded in-process LRU cache with per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000, stale_ttl: int = 0):
+        super().__init__(stale_ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def items(self) -> Iterator[Tuple[str, Any, float]]:
+        """(key, value, seconds until stale) for every entry, most recently used first"""
+        now = time.monotonic()
+        for key, (expires_at, value) in reversed(self._entries.items()):
+            yield key, value, expires_at - now
+
+    async def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        expires_in = expires_at - time.monotonic()
+        if expires_in + self.stale_ttl <= 0:
+            del self._entries[key]
+            self.evictions += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value, expires_in
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def stats(self) -> Dict[str, Any]:
+        data = await super().stats()
+        data["entries"] = len(self._entries)
+        data["max_entries"] = self.max_entries
+        return data
+
+
+class RedisCache(CacheBackend):
+    """Redis-backed cache shared by all uvicorn workers"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "books-api:", stale_ttl: int = 0):
+        super().__init__(stale_ttl)
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self.errors = 0
+        self._redis = redis.from_url(url)
+
+    async def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                raw, pttl = await pipe.get(self.prefix + key).pttl(self.prefix + key).execute()
+        except Exception as e:
+            logger.warning(f"Redis cache get failed: {e}")
+            self.errors += 1
+            return None
+
+        if raw is None:
+            return None
+
+        # Keys are stored for ttl + stale_ttl; the remaining TTL tells freshness
+        expires_in = pttl / 1000 - self.stale_ttl if pttl >= 0 else float("inf")
+        return json_codec.loads(raw), expires_in
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        try:
+            await self._redis.set(self.prefix + key, json_codec.dumps(value), ex=ttl + self.stale_ttl)
+        except Exception as e:
+            logger.warning(f"Redis cache set failed: {e}")
+            self.errors += 1
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed: {e}")
+            self.errors += 1
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    async def stats(self) -> Dict[str, Any]:
+        data = await super().stats()
+        data["errors"] = self.errors
+        try:
+            info = await self._redis.info("stats")
+            # Redis evicts on its own (maxmemory policy); report the server counter
+            self.evictions = info.get("evicted_keys", 0) + info.get("expired_keys", 0)
+            data["evictions"] = self.evictions
+        except Exception as e:
+            logger.warning(f"Redis stats unavailable: {e}")
+        return data
+
+
+def create_cache() -> CacheBackend:
+    """Create the cache backend selected in settings"""
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.redis_url, stale_ttl=settings.cache_stale_ttl)
+    return MemoryCache(settings.cache_max_entries, stale_ttl=settings.cache_stale_ttl)
+
+
+response_cache: CacheBackend = MemoryCache(settings.cache_max_entries, stale_ttl=settings.cache_stale_ttl)
+
+
+async def init_cache() -> CacheBackend:
+    """Install the configured cache backend (called from the app lifespan)"""
+    global response_cache
+    response_cache = create_cache()
+    logger.info(f"Response cache backend: {response_cache.name}")
+    return response_cache
+
+
+async def close_cache() -> None:
+    await response_cache.close()
@@ -0,0 +1,164 @@
+"""
+Warm-start snapshots of the in-process response cache
+The hottest entries are written to a small SQLite file periodically and on
+shutdown, and restored in the background when a new process starts
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+
+from config import settings
+from services import cache, json_codec, upstream
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# (key, encoded JSON value, wall-clock expiry)
+Row = Tuple[str, bytes, float]
+
+
+def write_snapshot(rows: List[Row], path: str) -> None:
+    """Replace the snapshot file atomically (each writer uses its own temp file)"""
+    directory, name = os.path.split(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=f"{name}.", suffix=".tmp", delete=False) as tmp:
+        tmp_path = tmp.name
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany("INSERT OR IGNORE INTO entries (key, value, expires_at) VALUES (?, ?, ?)", rows)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> List[Row]:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT key, value, expires_at FROM entries ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+
+class CacheSnapshotter:
+    """Saves and restores the hottest entries of a MemoryCache"""
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 2000,
+        popularity: Optional[Callable[[str], int]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.popularity = popularity or (lambda key: 0)
+
+        self.loaded = False
+        self.restored = 0
+        self.snapshot_age: Optional[float] = None
+        self.last_saved: Optional[float] = None
+        self.saved_entries = 0
+
+    def _rows(self, backend: cache.MemoryCache) -> List[Row]:
+        """Hottest live entries: most requested first, then most recently used"""
+        now = time.time()
+        entries = [
+            (self.popularity(key), -rank, key, value, now + expires_in)
+            for rank, (key, value, expires_in) in enumerate(backend.items())
+            if expires_in + backend.stale_ttl > 0
+        ]
+        entries.sort(key=lambda entry: entry[:2], reverse=True)
+        return [
+            (key, json_codec.dumps(value), expires_at)
+            for _, _, key, value, expires_at in entries[:self.max_entries]
+        ]
+
+    async def save(self, backend: cache.CacheBackend) -> int:
+        if not isinstance(backend, cache.MemoryCache):
+            return 0
+        rows = self._rows(backend)
+        await asyncio.to_thread(write_snapshot, rows, self.path)
+        self.last_saved = time.time()
+        self.saved_entries = len(rows)
+        return len(rows)
+
+    async def load(self, backend: cache.CacheBackend, batch_size: int = 200) -> int:
+        """Restore a snapshot without blocking the event loop; live entries win"""
+        if not isinstance(backend, cache.MemoryCache) or not os.path.exists(self.path):
+            self.loaded = True
+            return 0
+
+        try:
+            self.snapshot_age = time.time() - os.path.getmtime(self.path)
+            rows = await asyncio.to_thread(read_snapshot, self.path)
+        except Exception as e:
+            logger.warning(f"Could not read cache snapshot {self.path}: {e}")
+            self.loaded = True
+            return 0
+
+        # Rows are stored hottest first; restore coldest first so the
+        # hottest end up most recently used
+        for count, (key, value, expires_at) in enumerate(reversed(rows), 1):
+            ttl = expires_at - time.time()
+            if key not in backend and ttl + backend.stale_ttl > 0:
+                await backend.set(key, json_codec.loads(value), ttl=ttl)
+                self.restored += 1
+            if count % batch_size == 0:
+                await asyncio.sleep(0)
+
+        self.loaded = True
+        logger.info(f"Restored {self.restored} cache entries from {self.path}")
+        return self.restored
+
+    async def run(self, interval: float) -> None:
+        """Load the snapshot, then save a fresh one every `interval` seconds"""
+        await self.load(cache.response_cache)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.save(cache.response_cache)
+            except Exception as e:
+                logger.warning(f"Cache snapshot failed: {e}")
+
+    def stats(self, backend: cache.CacheBackend) -> Dict[str, Any]:
+        """Cache warmth: how full the cache is and what came from the snapshot"""
+        data: Dict[str, Any] = {
+            "snapshot_loaded": self.loaded,
+            "restored_entries": self.restored,
+            "snapshot_age_s": round(self.snapshot_age) if self.snapshot_age is not None else None,
+            "last_saved_entries": self.saved_entries,
+            "last_saved_age_s": round(time.time() - self.last_saved) if self.last_saved else None,
+        }
+        if isinstance(backend, cache.MemoryCache):
+            data["warmth"] = round(len(backend) / backend.max_entries, 4)
+        return data
+
+
+def create_snapshotter() -> Optional[CacheSnapshotter]:
+    """Snapshotter configured in settings, or None when snapshots are disabled"""
+    if not settings.cache_snapshot_path:
+        return None
+    return CacheSnapshotter(
+        settings.cache_snapshot_path,
+        max_entries=settings.cache_snapshot_max_entries,
+        popularity=upstream.refresher.sketch.estimate,
+    )
+
+
+snapshotter = create_snapshotter()
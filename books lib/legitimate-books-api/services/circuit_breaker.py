@@ -0,0 +1,185 @@
+"""
+Per-source circuit breakers with adaptive timeouts
+A source that keeps failing (or stalling) is failed fast instead of
+tying up connections until the full timeout expires
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+import time
+
+import httpx
+
+from config import settings
+from services.http_clients import SOURCES
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of calling a source whose breaker is open"""
+
+    def __init__(self, source: str):
+        super().__init__(f"Circuit breaker open for {source}")
+        self.source = source
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when the failure or slow-call rate over the rolling
+    window crosses the threshold; open -> half-open after a cool-down;
+    half-open lets a few probe calls through and closes on success.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        max_timeout: float,
+        window_size: int = 50,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        min_timeout: float = 1.0,
+        timeout_multiplier: float = 2.0,
+    ):
+        self.source = source
+        self.max_timeout = max_timeout
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.min_timeout = min_timeout
+        self.timeout_multiplier = timeout_multiplier
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._half_open_calls = 0
+        # (succeeded, latency in seconds, timed out)
+        self._window: Deque[Tuple[bool, float, bool]] = deque(maxlen=window_size)
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream right now"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self._half_open_calls += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that never completed"""
+        if self.state == HALF_OPEN and self._half_open_calls:
+            self._half_open_calls -= 1
+
+    def record_success(self, latency: float) -> None:
+        if self.state == HALF_OPEN:
+            self._window.clear()
+            self._transition(CLOSED)
+        self._window.append((True, latency, False))
+        self._evaluate()
+
+    def record_failure(self, latency: float, timed_out: bool = False) -> None:
+        """A failed call; a timed-out one also counts towards the latency p95 (at the timeout)"""
+        if self.state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+        self._window.append((False, latency, timed_out))
+        self._evaluate()
+
+    def _evaluate(self) -> None:
+        if self.state != CLOSED or len(self._window) < self.min_calls:
+            return
+        calls = len(self._window)
+        failures = sum(1 for ok, _, _ in self._window if not ok)
+        slow = sum(1 for _, latency, _ in self._window if latency >= self.slow_call_seconds)
+        if failures / calls >= self.failure_rate or slow / calls >= self.failure_rate:
+            self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"Circuit breaker for {self.source}: {self.state} -> {state}")
+        self.state = state
+        self._half_open_calls = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+
+    def latency_p95(self) -> Optional[float]:
+        # Timeouts are included, or a stalling source would never raise its own timeout
+        return percentile([latency for ok, latency, timed_out in self._window if ok or timed_out], 0.95)
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging: the observed p95, once there are enough samples"""
+        if len(self._window) < self.min_calls:
+            return None
+        return self.latency_p95()
+
+    def timeout(self) -> float:
+        """Request timeout adapted to the observed p95 latency (the full timeout for probes)"""
+        if self.state != CLOSED:
+            return self.max_timeout
+        p95 = self.latency_p95()
+        if p95 is None or len(self._window) < self.min_calls:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.timeout_multiplier))
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = len(self._window)
+        failures = sum(1 for ok, _, _ in self._window if not ok)
+        p95 = self.latency_p95()
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": round(failures / calls, 3) if calls else 0.0,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "timeout_s": round(self.timeout(), 2),
+            "rejected": self.rejected,
+        }
+
+
+def create_breaker(source: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        source,
+        max_timeout=settings.upstream(source).timeout,
+        window_size=settings.breaker_window_size,
+        min_calls=settings.breaker_min_calls,
+        failure_rate=settings.breaker_failure_rate,
+        slow_call_seconds=settings.breaker_slow_call_seconds,
+        open_seconds=settings.breaker_open_seconds,
+        min_timeout=settings.adaptive_timeout_min,
+        timeout_multiplier=settings.adaptive_timeout_multiplier,
+    )
+
+
+breakers: Dict[str, CircuitBreaker] = {source: create_breaker(source) for source in SOURCES}
+
+
+def get_breaker(source: str) -> CircuitBreaker:
+    return breakers[source]
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {source: breaker.snapshot() for source, breaker in breakers.items()}
@@ -0,0 +1,232 @@
+"""
+Fuzzy duplicate detection for merged search results
+Shingled titles + MinHash signatures + LSH buckets, so each book is only
+compared with a handful of likely duplicates instead of every kept book
+"""
+
+from array import array
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+import hashlib
+import operator
+import re
+
+from config import settings
+from models import BookBase
+from services.merge import book_isbns
+
+_BRACKETED = re.compile(r"[\(\[\{][^\)\]\}]*[\)\]\}]")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# "Volume 2", "Vol. II", "Part 3", "Book IV", "No. 5" (after punctuation is dropped)
+_VOLUME = re.compile(r"\b(?:volume|vol|part|pt|book|bk|number|no|tome)\s+(\d+|[ivxlcdm]+)\b")
+_ROMAN_NUMERAL = re.compile(r"m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+
+
+def normalize_title(title: str) -> str:
+    """Lower-case, spell out '&', drop bracketed edition notes and punctuation"""
+    title = title.lower().replace("&", " and ")
+    title = _BRACKETED.sub(" ", title)
+    return " ".join(_NON_ALNUM.sub(" ", title).split())
+
+
+def _roman_to_int(numeral: str) -> int:
+    total = 0
+    for char, next_char in zip(numeral, numeral[1:] + " "):
+        value = _ROMAN_VALUES[char]
+        total += -value if value < _ROMAN_VALUES.get(next_char, 0) else value
+    return total
+
+
+def volume_numbers(title: str) -> FrozenSet[int]:
+    """
+    Volume/part/number markers in a title, as integers ("Vol. II" and
+    "Volume 2" -> {2}); bracketed notes are included
+    """
+    text = " ".join(_NON_ALNUM.sub(" ", title.lower()).split())
+    numbers = set()
+    for value in _VOLUME.findall(text):
+        if value.isdigit():
+            numbers.add(int(value))
+        elif _ROMAN_NUMERAL.fullmatch(value):
+            numbers.add(_roman_to_int(value))
+    return frozenset(numbers)
+
+
+def author_surnames(authors: List[str]) -> Set[str]:
+    """Surnames for author overlap checks ("Austen, Jane" and "Jane Austen" -> "austen")"""
+    surnames = set()
+    for author in authors:
+        name = author.split(",")[0] if "," in author else author
+        tokens = _NON_ALNUM.sub(" ", name.lower()).split()
+        if tokens:
+            surnames.add(tokens[0] if "," in author else tokens[-1])
+    return surnames
+
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Character k-grams of a normalized title"""
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures
+
+    Each shingle is hashed once with SHAKE-128 into `num_perm` independent
+    32-bit values; the signature is the element-wise minimum over shingles.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        self._salt = seed.to_bytes(4, "little")
+        self._digest_size = num_perm * 4
+
+    def _hash_row(self, shingle: str) -> array:
+        digest = hashlib.shake_128(self._salt + shingle.encode("utf-8")).digest(self._digest_size)
+        return array("I", digest)
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        rows = [self._hash_row(s) for s in shingles(text)]
+        return tuple(map(min, zip(*rows)))
+
+
+# What deduplication compares books by: title signature, author surnames,
+# ISBNs and volume numbers
+DedupKey = Tuple[Tuple[int, ...], Set[str], Set[str], FrozenSet[int]]
+
+
+def dump_keys(keys: Iterable[DedupKey]) -> List[list]:
+    """Dedup keys as JSON-compatible lists, to store next to the books they describe"""
+    return [[list(signature), sorted(surnames), sorted(isbns), sorted(volumes)]
+            for signature, surnames, isbns, volumes in keys]
+
+
+def load_keys(data: Iterable[list]) -> List[DedupKey]:
+    return [(tuple(signature), set(surnames), set(isbns), frozenset(volumes))
+            for signature, surnames, isbns, volumes in data]
+
+
+def estimated_jaccard(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+    return sum(map(operator.eq, sig1, sig2)) / len(sig1)
+
+
+class FuzzyDeduplicator:
+    """
+    Drop fuzzy duplicates from a list of books, keeping the first occurrence
+
+    - `threshold`: minimum estimated title Jaccard similarity
+    - `bands`: LSH bands; `num_perm` must be divisible by it
+    - `require_author_match`: when both books list authors, a surname must overlap
+    - `isbn_match`: books sharing an ISBN are duplicates regardless of title
+    - `isbn_conflict_distinct`: books whose ISBN lists are disjoint are kept apart
+
+    Titles with different volume/part numbers ("Volume 1" and "Volume 2")
+    are never merged on title similarity, however close their shingles are.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 96,
+        bands: int = 12,
+        require_author_match: bool = True,
+        isbn_match: bool = True,
+        isbn_conflict_distinct: bool = False,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.require_author_match = require_author_match
+        self.isbn_match = isbn_match
+        self.isbn_conflict_distinct = isbn_conflict_distinct
+        self.hasher = MinHasher(num_perm)
+
+    @classmethod
+    def from_settings(cls) -> "FuzzyDeduplicator":
+        return cls(
+            threshold=settings.dedup_threshold,
+            num_perm=settings.dedup_num_perm,
+            bands=settings.dedup_bands,
+            require_author_match=settings.dedup_require_author_match,
+            isbn_match=settings.dedup_isbn_match,
+            isbn_conflict_distinct=settings.dedup_isbn_conflict_distinct,
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def _is_duplicate(self, signature, surnames, isbns, volumes, other) -> bool:
+        other_signature, other_surnames, other_isbns, other_volumes = other
+
+        if self.isbn_conflict_distinct and isbns and other_isbns and not isbns & other_isbns:
+            return False
+
+        if volumes != other_volumes:
+            return False
+
+        if estimated_jaccard(signature, other_signature) < self.threshold:
+            return False
+
+        if self.require_author_match and (surnames or other_surnames):
+            return bool(surnames & other_surnames)
+        return True
+
+    def deduplicate(self, books: List[BookBase]) -> List[BookBase]:
+        return self.deduplicate_after([], books)[0]
+
+    def deduplicate_after(
+        self, seen: List[DedupKey], books: List[BookBase]
+    ) -> Tuple[List[BookBase], List[DedupKey]]:
+        """
+        Deduplicate `books` against each other and against books kept
+        earlier, given by their keys; returns the new unique books and
+        their keys (to pass as `seen` next time)
+        """
+        unique_books: List[BookBase] = []
+        kept: List[DedupKey] = []
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+        isbn_index: Dict[str, int] = {}
+        signatures: Dict[str, Tuple[int, ...]] = {}
+
+        def keep(key: DedupKey) -> None:
+            idx = len(kept)
+            kept.append(key)
+            for band_key in self._band_keys(key[0]):
+                buckets[band_key].append(idx)
+            for isbn in key[2]:
+                isbn_index.setdefault(isbn, idx)
+
+        for key in seen:
+            keep(key)
+
+        for book in books:
+            isbns = set(book_isbns(book))
+            if self.isbn_match and any(isbn in isbn_index for isbn in isbns):
+                continue
+
+            title = normalize_title(book.title)
+            signature = signatures.get(title)
+            if signature is None:
+                signature = self.hasher.signature(title)
+                signatures[title] = signature
+            surnames = author_surnames(book.authors)
+            volumes = volume_numbers(book.title)
+
+            candidates: Set[int] = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(buckets.get(band_key, ()))
+
+            if any(self._is_duplicate(signature, surnames, isbns, volumes, kept[idx]) for idx in candidates):
+                continue
+
+            unique_books.append(book)
+            keep((signature, surnames, isbns, volumes))
+
+        return unique_books, kept[len(seen):]
@@ -0,0 +1,69 @@
+"""
+Sparse fieldsets for list endpoints (`fields=id,title,authors,cover`)
+The chosen fields trim the upstream request where the source supports it,
+are the only optional attributes the parse functions compute, and the
+only keys serialized for each book
+"""
+
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from models import BookBase, GoogleBook, GutenbergBook, MergedBook, OpenLibraryBook, SearchResult
+from services.json_codec import FastJSONResponse
+
+# None means every field
+FieldSet = Optional[FrozenSet[str]]
+
+# Returned whether requested or not, so sparse records can still be told apart
+ALWAYS_INCLUDED = frozenset({"id"})
+
+BOOK_FIELDS = frozenset(
+    name
+    for model in (BookBase, OpenLibraryBook, GutenbergBook, GoogleBook, MergedBook)
+    for name in model.model_fields
+)
+
+FIELDS_DESCRIPTION = "Comma-separated book fields to return, e.g. `title,authors,cover` (`id` is always included)"
+
+
+def parse_fields(fields: Optional[str]) -> FieldSet:
+    """Known book fields from a comma-separated list (None when not given)"""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",")}
+    return frozenset(requested & BOOK_FIELDS) | ALWAYS_INCLUDED
+
+
+def wanted(fields: FieldSet, name: str) -> bool:
+    return fields is None or name in fields
+
+
+def project(books: List[Dict[str, Any]], fields: FieldSet) -> List[Dict[str, Any]]:
+    """Serialized books reduced to the chosen fields"""
+    if fields is None:
+        return books
+    return [{name: value for name, value in book.items() if name in fields} for book in books]
+
+
+def result_data(result: SearchResult, fields: FieldSet) -> Dict[str, Any]:
+    """A serialized SearchResult with only the chosen book fields"""
+    data = result.model_dump(mode="json")
+    data["books"] = project(data["books"], fields)
+    return data
+
+
+def dump_books(books: List[BookBase], fields: FieldSet) -> List[Any]:
+    """The books themselves, or JSON-ready dicts with only the chosen fields"""
+    if fields is None:
+        return books
+    return [book.model_dump(mode="json", include=fields) for book in books]
+
+
+def sparse_result(result: SearchResult, fields: FieldSet) -> Any:
+    """
+    A SearchResult as the route returns it: unchanged without a fieldset,
+    otherwise rendered directly with only the chosen book fields (sparse
+    books no longer match the response model, so it is bypassed)
+    """
+    if fields is None:
+        return result
+    return FastJSONResponse(result_data(result, fields))
@@ -0,0 +1,171 @@
+"""
+Outbound traffic governor per upstream source
+A token bucket smooths request rate, a semaphore caps in-flight requests,
+and callers queue for both up to a maximum wait
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+
+from config import settings
+from services.http_clients import SOURCES
+
+logger = logging.getLogger(__name__)
+
+
+class GovernorTimeout(httpx.HTTPError):
+    """Raised when a request waited too long for an outbound slot"""
+
+    def __init__(self, source: str, waited: float):
+        super().__init__(f"Outbound queue for {source} full (waited {waited:.2f}s)")
+        self.source = source
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out future tokens as reservations
+
+    The balance may go negative; each caller sleeps until its own token
+    has been refilled, which keeps waiters in arrival order without a lock.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Wait for a token; returns False (without consuming one) if that takes longer than max_wait"""
+        self._refill()
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if wait > max_wait:
+            return False
+        self._tokens -= 1
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._tokens += 1
+                raise
+        return True
+
+
+class Governor:
+    """Rate, concurrency and queueing limits for one upstream source"""
+
+    def __init__(
+        self,
+        source: str,
+        rate: Optional[float] = None,
+        burst: float = 1.0,
+        max_in_flight: int = 20,
+        max_wait: float = 2.0,
+    ):
+        self.source = source
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+
+    async def acquire(self) -> None:
+        """Wait for an outbound slot; raises GovernorTimeout after max_wait"""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise GovernorTimeout(self.source, time.monotonic() - start)
+
+            remaining = self.max_wait - (time.monotonic() - start)
+            try:
+                admitted = self.bucket is None or await self.bucket.acquire(remaining)
+            except BaseException:
+                self._semaphore.release()
+                raise
+            if not admitted:
+                self._semaphore.release()
+                self.rejected += 1
+                raise GovernorTimeout(self.source, time.monotonic() - start)
+        finally:
+            self.waiting -= 1
+
+        self.admitted += 1
+        self.in_flight += 1
+        self._total_wait += time.monotonic() - start
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def try_acquire_extra(self) -> bool:
+        """
+        Take an outbound slot and a rate token for an extra request (a hedge)
+        only if both are free right now; release() it like any other slot
+        """
+        if self._semaphore.locked():
+            return False
+        # A free slot with no waiters: acquired without suspending
+        await self._semaphore.acquire()
+        if self.bucket is not None and not self.bucket.try_acquire():
+            self._semaphore.release()
+            return False
+        self.in_flight += 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "rate_limit": self.bucket.rate if self.bucket else None,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._total_wait / self.admitted * 1000, 1) if self.admitted else 0.0,
+        }
+
+
+def create_governor(source: str) -> Governor:
+    upstream = settings.upstream(source)
+    return Governor(
+        source,
+        rate=upstream.rate_limit,
+        burst=upstream.rate_limit_burst,
+        max_in_flight=upstream.max_in_flight,
+        max_wait=upstream.max_queue_wait,
+    )
+
+
+governors: Dict[str, Governor] = {source: create_governor(source) for source in SOURCES}
+
+
+def get_governor(source: str) -> Governor:
+    return governors[source]
+
+
+def governor_states() -> Dict[str, Dict[str, Any]]:
+    return {source: governor.snapshot() for source, governor in governors.items()}
@@ -0,0 +1,74 @@
+"""
+Cross-source grouping engine
+Counts, for each book, how many results describe the same work, in near-linear time
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, List, Sequence, Set, Tuple
+
+from models import BookBase
+
+GroupKey = Tuple[str, FrozenSet[str]]
+
+
+def group_key(book: BookBase) -> GroupKey:
+    """Normalize a book's title and authors once into a comparable key"""
+    return (
+        book.title.lower().strip(),
+        frozenset(author.lower() for author in book.authors),
+    )
+
+
+class GroupingIndex:
+    """
+    Hash index over a list of books for similarity counting
+
+    Matches `books_similar`: two books are the same work if their titles
+    are equal, or one title contains the other and they share an author.
+    Exact titles are counted with a hash lookup; substring matching only
+    runs against books in the same author bucket.
+    """
+
+    def __init__(self, books: Sequence[BookBase]):
+        # Distinct (title, authors) keys with their multiplicity
+        multiplicity = Counter(group_key(book) for book in books)
+        self._keys: List[GroupKey] = list(multiplicity)
+        self._counts: List[int] = [multiplicity[key] for key in self._keys]
+
+        self._title_counts: Counter = Counter()
+        self._author_buckets: Dict[str, List[int]] = defaultdict(list)
+        for idx, (title, authors) in enumerate(self._keys):
+            self._title_counts[title] += self._counts[idx]
+            for author in authors:
+                self._author_buckets[author].append(idx)
+
+        self._memo: Dict[GroupKey, int] = {}
+
+    def cluster_size(self, book: BookBase) -> int:
+        """Number of indexed books similar to `book` (including itself if indexed)"""
+        key = group_key(book)
+        size = self._memo.get(key)
+        if size is None:
+            size = self._compute(key)
+            self._memo[key] = size
+        return size
+
+    def _compute(self, key: GroupKey) -> int:
+        title, authors = key
+        size = self._title_counts.get(title, 0)
+
+        candidates: Set[int] = set()
+        for author in authors:
+            candidates.update(self._author_buckets.get(author, ()))
+
+        for idx in candidates:
+            other_title = self._keys[idx][0]
+            if other_title != title and (title in other_title or other_title in title):
+                size += self._counts[idx]
+        return size
+
+
+def rank_by_cluster_size(books: List[BookBase], universe: Sequence[BookBase]) -> List[BookBase]:
+    """Sort books so works that appear in more results (across sources) come first"""
+    index = GroupingIndex(universe)
+    return sorted(books, key=index.cluster_size, reverse=True)
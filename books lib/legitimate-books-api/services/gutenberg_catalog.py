@@ -0,0 +1,343 @@
+"""
+Local Project Gutenberg catalog mirror
+Ingests a catalog dump into SQLite (with an FTS5 index) so Gutenberg
+routes can be answered without a round-trip to Gutendex.
+
+Supported dumps:
+- Gutenberg's CSV feed (`pg_catalog.csv`), which has no download counts
+- Saved Gutendex JSON (a `/books` page, a list of books or JSON lines)
+
+Build the catalog with `python ingest_catalog.py pg_catalog.csv`
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Gutendex serves 32 books per page; the local catalog mirrors that
+PAGE_SIZE = 32
+
+SUPPORTED_PARAMS = {"search", "topic", "languages", "sort", "page"}
+
+GUTENBERG_EBOOKS = "https://www.gutenberg.org/ebooks"
+GUTENBERG_CACHE = "https://www.gutenberg.org/cache/epub"
+
+SCHEMA = """
+CREATE TABLE books (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    downloads INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX books_downloads ON books (downloads DESC);
+CREATE TABLE book_languages (
+    book_id INTEGER NOT NULL,
+    code TEXT NOT NULL
+);
+CREATE INDEX book_languages_code ON book_languages (code, book_id);
+CREATE VIRTUAL TABLE books_fts USING fts5(
+    title, authors, subjects, bookshelves,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_AUTHOR_DATES = re.compile(r",?\s*(\d{1,4})?\??\s*(?:BCE?)?\s*-\s*(\d{1,4})?\??\s*(?:BCE?)?\s*$")
+_AUTHOR_ROLE = re.compile(r"\s*\[[^\]]*\]\s*$")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_csv_author(raw: str) -> Dict[str, Any]:
+    """Parse a CSV feed author such as 'Austen, Jane, 1775-1817' into Gutendex shape"""
+    name = _AUTHOR_ROLE.sub("", raw.strip())
+    birth_year = death_year = None
+    match = _AUTHOR_DATES.search(name)
+    if match and (match.group(1) or match.group(2)):
+        birth_year = int(match.group(1)) if match.group(1) else None
+        death_year = int(match.group(2)) if match.group(2) else None
+        name = name[:match.start()].strip()
+    return {"name": name.strip(", "), "birth_year": birth_year, "death_year": death_year}
+
+
+def csv_row_to_book(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a `pg_catalog.csv` row into a Gutendex-shaped book
+
+    The feed has no download counts, so `download_count` is 0 and the
+    catalog leaves everything ordered by popularity to Gutendex.
+    """
+    if row.get("Type", "Text") != "Text":
+        return None
+
+    book_id = int(row["Text#"])
+
+    def split(value: str) -> List[str]:
+        return [part.strip() for part in (value or "").split(";") if part.strip()]
+
+    return {
+        "id": book_id,
+        "title": " ".join((row.get("Title") or "Unknown Title").split()),
+        "authors": [parse_csv_author(author) for author in split(row.get("Authors", ""))],
+        "subjects": split(row.get("Subjects", "")),
+        "bookshelves": split(row.get("Bookshelves", "")),
+        "languages": split(row.get("Language", "")) or ["en"],
+        "copyright": False,
+        "media_type": "Text",
+        "formats": {
+            "text/html": f"{GUTENBERG_EBOOKS}/{book_id}.html.images",
+            "application/epub+zip": f"{GUTENBERG_EBOOKS}/{book_id}.epub3.images",
+            "application/x-mobipocket-ebook": f"{GUTENBERG_EBOOKS}/{book_id}.kf8.images",
+            "text/plain; charset=us-ascii": f"{GUTENBERG_EBOOKS}/{book_id}.txt.utf-8",
+            "image/jpeg": f"{GUTENBERG_CACHE}/{book_id}/pg{book_id}.cover.medium.jpg",
+        },
+        "download_count": 0,
+    }
+
+
+def read_csv_dump(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            book = csv_row_to_book(row)
+            if book is not None:
+                yield book
+
+
+def _books_from_json(value: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _books_from_json(item)
+    elif isinstance(value, dict):
+        if "results" in value:
+            yield from value["results"]
+        elif "id" in value:
+            yield value
+
+
+def read_gutendex_dump(path: str) -> Iterator[Dict[str, Any]]:
+    """Read saved Gutendex JSON: one document, or one page/book per line"""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    try:
+        yield from _books_from_json(json.loads(content))
+    except json.JSONDecodeError:
+        for line in content.splitlines():
+            if line.strip():
+                yield from _books_from_json(json.loads(line))
+
+
+def read_dump(path: str) -> Iterator[Dict[str, Any]]:
+    if path.lower().endswith(".csv"):
+        return read_csv_dump(path)
+    return read_gutendex_dump(path)
+
+
+def ingest(books: Iterable[Dict[str, Any]], db_path: str) -> int:
+    """Build a fresh catalog database from Gutendex-shaped books; returns the book count"""
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    seen = set()
+    try:
+        conn.executescript(SCHEMA)
+        for book in books:
+            book_id = int(book["id"])
+            if book_id in seen:
+                continue
+            seen.add(book_id)
+            conn.execute(
+                "INSERT INTO books (id, title, downloads, data) VALUES (?, ?, ?, ?)",
+                (
+                    book_id,
+                    book.get("title", "Unknown Title"),
+                    book.get("download_count") or 0,
+                    json.dumps(book, separators=(",", ":")),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO book_languages (book_id, code) VALUES (?, ?)",
+                [(book_id, code.lower()) for code in book.get("languages", [])],
+            )
+            conn.execute(
+                "INSERT INTO books_fts (rowid, title, authors, subjects, bookshelves) VALUES (?, ?, ?, ?, ?)",
+                (
+                    book_id,
+                    book.get("title", ""),
+                    " ".join(author.get("name", "") for author in book.get("authors", [])),
+                    " ".join(book.get("subjects", [])),
+                    " ".join(book.get("bookshelves", [])),
+                ),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return len(seen)
+
+
+def author_matches(author_name: str, book: Dict[str, Any]) -> bool:
+    """
+    Whether an author of a Gutendex-shaped book contains every word of `author_name`
+
+    Word order is ignored, so "charles dickens" matches "Dickens, Charles".
+    """
+    words = _WORD.findall(author_name.lower())
+    if not words:
+        return False
+    return any(
+        all(word in (author.get("name") or "").lower() for word in words)
+        for author in book.get("authors", [])
+    )
+
+
+def _fts_terms(text: str) -> str:
+    """Prefix-match every word, roughly like Gutendex's substring search"""
+    return " ".join(f'"{word}"*' for word in _WORD.findall(text.lower()))
+
+
+class GutenbergCatalog:
+    """
+    Read-only view of an ingested catalog answering Gutendex-style queries
+
+    Queries are blocking SQLite calls; async callers run them in a worker thread.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.size = self._conn.execute("SELECT count(*) FROM books").fetchone()[0]
+        # False for dumps without download counts (the CSV feed)
+        self.has_downloads = bool(
+            self._conn.execute("SELECT EXISTS (SELECT 1 FROM books WHERE downloads > 0)").fetchone()[0]
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, book_id: int) -> Optional[Dict[str, Any]]:
+        """Gutendex `/books/{id}` document, or None if not in the catalog"""
+        row = self._conn.execute("SELECT data FROM books WHERE id = ?", (book_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_books(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """All catalog books in batches, most downloaded first"""
+        cursor = self._conn.execute("SELECT data FROM books ORDER BY downloads DESC, id ASC")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [json.loads(row[0]) for row in rows]
+
+    def books_by_author(self, author_name: str) -> List[Dict[str, Any]]:
+        """
+        Books whose author names contain `author_name`, most downloaded first
+
+        Raises ValueError if the catalog has no download counts to order by.
+        """
+        if not self.has_downloads:
+            raise ValueError("Catalog has no download counts to order by popularity")
+        terms = _fts_terms(author_name)
+        if not terms:
+            return []
+        rows = self._conn.execute(
+            "SELECT b.data FROM books b WHERE b.id IN "
+            "(SELECT rowid FROM books_fts WHERE books_fts MATCH ?) "
+            "ORDER BY b.downloads DESC, b.id ASC",
+            (f"{{authors}} : ({terms})",),
+        ).fetchall()
+        books = (json.loads(row[0]) for row in rows)
+        return [book for book in books if author_matches(author_name, book)]
+
+    def query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a Gutendex `/books` query
+
+        Raises ValueError for parameters the local catalog cannot answer,
+        so callers can fall back to Gutendex: unsupported parameters, search
+        text without any words, and popularity order (Gutendex's default)
+        when the catalog has no download counts.
+        """
+        unsupported = set(params) - SUPPORTED_PARAMS
+        if unsupported:
+            raise ValueError(f"Unsupported catalog params: {', '.join(sorted(unsupported))}")
+
+        order = {
+            "ascending": "b.id ASC",
+            "descending": "b.id DESC",
+        }.get(params.get("sort"))
+        if order is None:
+            if not self.has_downloads:
+                raise ValueError("Catalog has no download counts to order by popularity")
+            order = "b.downloads DESC, b.id ASC"
+
+        where, args = [], []
+
+        match = []
+        for param, columns in (("search", "title authors"), ("topic", "subjects bookshelves")):
+            if params.get(param):
+                terms = _fts_terms(params[param])
+                if not terms:
+                    raise ValueError(f"No words to match in {param}={params[param]!r}")
+                match.append(f"{{{columns}}} : ({terms})")
+        if match:
+            where.append("b.id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)")
+            args.append(" AND ".join(match))
+
+        if params.get("languages"):
+            codes = [code.strip().lower() for code in str(params["languages"]).split(",") if code.strip()]
+            where.append(
+                f"b.id IN (SELECT book_id FROM book_languages WHERE code IN ({','.join('?' * len(codes))}))"
+            )
+            args.extend(codes)
+
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        page = int(params.get("page", 1))
+
+        count = self._conn.execute(f"SELECT count(*) FROM books b {where_sql}", args).fetchone()[0]
+        rows = self._conn.execute(
+            f"SELECT b.data FROM books b {where_sql} ORDER BY {order} LIMIT ? OFFSET ?",
+            args + [PAGE_SIZE, (page - 1) * PAGE_SIZE],
+        ).fetchall()
+
+        return {
+            "count": count,
+            "next": None,
+            "previous": None,
+            "results": [json.loads(row[0]) for row in rows],
+        }
+
+
+catalog: Optional[GutenbergCatalog] = None
+
+
+def open_catalog(db_path: Optional[str]) -> Optional[GutenbergCatalog]:
+    """Open the local catalog if configured and present (called from the app lifespan)"""
+    global catalog
+    if not db_path or not os.path.exists(db_path):
+        if db_path:
+            logger.info(f"Gutenberg catalog not found at {db_path}, using Gutendex only")
+        return None
+    catalog = GutenbergCatalog(db_path)
+    logger.info(
+        f"Loaded local Gutenberg catalog: {catalog.size} books"
+        + ("" if catalog.has_downloads else " (no download counts, popularity-ordered lists come from Gutendex)")
+    )
+    return catalog
+
+
+def close_catalog() -> None:
+    global catalog
+    if catalog is not None:
+        catalog.close()
+        catalog = None
+
+
+def get_catalog() -> Optional[GutenbergCatalog]:
+    return catalog
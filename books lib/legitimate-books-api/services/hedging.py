@@ -0,0 +1,122 @@
+"""
+Hedged upstream requests
+If an idempotent GET has not answered by the source's observed p95
+latency, send a second identical request and use whichever returns first
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class HedgeBudget:
+    """
+    Caps hedges to a fraction of requests
+
+    Every request earns `ratio` tokens (up to `burst`); every hedge spends one.
+    """
+
+    def __init__(self, ratio: float = 0.05, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+
+    def on_request(self) -> None:
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def available(self) -> bool:
+        return self._tokens >= 1
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_won = 0
+        self.budget_exhausted = 0
+        # Hedges skipped because the source had no free outbound slot
+        self.throttled = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_won": self.hedge_won,
+            "hedge_win_rate": round(self.hedge_won / self.hedged, 3) if self.hedged else 0.0,
+            "budget_exhausted": self.budget_exhausted,
+            "throttled": self.throttled,
+        }
+
+
+async def hedged_get(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    params: Optional[dict],
+    timeout: float,
+    hedge_after: Optional[float],
+    budget: HedgeBudget,
+    stats: HedgeStats,
+    acquire_extra: Optional[Callable[[], Awaitable[bool]]] = None,
+    release_extra: Optional[Callable[[], None]] = None,
+) -> httpx.Response:
+    """
+    GET with an optional hedge after `hedge_after` seconds (None disables hedging)
+
+    `acquire_extra` must grant the hedge its own outbound slot (e.g. the
+    source's concurrency and rate limits) before the budget is spent on it;
+    `release_extra` gives the slot back once the hedge is done.
+    """
+    stats.requests += 1
+    budget.on_request()
+
+    if hedge_after is None:
+        return await client.get(endpoint, params=params, timeout=timeout)
+
+    primary = asyncio.ensure_future(client.get(endpoint, params=params, timeout=timeout))
+    tasks = {primary}
+    has_slot = False
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        if not budget.available():
+            stats.budget_exhausted += 1
+            return await primary
+        if acquire_extra is not None:
+            has_slot = await acquire_extra()
+            if not has_slot:
+                stats.throttled += 1
+                return await primary
+        budget.try_spend()
+
+        stats.hedged += 1
+        hedge = asyncio.ensure_future(client.get(endpoint, params=params, timeout=timeout))
+        tasks.add(hedge)
+
+        first_error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        stats.hedge_won += 1
+                    return task.result()
+                first_error = first_error or task.exception()
+        raise first_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if has_slot and release_extra is not None:
+            release_extra()
@@ -0,0 +1,75 @@
+"""
+Shared upstream HTTP clients
+One pooled httpx.AsyncClient per source, created once for the app lifetime
+"""
+
+from typing import Dict
+import httpx
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ["openlibrary", "gutenberg", "googlebooks"]
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ClientRegistry:
+    """Holds one long-lived, pooled client per upstream source"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _create_client(self, source: str) -> httpx.AsyncClient:
+        config = settings.upstream(source)
+
+        http2 = config.http2
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning(f"HTTP/2 requested for {source} but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+
+        return httpx.AsyncClient(
+            base_url=config.base_url,
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=http2,
+            headers={"User-Agent": settings.user_agent},
+        )
+
+    async def start(self):
+        """Create clients for all sources (called from the app lifespan)"""
+        for source in SOURCES:
+            self.get(source)
+        logger.info(f"Upstream clients ready: {', '.join(self._clients)}")
+
+    def get(self, source: str) -> httpx.AsyncClient:
+        """Get the shared client for a source, creating it on first use"""
+        client = self._clients.get(source)
+        if client is None or client.is_closed:
+            client = self._create_client(source)
+            self._clients[source] = client
+        return client
+
+    async def aclose(self):
+        """Close all clients and release pooled connections"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+registry = ClientRegistry()
+
+
+def get_client(source: str) -> httpx.AsyncClient:
+    """Get the shared client for a source"""
+    return registry.get(source)
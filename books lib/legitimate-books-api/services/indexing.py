@@ -0,0 +1,151 @@
+"""
+Local book indexes fed by every book the API parses or ingests
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+from config import settings
+from models import BookBase
+from services.gutenberg_catalog import GutenbergCatalog
+from services.search_index import InvertedIndex
+from services.suggest import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+GUTENBERG_SOURCE = "Project Gutenberg"
+
+local_index = InvertedIndex(max_docs=settings.local_index_max_docs)
+suggest_index = PrefixIndex(max_entries=settings.suggest_max_entries)
+
+# Catalog books are indexed by ID only and parsed when they are returned
+_catalog_loader: Optional[Callable[[int], Optional[BookBase]]] = None
+
+# Books observed while the catalog indexes are built, replayed into them before the swap
+_observed_during_build: Optional[List[BookBase]] = None
+
+
+def _fields(title: str, authors: List[str], subjects: List[str], bookshelves: List[str],
+            description: Optional[str]) -> List[Tuple[str, int]]:
+    """Weighted text fields for BM25 (title matches count most)"""
+    return [
+        (title, 3),
+        (" ".join(authors), 2),
+        (" ".join(subjects), 1),
+        (" ".join(bookshelves), 1),
+        (description or "", 1),
+    ]
+
+
+def popularity(book: BookBase) -> int:
+    """Popularity signal for ranking suggestions"""
+    return getattr(book, "downloads", None) or getattr(book, "ratings_count", None) or 0
+
+
+def _add_books(index: InvertedIndex, suggest: PrefixIndex, books: List[BookBase]) -> None:
+    suggest.add_books((book.title, book.authors, popularity(book)) for book in books)
+    for book in books:
+        index.add(
+            (book.source, book.id),
+            _fields(
+                book.title,
+                book.authors,
+                getattr(book, "subjects", None) or getattr(book, "categories", None) or [],
+                getattr(book, "bookshelves", None) or [],
+                book.description,
+            ),
+            book,
+        )
+
+
+def observe_books(books: List[BookBase]) -> None:
+    """Add freshly parsed books to the local indexes"""
+    _add_books(local_index, suggest_index, books)
+    if _observed_during_build is not None:
+        _observed_during_build.extend(books)
+
+
+def _build_catalog_indexes(catalog: GutenbergCatalog, batch_size: int,
+                           stop: threading.Event) -> Tuple[InvertedIndex, PrefixIndex, int]:
+    """Index the whole catalog into new indexes (runs in a worker thread)"""
+    index = InvertedIndex(max_docs=settings.local_index_max_docs)
+    suggest = PrefixIndex(max_entries=settings.suggest_max_entries)
+    count = 0
+    for batch in catalog.iter_books(batch_size):
+        if stop.is_set():
+            break
+        entries = []
+        for data in batch:
+            authors = [author.get("name", "") for author in data.get("authors", [])]
+            entries.append((data.get("title", ""), authors, data.get("download_count") or 0))
+            added = index.add(
+                (GUTENBERG_SOURCE, str(data["id"])),
+                _fields(
+                    data.get("title", ""),
+                    authors,
+                    data.get("subjects", []),
+                    data.get("bookshelves", []),
+                    None,
+                ),
+                int(data["id"]),
+            )
+            count += added
+        suggest.add_books(entries)
+    return index, suggest, count
+
+
+async def index_catalog(catalog: GutenbergCatalog, parse: Callable[[dict], BookBase],
+                        batch_size: int = 1000) -> None:
+    """
+    Index the local Gutenberg catalog in a worker thread, then swap the new
+    indexes in (with the books observed meanwhile) in one step on the event loop
+    """
+    global _catalog_loader, _observed_during_build, local_index, suggest_index
+
+    def load(book_id: int) -> Optional[BookBase]:
+        data = catalog.get(book_id)
+        return parse(data) if data else None
+
+    _observed_during_build = []
+    stop = threading.Event()
+    try:
+        index, suggest, count = await asyncio.to_thread(_build_catalog_indexes, catalog, batch_size, stop)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        observed, _observed_during_build = _observed_during_build, None
+
+    _add_books(index, suggest, observed)
+    local_index, suggest_index = index, suggest
+    _catalog_loader = load
+    logger.info(f"Indexed {count} catalog books for local search and suggestions")
+
+
+def _resolve(payload: Any) -> Optional[BookBase]:
+    if isinstance(payload, int):
+        return _catalog_loader(payload) if _catalog_loader else None
+    return payload
+
+
+def _resolve_all(payloads: List[Any]) -> List[BookBase]:
+    return [book for book in map(_resolve, payloads) if book is not None]
+
+
+async def search_local(q: str, page: int, limit: int) -> Dict[str, Any]:
+    """Search the local index; returns the same shape as the per-source search helpers"""
+    index, offset = local_index, (page - 1) * limit
+    if index.postings(q) > settings.local_search_thread_postings:
+        # Scoring long posting lists takes milliseconds: keep it off the event loop
+        total, hits = await asyncio.to_thread(index.search, q, limit, offset)
+    else:
+        total, hits = index.search(q, limit=limit, offset=offset)
+    payloads = [payload for _, payload in hits]
+    if any(isinstance(payload, int) for payload in payloads):
+        # Catalog hits are loaded from SQLite, off the event loop
+        books = await asyncio.to_thread(_resolve_all, payloads)
+    else:
+        books = _resolve_all(payloads)
+    return {"books": books, "total_results": total}
@@ -0,0 +1,66 @@
+"""
+ISBN validation and normalization
+Converts between ISBN-10 and ISBN-13 and checks check digits
+"""
+
+from typing import Optional
+
+
+def clean_isbn(raw: str) -> str:
+    """Strip hyphens, spaces and a leading 'ISBN' label"""
+    value = raw.strip().upper()
+    if value.startswith("ISBN"):
+        value = value[4:].lstrip(":")
+    return "".join(ch for ch in value if ch.isdigit() or ch == "X")
+
+
+def isbn10_check_digit(first9: str) -> str:
+    total = sum((10 - i) * int(digit) for i, digit in enumerate(first9))
+    check = (11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+
+def isbn13_check_digit(first12: str) -> str:
+    total = sum((3 if i % 2 else 1) * int(digit) for i, digit in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_isbn10(value: str) -> bool:
+    return (
+        len(value) == 10
+        and value[:9].isdigit()
+        and (value[9].isdigit() or value[9] == "X")
+        and isbn10_check_digit(value[:9]) == value[9]
+    )
+
+
+def is_valid_isbn13(value: str) -> bool:
+    return (
+        len(value) == 13
+        and value.isdigit()
+        and value[:3] in ("978", "979")
+        and isbn13_check_digit(value[:12]) == value[12]
+    )
+
+
+def isbn10_to_13(value: str) -> str:
+    body = "978" + value[:9]
+    return body + isbn13_check_digit(body)
+
+
+def isbn13_to_10(value: str) -> Optional[str]:
+    """ISBN-10 form of an ISBN-13 (only 978-prefixed ISBNs have one)"""
+    if not value.startswith("978"):
+        return None
+    body = value[3:12]
+    return body + isbn10_check_digit(body)
+
+
+def normalize_isbn(raw: str) -> Optional[str]:
+    """Return the canonical ISBN-13 for a raw ISBN-10/13, or None if invalid"""
+    value = clean_isbn(raw)
+    if is_valid_isbn13(value):
+        return value
+    if is_valid_isbn10(value):
+        return isbn10_to_13(value)
+    return None
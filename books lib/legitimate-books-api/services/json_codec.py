@@ -0,0 +1,66 @@
+"""
+Pluggable JSON backend
+Uses orjson or msgspec when installed (JSON_BACKEND=auto picks the first
+available) for upstream bodies, cached values and API responses
+"""
+
+from typing import Any, Callable, Tuple
+import json
+import logging
+
+from starlette.responses import JSONResponse
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+Loads = Callable[[bytes], Any]
+Dumps = Callable[[Any], bytes]
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _backend(name: str) -> Tuple[str, Loads, Dumps]:
+    if name in ("auto", "orjson") and ORJSON_AVAILABLE:
+        return "orjson", orjson.loads, orjson.dumps
+    if name in ("auto", "msgspec") and MSGSPEC_AVAILABLE:
+        return "msgspec", msgspec.json.decode, msgspec.json.encode
+    if name not in ("auto", "stdlib"):
+        logger.warning(f"JSON backend '{name}' is not installed, using the standard library")
+    return "stdlib", json.loads, _stdlib_dumps
+
+
+name, _loads, _dumps = _backend(settings.json_backend)
+
+
+def loads(data: bytes) -> Any:
+    return _loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    try:
+        return _dumps(value)
+    except TypeError:
+        # e.g. integers wider than 64 bits, which orjson refuses
+        return _stdlib_dumps(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured JSON backend"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,131 @@
+"""
+Cross-source record merging keyed by normalized ISBN
+"""
+
+from typing import Dict, List
+
+from config import settings
+from models import BookBase, MergedBook
+from services import cache
+from services.isbn import normalize_isbn
+
+# Per-source link attributes worth carrying over to the merged record
+LINK_FIELDS = ["borrow_url", "read_url", "preview_link", "info_link"]
+
+
+def book_isbns(book: BookBase) -> List[str]:
+    """Valid, de-duplicated ISBN-13s of a book"""
+    isbns = []
+    for raw in book.isbn or []:
+        isbn = normalize_isbn(raw)
+        if isbn and isbn not in isbns:
+            isbns.append(isbn)
+    return isbns
+
+
+def merge_records(books: List[BookBase]) -> MergedBook:
+    """Merge records of the same book into one enriched record (first record wins ties)"""
+    primary = books[0]
+    merged = MergedBook(
+        id=primary.id,
+        title=primary.title,
+        authors=next((b.authors for b in books if b.authors), []),
+        published_date=next((b.published_date for b in books if b.published_date), None),
+        description=max((b.description for b in books if b.description), key=len, default=None),
+        pages=next((b.pages for b in books if b.pages), None),
+        language=next((b.language for b in books if b.language), None),
+        publisher=next((b.publisher for b in books if b.publisher), None),
+        cover=next((b.cover for b in books if b.cover), None),
+        source=primary.source,
+    )
+
+    isbns: List[str] = []
+    for book in books:
+        if book.source not in merged.merged_sources:
+            merged.merged_sources.append(book.source)
+        merged.source_ids.setdefault(book.source, book.id)
+
+        for isbn in book_isbns(book):
+            if isbn not in isbns:
+                isbns.append(isbn)
+
+        for field in LINK_FIELDS:
+            url = getattr(book, field, None)
+            if url:
+                merged.links.setdefault(f"{book.source}:{field}", url)
+
+        for subject in getattr(book, "subjects", None) or getattr(book, "categories", None) or []:
+            if subject not in merged.subjects:
+                merged.subjects.append(subject)
+
+    merged.isbn = isbns or None
+    merged.isbn_13 = isbns[0] if isbns else None
+    return merged
+
+
+class IsbnIndex:
+    """
+    Per-request ISBN -> record index
+
+    Books sharing any valid ISBN (10 or 13, in any formatting) end up in
+    one group; books without ISBNs pass through untouched.
+    """
+
+    def __init__(self):
+        self._groups: List[List[BookBase]] = []
+        self._parent: List[int] = []
+        self._by_isbn: Dict[str, int] = {}
+
+    def _find(self, group: int) -> int:
+        while self._parent[group] != group:
+            self._parent[group] = self._parent[self._parent[group]]
+            group = self._parent[group]
+        return group
+
+    def add(self, book: BookBase) -> None:
+        group = len(self._groups)
+        self._groups.append([book])
+        self._parent.append(group)
+
+        for isbn in book_isbns(book):
+            other = self._by_isbn.get(isbn)
+            if other is None:
+                self._by_isbn[isbn] = group
+                continue
+            root, other_root = self._find(group), self._find(other)
+            if root != other_root:
+                # Keep the earlier group as root so result order is stable
+                first, second = sorted((root, other_root))
+                self._parent[second] = first
+
+    def merged(self) -> List[BookBase]:
+        """Merged records in order of first appearance"""
+        members: Dict[int, List[BookBase]] = {}
+        for group, books in enumerate(self._groups):
+            members.setdefault(self._find(group), []).extend(books)
+        return [books[0] if len(books) == 1 else merge_records(books) for books in members.values()]
+
+
+def merge_by_isbn(books: List[BookBase]) -> List[BookBase]:
+    """Join records from every source on normalized ISBN"""
+    index = IsbnIndex()
+    for book in books:
+        index.add(book)
+    return index.merged()
+
+
+def isbn_cache_key(isbn_13: str) -> str:
+    return f"isbn:{isbn_13}"
+
+
+async def cache_merged_records(books: List[BookBase]) -> None:
+    """Store merged records by ISBN-13 when ISBN caching is enabled"""
+    if settings.isbn_cache_ttl <= 0:
+        return
+    for book in books:
+        if isinstance(book, MergedBook) and book.isbn_13:
+            await cache.response_cache.set(
+                isbn_cache_key(book.isbn_13),
+                book.model_dump(),
+                ttl=settings.isbn_cache_ttl,
+            )
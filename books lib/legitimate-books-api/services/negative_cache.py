@@ -0,0 +1,109 @@
+"""
+Negative cache for upstream not-found results and empty pages
+A Bloom filter of known-missing keys sits in front of a small TTL cache,
+so lookups for keys that were never missing cost a few bit tests
+"""
+
+from typing import Any, Dict, Iterator, Optional
+import hashlib
+import math
+
+from services.cache import MemoryCache
+
+# Marker stored for upstream 404s (empty pages store the page itself)
+NOT_FOUND = {"__not_found__": True}
+
+# Fields that hold the total result count in upstream list responses
+COUNT_FIELDS = ("totalItems", "count", "numFound", "work_count", "size")
+
+
+def is_empty_page(data: Any) -> bool:
+    """Whether an upstream list response reports zero results"""
+    if not isinstance(data, dict):
+        return False
+    for field in COUNT_FIELDS:
+        if field in data:
+            return data[field] == 0
+    return False
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter with two generations
+
+    When the current generation has taken `capacity` keys it becomes the
+    previous one and a fresh filter starts, so keys that expired from the
+    negative cache stop inflating the false-positive rate.
+    """
+
+    def __init__(self, capacity: int = 50_000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        if self._count >= self.capacity:
+            self._previous = self._current
+            self._current = bytearray(len(self._previous))
+            self._count = 0
+        for position in self._positions(key):
+            self._current[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        positions = list(self._positions(key))
+        return any(
+            all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+            for bits in (self._current, self._previous)
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._current) + len(self._previous)
+
+
+class NegativeCache:
+    """Bounded, short-lived memory of upstream keys that returned nothing"""
+
+    def __init__(self, max_entries: int = 50_000, ttl: int = 300, error_rate: float = 0.01):
+        self.ttl = ttl
+        self.bloom = BloomFilter(max_entries, error_rate)
+        self._entries = MemoryCache(max_entries)
+        self.hits = 0
+        self.bloom_rejections = 0
+        self.false_positives = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        """NOT_FOUND or an empty page if `key` is known to be missing, else None"""
+        if key not in self.bloom:
+            self.bloom_rejections += 1
+            return None
+        value = await self._entries.get(key)
+        if value is None:
+            self.false_positives += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def add(self, key: str, value: Any = NOT_FOUND) -> None:
+        self.bloom.add(key)
+        await self._entries.set(key, value, ttl=self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "bloom_rejections": self.bloom_rejections,
+            "false_positives": self.false_positives,
+            "bloom_bytes": self.bloom.memory_bytes,
+        }
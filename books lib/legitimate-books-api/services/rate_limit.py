@@ -0,0 +1,257 @@
+"""
+Inbound admission control
+Per-client token buckets (in memory or in Redis for multi-worker setups)
+plus load shedding by in-flight request count, with priority classes so
+cheap endpoints keep answering while fan-out searches are turned away
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import math
+import time
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: never limited, normal, and multi-source fan-out
+CRITICAL = "critical"
+NORMAL = "normal"
+FANOUT = "fanout"
+
+CRITICAL_PATHS = {
+    "/",
+    "/health",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/v1/gutenberg/languages",
+}
+FANOUT_PATHS = (
+    "/api/v1/search/all",
+    "/api/v1/search/compare",
+    "/api/v1/search/stream",
+)
+
+# Rate-limit tokens charged per request; fan-out calls every upstream source
+COSTS = {CRITICAL: 0, NORMAL: 1, FANOUT: 3}
+
+
+def classify(path: str) -> str:
+    if path in CRITICAL_PATHS:
+        return CRITICAL
+    if path.startswith(FANOUT_PATHS):
+        return FANOUT
+    return NORMAL
+
+
+class MemoryBuckets:
+    """Per-client token buckets for a single process, LRU-bounded"""
+
+    name = "memory"
+
+    def __init__(self, per_minute: int, burst: int, max_clients: int = 100_000):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, client: str, cost: int) -> Tuple[bool, float, int]:
+        """Spend `cost` tokens; returns (allowed, seconds until allowed, tokens left)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / self.rate
+        return allowed, retry_after, int(tokens)
+
+    async def close(self) -> None:
+        pass
+
+
+# KEYS[1] = bucket; ARGV = rate per second, burst, cost, now
+_REDIS_TAKE = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBuckets:
+    """Per-client token buckets shared between workers (atomic Lua script)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, per_minute: int, burst: int, prefix: str = "books-api:ratelimit:"):
+        import redis.asyncio as redis
+
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.prefix = prefix
+        self.errors = 0
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, client: str, cost: int) -> Tuple[bool, float, int]:
+        try:
+            allowed, tokens = await self._take(
+                keys=[self.prefix + client],
+                args=[self.rate, self.burst, cost, time.time()],
+            )
+        except Exception as e:
+            # Fail open: a Redis outage should not take the API down with it
+            logger.warning(f"Redis rate limit check failed: {e}")
+            self.errors += 1
+            return True, 0.0, self.burst
+
+        tokens = float(tokens)
+        if allowed:
+            return True, 0.0, int(tokens)
+        return False, (cost - tokens) / self.rate, int(tokens)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_buckets():
+    """Create the bucket store selected in settings (None when rate limiting is off)"""
+    if settings.rate_limit_per_minute <= 0:
+        return None
+    burst = settings.rate_limit_burst or settings.rate_limit_per_minute
+    # A bucket smaller than the dearest request would never admit it
+    max_cost = max(COSTS.values())
+    if burst < max_cost:
+        logger.warning(f"Rate limit burst {burst} is below the fan-out cost, raised to {max_cost}")
+        burst = max_cost
+    if settings.rate_limit_backend == "redis":
+        return RedisBuckets(settings.redis_url, settings.rate_limit_per_minute, burst)
+    return MemoryBuckets(settings.rate_limit_per_minute, burst)
+
+
+class AdmissionStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.shed: Dict[str, int] = {NORMAL: 0, FANOUT: 0}
+        self.rate_limited = 0
+
+
+buckets = create_buckets()
+stats = AdmissionStats()
+
+
+async def init_buckets() -> None:
+    """Install the configured bucket store (called from the app lifespan)"""
+    global buckets
+    buckets = create_buckets()
+    if buckets is not None:
+        logger.info(f"Inbound rate limit: {settings.rate_limit_per_minute}/min per client ({buckets.name})")
+
+
+async def close_buckets() -> None:
+    if buckets is not None:
+        await buckets.close()
+
+
+def shed_threshold(priority: str) -> Optional[int]:
+    """In-flight count above which requests of this class are shed"""
+    if priority == CRITICAL or settings.shed_max_in_flight <= 0:
+        return None
+    if priority == FANOUT:
+        return max(1, int(settings.shed_max_in_flight * settings.shed_fanout_fraction))
+    return settings.shed_max_in_flight
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {
+        "in_flight": stats.in_flight,
+        "shed_max_in_flight": settings.shed_max_in_flight,
+        "shed": dict(stats.shed),
+        "rate_limited": stats.rate_limited,
+        "rate_limit_backend": buckets.name if buckets is not None else None,
+    }
+
+
+def client_id(scope: Dict[str, Any]) -> str:
+    if settings.rate_limit_trust_forwarded:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float, headers=()) -> None:
+    body = json.dumps({"error": detail, "status_code": status_code}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying load shedding and per-client rate limits"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope["path"])
+
+        threshold = shed_threshold(priority)
+        if threshold is not None and stats.in_flight >= threshold:
+            stats.shed[priority] += 1
+            await _reject(send, 503, "Server busy, please retry", settings.shed_retry_after)
+            return
+
+        cost = COSTS[priority]
+        if cost and buckets is not None:
+            allowed, retry_after, remaining = await buckets.take(client_id(scope), cost)
+            if not allowed:
+                stats.rate_limited += 1
+                await _reject(
+                    send,
+                    429,
+                    "Rate limit exceeded",
+                    retry_after,
+                    headers=[
+                        (b"x-ratelimit-limit", str(settings.rate_limit_per_minute).encode()),
+                        (b"x-ratelimit-remaining", str(remaining).encode()),
+                    ],
+                )
+                return
+
+        stats.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stats.in_flight -= 1
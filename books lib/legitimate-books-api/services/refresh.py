@@ -0,0 +1,145 @@
+"""
+Background cache refresh
+Stale entries are revalidated off the request path, and the most requested
+keys (tracked with a count-min sketch) are refreshed before they expire
+"""
+
+from array import array
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """
+    Approximate per-key counts in fixed memory
+
+    Counters are halved every `reset_after` additions so popularity
+    reflects recent traffic rather than all-time totals.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, reset_after: Optional[int] = None):
+        self.width = width
+        self.depth = depth
+        self.reset_after = reset_after or width * 10
+        self._rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+        self._additions = 0
+
+    def _cells(self, key: Hashable) -> List[int]:
+        return [hash((row, key)) % self.width for row in range(self.depth)]
+
+    def add(self, key: Hashable) -> int:
+        """Count one occurrence of `key` and return its new estimate"""
+        estimate = None
+        for row, cell in zip(self._rows, self._cells(key)):
+            row[cell] += 1
+            estimate = row[cell] if estimate is None else min(estimate, row[cell])
+
+        self._additions += 1
+        if self._additions >= self.reset_after:
+            self._age()
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[cell] for row, cell in zip(self._rows, self._cells(key)))
+
+    def _age(self) -> None:
+        for row in self._rows:
+            for cell in range(self.width):
+                row[cell] >>= 1
+        self._additions = 0
+
+
+class Refresher:
+    """
+    Refreshes cache keys in background tasks, at most `max_concurrent` at a time
+
+    `fetch(key, request)` performs the upstream call and stores the result;
+    `request` is whatever the caller needs to repeat it.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, Any], Awaitable[Any]],
+        max_concurrent: int = 4,
+        top_n: int = 50,
+    ):
+        self.fetch = fetch
+        self.max_concurrent = max_concurrent
+        self.top_n = top_n
+        self.sketch = CountMinSketch()
+        # Candidate hot keys and how to re-request them
+        self._requests: Dict[str, Any] = {}
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def record(self, key: str, request: Any) -> None:
+        """Count a request for `key` and remember how to refresh it if it is hot"""
+        self.sketch.add(key)
+        self._requests[key] = request
+        if len(self._requests) > self.top_n * 4:
+            keep = self.hot_keys(self.top_n * 2)
+            self._requests = {key: self._requests[key] for key, _ in keep}
+
+    def hot_keys(self, n: Optional[int] = None) -> List[Tuple[str, Any]]:
+        """The `n` most requested known keys with their requests, hottest first"""
+        ranked = sorted(self._requests, key=self.sketch.estimate, reverse=True)
+        return [(key, self._requests[key]) for key in ranked[:n or self.top_n]]
+
+    def schedule(self, key: str, request: Any) -> bool:
+        """Start a background refresh unless one is running or the concurrency cap is reached"""
+        if key in self._running:
+            return False
+        if len(self._running) >= self.max_concurrent:
+            self.skipped += 1
+            return False
+
+        self._running.add(key)
+        task = asyncio.ensure_future(self._refresh(key, request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _refresh(self, key: str, request: Any) -> None:
+        try:
+            await self.fetch(key, request)
+            self.refreshed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            self._running.discard(key)
+
+    async def run(
+        self,
+        expires_in: Callable[[str], Awaitable[Optional[float]]],
+        interval: float,
+        ahead: float,
+    ) -> None:
+        """Every `interval` seconds, refresh hot keys expiring within `ahead` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            for key, request in self.hot_keys():
+                remaining = await expires_in(key)
+                if remaining is not None and remaining <= ahead:
+                    self.schedule(key, request)
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self._requests),
+            "refreshing": len(self._running),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,117 @@
+"""
+In-process BM25 full-text index
+Postings are kept as compact `array` columns and documents can be added
+incrementally while the app is serving requests
+"""
+
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+import heapq
+import math
+import re
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "of", "on", "or", "that", "the", "to", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    BM25-scored inverted index
+
+    Each document is a set of weighted text fields plus an opaque payload
+    returned with search hits. Postings per term are two parallel arrays
+    (document numbers and term frequencies), appended to as documents arrive.
+    Documents are only ever appended, so a search may run in a worker thread
+    while the event loop keeps adding documents.
+    """
+
+    def __init__(self, max_docs: int = 200_000, k1: float = 1.2, b: float = 0.75):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        self._keys: Dict[Hashable, int] = {}
+        self._payloads: List[Any] = []
+        self._lengths = array("I")
+        self._total_length = 0
+        self._postings: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._keys
+
+    def add(self, key: Hashable, fields: Iterable[Tuple[str, int]], payload: Any) -> bool:
+        """
+        Index a document made of (text, weight) fields
+
+        Returns False if the key is already indexed or the index is full.
+        """
+        if key in self._keys or len(self._payloads) >= self.max_docs:
+            return False
+
+        frequencies: Dict[str, int] = {}
+        length = 0
+        for text, weight in fields:
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0) + weight
+                length += weight
+
+        doc = len(self._payloads)
+        self._keys[key] = doc
+        self._payloads.append(payload)
+        self._lengths.append(length)
+        self._total_length += length
+
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = (array("I"), array("H"))
+                self._postings[term] = postings
+            postings[0].append(doc)
+            postings[1].append(min(frequency, 0xFFFF))
+        return True
+
+    def postings(self, query: str) -> int:
+        """Number of postings a search for `query` scores (its cost)"""
+        return sum(len(self._postings[term][0]) for term in set(tokenize(query)) if term in self._postings)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[float, Any]]]:
+        """Return (number of matching documents, [(score, payload), ...]) for a page of hits"""
+        doc_count = len(self._payloads)
+        if not doc_count:
+            return 0, []
+
+        average_length = self._total_length / doc_count
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs, frequencies = postings
+            df = len(docs)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(docs, frequencies):
+                norm = k1 * (1 - b + b * lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+        return len(scores), [(score, self._payloads[doc]) for doc, score in top[offset:]]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "documents": len(self._payloads),
+            "terms": len(self._postings),
+            "max_documents": self.max_docs,
+        }
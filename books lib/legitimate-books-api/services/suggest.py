@@ -0,0 +1,163 @@
+"""
+Typeahead prefix index over book titles and author names
+A sorted key array searched with bisect, ranked by popularity
+"""
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Tuple
+import heapq
+import re
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_LEADING_ARTICLE = re.compile(r"^(the|a|an) ")
+
+# Upper bound for keys sharing a prefix ("abc" <= key < "abc￿")
+_PREFIX_END = "￿"
+
+MEMO_SIZE = 10_000
+
+# Very short prefixes match too many keys to scan; keep their top entries ready
+SHORT_PREFIX = 3
+TOP_K = 50
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def author_variants(name: str) -> List[str]:
+    """'Austen, Jane' is also suggested for 'jane austen'"""
+    variants = [name]
+    if "," in name:
+        last, _, first = name.partition(",")
+        if first.strip():
+            variants.append(f"{first.strip()} {last.strip()}")
+    return variants
+
+
+class PrefixIndex:
+    """
+    Prefix search over normalized keys
+
+    New keys are collected per batch and merged into the sorted array with
+    one sort, so the index can keep growing while it is being queried.
+    """
+
+    def __init__(self, max_entries: int = 500_000):
+        self.max_entries = max_entries
+        self._keys: List[str] = []
+        # key -> (popularity, display text, kind)
+        self._entries: Dict[str, Tuple[int, str, str]] = {}
+        self._version = 0
+        self._memo: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self._memo_version = 0
+        # short prefix -> [(-popularity, key), ...] most popular first
+        self._top: Dict[str, List[Tuple[int, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _insert(self, key: str, display: str, kind: str, popularity: int, new_keys: List[str]) -> bool:
+        """Add or re-rank one key; returns whether the index changed"""
+        if not key:
+            return False
+
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                return False
+            new_keys.append(key)
+        elif popularity <= entry[0]:
+            return False
+
+        self._entries[key] = (popularity, display, kind)
+        self._update_top(key, popularity)
+        return True
+
+    def _update_top(self, key: str, popularity: int) -> None:
+        for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+            top = self._top.setdefault(key[:length], [])
+            for i, (_, other) in enumerate(top):
+                if other == key:
+                    del top[i]
+                    break
+            if len(top) < TOP_K or -popularity < top[-1][0]:
+                insort(top, (-popularity, key))
+                del top[TOP_K:]
+
+    def _add_title(self, title: str, popularity: int, new_keys: List[str]) -> bool:
+        key = normalize(title)
+        changed = self._insert(key, title, "title", popularity, new_keys)
+        # "great gatsby" also finds "The Great Gatsby"
+        stripped = _LEADING_ARTICLE.sub("", key)
+        if stripped != key:
+            changed = self._insert(stripped, title, "title", popularity, new_keys) or changed
+        return changed
+
+    def _add_author(self, name: str, popularity: int, new_keys: List[str]) -> bool:
+        changed = False
+        for variant in author_variants(name):
+            changed = self._insert(normalize(variant), variant, "author", popularity, new_keys) or changed
+        return changed
+
+    def _commit(self, new_keys: List[str], changed: bool) -> None:
+        # Timsort reuses the already sorted run: one sort per batch instead of an insort per key
+        if new_keys:
+            self._keys.extend(new_keys)
+            self._keys.sort()
+        # Once per batch, and only if it added or re-ranked keys: re-observing
+        # known books (every request does) keeps the suggest memo
+        if changed:
+            self._version += 1
+
+    def add_books(self, books: Iterable[Tuple[str, List[str], int]]) -> None:
+        """Add (title, authors, popularity) entries as one batch"""
+        new_keys: List[str] = []
+        changed = False
+        for title, authors, popularity in books:
+            changed = self._add_title(title, popularity, new_keys) or changed
+            for author in authors:
+                changed = self._add_author(author, popularity, new_keys) or changed
+        self._commit(new_keys, changed)
+
+    def add_title(self, title: str, popularity: int = 0) -> None:
+        self.add_books([(title, [], popularity)])
+
+    def add_author(self, name: str, popularity: int = 0) -> None:
+        new_keys: List[str] = []
+        self._commit(new_keys, self._add_author(name, popularity, new_keys))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most popular titles/authors starting with `prefix`"""
+        key = normalize(prefix)
+        if not key:
+            return []
+
+        if self._memo_version != self._version or len(self._memo) > MEMO_SIZE:
+            self._memo.clear()
+            self._memo_version = self._version
+        cached = self._memo.get((key, limit))
+        if cached is not None:
+            return cached
+
+        entries = self._entries
+        if len(key) <= SHORT_PREFIX and limit <= TOP_K:
+            top = [entries[k] for _, k in self._top.get(key, [])[:limit]]
+        else:
+            lo = bisect_left(self._keys, key)
+            hi = bisect_left(self._keys, key + _PREFIX_END, lo)
+            top = heapq.nlargest(limit, (entries[k] for k in self._keys[lo:hi]), key=lambda e: e[0])
+
+        seen = set()
+        results = []
+        for popularity, display, kind in top:
+            if (display, kind) in seen:
+                continue
+            seen.add((display, kind))
+            results.append({"text": display, "type": kind, "popularity": popularity})
+
+        self._memo[(key, limit)] = results
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._keys), "max_entries": self.max_entries}
@@ -0,0 +1,158 @@
+"""
+Shared fetch layer for upstream book sources
+"""
+
+from typing import Any, Optional
+import asyncio
+import logging
+import time
+
+import httpx
+
+from config import settings
+from services import cache, json_codec
+from services.circuit_breaker import CircuitOpenError, get_breaker
+from services.governor import get_governor
+from services.hedging import HedgeBudget, HedgeStats, hedged_get
+from services.http_clients import SOURCES, get_client
+from services.negative_cache import NOT_FOUND, NegativeCache, is_empty_page
+from services.refresh import Refresher
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Identical concurrent misses share a single upstream request
+inflight = SingleFlight()
+
+hedge_budgets = {source: HedgeBudget(settings.hedge_budget_ratio) for source in SOURCES}
+hedge_stats = {source: HedgeStats() for source in SOURCES}
+
+
+def hedging_stats() -> dict:
+    return {source: stats.snapshot() for source, stats in hedge_stats.items()}
+
+
+class UpstreamNotFound(httpx.HTTPError):
+    """The upstream answered 404 for this request (possibly remembered from an earlier call)"""
+
+    def __init__(self, source: str, endpoint: str):
+        super().__init__(f"{source} has no {endpoint}")
+        self.source = source
+
+
+# Recently missing IDs and empty result pages, checked before the response cache
+negative_cache = NegativeCache(settings.negative_cache_max_entries, ttl=settings.negative_cache_ttl)
+
+
+async def fetch_json(source: str, endpoint: str, params: Optional[dict] = None) -> Any:
+    """
+    Fetch a JSON document from an upstream source, going through the response cache
+
+    Raises UpstreamNotFound for 404s and httpx.HTTPError on other
+    transport errors and non-2xx responses.
+    """
+    key = cache.make_key(source, endpoint, params)
+
+    missing = await negative_cache.get(key)
+    if missing is NOT_FOUND:
+        raise UpstreamNotFound(source, endpoint)
+    if missing is not None:
+        return missing
+
+    request = (source, endpoint, params)
+    refresher.record(key, request)
+
+    entry = await cache.response_cache.get_entry(key)
+    if entry is not None:
+        value, expires_in = entry
+        if expires_in <= 0:
+            # Stale: answer now, revalidate in the background
+            refresher.schedule(key, request)
+        return value
+
+    return await _revalidate(key, request)
+
+
+async def _revalidate(key: str, request: tuple) -> Any:
+    source, endpoint, params = request
+    return await inflight.do(key, lambda: _fetch_and_store(source, endpoint, params, key))
+
+
+# Stale-while-revalidate and proactive refresh of the most requested keys
+refresher = Refresher(
+    _revalidate,
+    max_concurrent=settings.refresh_max_concurrent,
+    top_n=settings.refresh_top_n,
+)
+
+
+async def run_refresh_scheduler() -> None:
+    """Refresh hot keys shortly before they expire (runs for the app lifetime)"""
+    await refresher.run(
+        lambda key: cache.response_cache.expires_in(key),
+        interval=settings.refresh_interval,
+        ahead=settings.refresh_ahead,
+    )
+
+
+async def _fetch_and_store(source: str, endpoint: str, params: Optional[dict], key: str) -> Any:
+    """Fetch from upstream and populate the cache (one call per key at a time)"""
+    breaker = get_breaker(source)
+    if not breaker.allow():
+        raise CircuitOpenError(source)
+
+    governor = get_governor(source)
+    try:
+        await governor.acquire()
+    except BaseException:
+        breaker.release()
+        raise
+
+    client = get_client(source)
+    timeout = breaker.timeout()
+    start = time.monotonic()
+    try:
+        response = await hedged_get(
+            client,
+            endpoint,
+            params,
+            timeout=timeout,
+            hedge_after=breaker.hedge_delay() if settings.upstream(source).hedge else None,
+            budget=hedge_budgets[source],
+            stats=hedge_stats[source],
+            acquire_extra=governor.try_acquire_extra,
+            release_extra=governor.release,
+        )
+    except httpx.TimeoutException:
+        breaker.record_failure(timeout, timed_out=True)
+        raise
+    except httpx.HTTPError:
+        breaker.record_failure(time.monotonic() - start)
+        raise
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    finally:
+        governor.release()
+
+    latency = time.monotonic() - start
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure(latency)
+    else:
+        breaker.record_success(latency)
+
+    if response.status_code == 404:
+        await negative_cache.add(key)
+        await cache.response_cache.delete(key)
+        raise UpstreamNotFound(source, endpoint)
+
+    response.raise_for_status()
+    data = json_codec.loads(response.content)
+
+    if is_empty_page(data):
+        # Empty pages are likely to fill up soon (or are crawler probes); keep them briefly
+        await negative_cache.add(key, data)
+        await cache.response_cache.delete(key)
+    else:
+        await cache.response_cache.set(key, data, ttl=settings.upstream(source).cache_ttl)
+    return data
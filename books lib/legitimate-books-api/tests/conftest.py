@@ -0,0 +1,29 @@
+"""
+Shared test setup
+
+The app modules are imported from the project root, and every test gets a
+fresh in-process response cache. Async tests run on asyncio through
+anyio's pytest plugin.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from services import cache  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    """A fresh in-process response cache for every test"""
+    backend = cache.MemoryCache(max_entries=1000, stale_ttl=300)
+    monkeypatch.setattr(cache, "response_cache", backend)
+    return backend
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from routers import openlibrary
+from services.cache import MemoryCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def authors(monkeypatch):
+    """Mock author records; /authors/OL0A is missing. Records fetches and peak concurrency"""
+    state = {"fetched": [], "in_flight": 0, "peak": 0}
+
+    async def fetch_openlibrary(endpoint: str, params: dict = None) -> dict:
+        state["fetched"].append(endpoint)
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            state["in_flight"] -= 1
+        key = endpoint[:-len(".json")]
+        if key == "/authors/OL0A":
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"key": key, "name": f"Author {key}", "bio": {"type": "/type/text", "value": "Wrote books."}}
+
+    monkeypatch.setattr(openlibrary, "fetch_openlibrary", fetch_openlibrary)
+    monkeypatch.setattr(openlibrary, "author_cache", MemoryCache())
+    monkeypatch.setattr(openlibrary, "author_fetch_slots", asyncio.Semaphore(2))
+    return state
+
+
+async def test_resolved_authors_keep_their_order_and_drop_missing_ones(authors):
+    resolved = await openlibrary.resolve_authors(["/authors/OL2A", "/authors/OL0A", "/authors/OL1A"])
+
+    assert [author.key for author in resolved] == ["/authors/OL2A", "/authors/OL1A"]
+    assert resolved[0].bio == "Wrote books."
+
+
+async def test_cached_authors_are_not_fetched_again(authors):
+    await openlibrary.resolve_authors(["/authors/OL1A", "/authors/OL2A"])
+    resolved = await openlibrary.resolve_authors(["/authors/OL2A", "/authors/OL1A"])
+
+    assert [author.name for author in resolved] == ["Author /authors/OL2A", "Author /authors/OL1A"]
+    assert sorted(authors["fetched"]) == ["/authors/OL1A.json", "/authors/OL2A.json"]
+
+
+async def test_fetches_are_bounded_across_requests(authors):
+    requests = [[f"/authors/OL{r}{i}A" for i in range(3)] for r in range(1, 4)]
+
+    results = await asyncio.gather(*(openlibrary.resolve_authors(keys) for keys in requests))
+
+    assert [len(resolved) for resolved in results] == [3, 3, 3]
+    assert len(authors["fetched"]) == 9
+    assert authors["peak"] == 2
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+
+from services import json_codec
+from services.cache import MemoryCache
+from services.cache_snapshot import CacheSnapshotter, read_snapshot, write_snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+def leftovers(directory) -> list:
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+async def test_round_trip_keeps_the_hottest_entries(tmp_path):
+    path = str(tmp_path / "snapshot.sqlite")
+    source = MemoryCache(stale_ttl=60)
+    await source.set("cold", {"n": 1}, ttl=300)
+    await source.set("hot", {"n": 2, "tags": ["a", "b"]}, ttl=300)
+    await source.set("dead", {"n": 3}, ttl=-120)
+    hits = {"hot": 5}
+    snapshotter = CacheSnapshotter(path, max_entries=2, popularity=lambda key: hits.get(key, 0))
+
+    assert await snapshotter.save(source) == 2
+
+    target = MemoryCache(stale_ttl=60)
+    assert await CacheSnapshotter(path).load(target) == 2
+    # Restored coldest first, so the hottest entry is the most recently used
+    assert [key for key, _, _ in target.items()] == ["hot", "cold"]
+    assert await target.get("hot") == {"n": 2, "tags": ["a", "b"]}
+    assert await target.get("cold") == {"n": 1}
+    assert "dead" not in target
+    assert leftovers(tmp_path) == []
+
+
+async def test_load_skips_expired_entries_and_keeps_live_ones(tmp_path):
+    path = str(tmp_path / "snapshot.sqlite")
+    now = time.time()
+    write_snapshot([
+        ("fresh", json_codec.dumps({"v": "snapshot"}), now + 300),
+        ("stale", json_codec.dumps({"v": "stale"}), now - 30),
+        ("expired", json_codec.dumps({"v": "expired"}), now - 3600),
+        ("live", json_codec.dumps({"v": "snapshot"}), now + 300),
+    ], path)
+    target = MemoryCache(stale_ttl=60)
+    await target.set("live", {"v": "live"}, ttl=300)
+
+    restored = await CacheSnapshotter(path).load(target)
+
+    assert restored == 2
+    assert await target.get("fresh") == {"v": "snapshot"}
+    # Past its TTL but inside the stale window: served stale
+    assert (await target.get_entry("stale"))[1] < 0
+    assert "expired" not in target
+    assert await target.get("live") == {"v": "live"}
+
+
+async def test_concurrent_writers_leave_one_complete_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.sqlite")
+    expires_at = time.time() + 300
+    batches = [
+        [(f"writer{w}-{i}", json_codec.dumps(i), expires_at) for i in range(200)]
+        for w in range(4)
+    ]
+
+    await asyncio.gather(*(asyncio.to_thread(write_snapshot, rows, path) for rows in batches))
+
+    rows = read_snapshot(path)
+    assert len(rows) == 200
+    assert len({key.split("-")[0] for key, _, _ in rows}) == 1
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_write_removes_its_temp_file_and_keeps_the_old_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.sqlite")
+    write_snapshot([("kept", json_codec.dumps(1), time.time() + 300)], path)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        write_snapshot([("broken", json_codec.dumps(2))], path)
+
+    assert [key for key, _, _ in read_snapshot(path)] == ["kept"]
+    assert leftovers(tmp_path) == []
+
+
+async def test_missing_snapshot_loads_nothing(tmp_path):
+    snapshotter = CacheSnapshotter(str(tmp_path / "absent.sqlite"))
+
+    assert await snapshotter.load(MemoryCache()) == 0
+    assert snapshotter.loaded
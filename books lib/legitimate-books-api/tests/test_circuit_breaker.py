@@ -0,0 +1,112 @@
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = {"max_timeout": 10.0, "min_calls": 4, "failure_rate": 0.5, "open_seconds": 30.0}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def test_opens_once_the_failure_rate_crosses_the_threshold(clock):
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_opens_on_slow_calls(clock):
+    breaker = make_breaker(slow_call_seconds=1.0)
+    for _ in range(4):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure(0.1)
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_slot_can_be_reused(clock):
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure(0.1)
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_timeout_follows_p95_and_timeouts_raise_it(clock):
+    breaker = make_breaker(min_timeout=1.0, timeout_multiplier=2.0, failure_rate=0.9)
+    assert breaker.timeout() == 10.0
+
+    for _ in range(4):
+        breaker.record_success(0.75)
+    assert breaker.timeout() == 1.5
+
+    breaker.record_failure(1.5, timed_out=True)
+    breaker.record_failure(1.5, timed_out=True)
+    assert breaker.timeout() == 3.0
+
+
+def test_half_open_probe_uses_the_full_timeout(clock):
+    breaker = make_breaker(min_timeout=1.0)
+    for _ in range(4):
+        breaker.record_success(0.1)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.timeout() == 10.0
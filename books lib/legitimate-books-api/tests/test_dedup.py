@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from models import BookBase
+from services.dedup import FuzzyDeduplicator, dump_keys, load_keys, normalize_title, volume_numbers
+
+
+def book(title: str, author: str = "Victor Hugo", isbn=None, source: str = "Open Library") -> BookBase:
+    return BookBase(id=title, title=title, authors=[author], isbn=isbn, source=source)
+
+
+def titles(books):
+    return [b.title for b in books]
+
+
+@pytest.mark.parametrize("title, numbers", [
+    ("Les Misérables, Volume 1", {1}),
+    ("The Count of Monte Cristo, Vol. II", {2}),
+    ("Henry IV, Part 1", {1}),
+    ("Don Quixote (Part 2)", {2}),
+    ("History of Rome, Book XIV", {14}),
+    ("The Book of Mormon", set()),
+    ("No Man's Land", set()),
+])
+def test_volume_numbers(title, numbers):
+    assert volume_numbers(title) == numbers
+
+
+def test_normalize_title():
+    assert normalize_title("Pride & Prejudice (Penguin Classics)") == "pride and prejudice"
+
+
+def test_different_volumes_are_kept_apart():
+    books = [
+        book("Les Misérables, Volume 1"),
+        book("Les Misérables, Volume 2"),
+        book("The Count of Monte Cristo, Vol. I", "Alexandre Dumas"),
+        book("The Count of Monte Cristo, Vol. II", "Alexandre Dumas"),
+    ]
+
+    assert titles(FuzzyDeduplicator().deduplicate(books)) == titles(books)
+
+
+def test_same_volume_in_both_sources_is_merged():
+    books = [
+        book("Les Misérables, Volume 1"),
+        book("Les Misérables, Volume 1", "Hugo, Victor", source="Project Gutenberg"),
+        book("Les Misérables, Volume 2", "Hugo, Victor", source="Project Gutenberg"),
+    ]
+
+    assert titles(FuzzyDeduplicator().deduplicate(books)) == ["Les Misérables, Volume 1", "Les Misérables, Volume 2"]
+
+
+def test_fuzzy_title_duplicates_are_merged():
+    books = [
+        book("Pride and Prejudice", "Jane Austen"),
+        book("Pride & Prejudice", "Austen, Jane", source="Project Gutenberg"),
+        book("Sense and Sensibility", "Jane Austen"),
+    ]
+
+    assert titles(FuzzyDeduplicator().deduplicate(books)) == ["Pride and Prejudice", "Sense and Sensibility"]
+
+
+def test_author_mismatch_keeps_books_apart():
+    books = [book("Poems", "Emily Dickinson"), book("Poems", "Robert Frost")]
+
+    assert len(FuzzyDeduplicator().deduplicate(books)) == 2
+
+
+def test_shared_isbn_merges_regardless_of_title():
+    books = [
+        book("Les Misérables, Volume 1", isbn=["9780140444308"]),
+        book("Les Miserables (Penguin Classics)", isbn=["9780140444308"]),
+    ]
+
+    assert titles(FuzzyDeduplicator().deduplicate(books)) == ["Les Misérables, Volume 1"]
+
+
+def test_deduplicate_after_keys_of_books_kept_earlier():
+    deduplicator = FuzzyDeduplicator()
+    first, keys = deduplicator.deduplicate_after([], [book("Les Misérables, Volume 1"), book("Notre-Dame de Paris")])
+    stored = json.loads(json.dumps(dump_keys(keys)))
+
+    more, new_keys = deduplicator.deduplicate_after(load_keys(stored), [
+        book("Les Misérables, Volume 1", "Hugo, Victor", source="Project Gutenberg"),
+        book("Les Misérables, Volume 2"),
+    ])
+
+    assert titles(first) == ["Les Misérables, Volume 1", "Notre-Dame de Paris"]
+    assert titles(more) == ["Les Misérables, Volume 2"]
+    assert len(new_keys) == 1
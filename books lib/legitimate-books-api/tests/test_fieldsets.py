@@ -0,0 +1,62 @@
+import json
+
+from models import BookBase, BookCover, GoogleBook, SearchResult
+from routers import openlibrary
+from services.fieldsets import dump_books, parse_fields, project, result_data, sparse_result, wanted
+
+
+def books() -> list:
+    return [
+        BookBase(id="OL1W", title="Dune", authors=["Frank Herbert"], source="Open Library",
+                 cover=BookCover(small="s.jpg", medium="m.jpg")),
+        GoogleBook(id="gb1", google_id="gb1", title="Emma", source="Google Books", pages=474),
+    ]
+
+
+def result() -> SearchResult:
+    return SearchResult(query="q", total_results=2, sources={"Open Library": 1, "Google Books": 1}, books=books())
+
+
+def test_parse_fields_keeps_known_fields_and_the_id():
+    assert parse_fields("title, authors,,cover") == {"id", "title", "authors", "cover"}
+    # Unknown and nested names are dropped rather than rejected
+    assert parse_fields("title,nonsense,cover.small") == {"id", "title"}
+    assert parse_fields("nonsense") == {"id"}
+
+
+def test_no_fieldset_means_every_field():
+    assert parse_fields(None) is None
+    assert parse_fields("") is None
+    assert wanted(None, "anything")
+    assert not wanted(frozenset({"id"}), "title")
+
+    data = [{"id": "1", "title": "Dune"}]
+    assert project(data, None) is data
+    everything = books()
+    assert dump_books(everything, None) is everything
+    assert sparse_result(result(), None) == result()
+
+
+def test_nested_fields_are_kept_whole():
+    fields = parse_fields("cover,pages")
+
+    assert dump_books(books(), fields) == [
+        {"id": "OL1W", "pages": None, "cover": {"small": "s.jpg", "medium": "m.jpg", "large": None}},
+        {"id": "gb1", "cover": None, "pages": 474},
+    ]
+
+
+def test_sparse_result_projects_only_the_books():
+    fields = parse_fields("title")
+    data = json.loads(sparse_result(result(), fields).body)
+
+    assert data == result_data(result(), fields)
+    assert data["books"] == [{"id": "OL1W", "title": "Dune"}, {"id": "gb1", "title": "Emma"}]
+    assert data["sources"] == {"Open Library": 1, "Google Books": 1}
+    assert data["query"] == "q"
+
+
+def test_fieldset_trims_the_open_library_request():
+    assert openlibrary.search_fields(parse_fields("authors,cover")) == "key,title,author_name,cover_i"
+    assert openlibrary.search_fields(parse_fields("nonsense")) == "key,title"
+    assert "subject" in openlibrary.search_fields(None).split(",")
@@ -0,0 +1,134 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import governor as governor_module
+from services.governor import Governor, GovernorTimeout, TokenBucket
+from services.hedging import HedgeBudget, HedgeStats, hedged_get
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(governor_module.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_refills_at_its_rate_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+async def test_bucket_refuses_a_wait_longer_than_max_wait_without_taking_a_token(clock):
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert await bucket.acquire(max_wait=0)
+
+    assert not await bucket.acquire(max_wait=0.5)
+    clock.now += 1
+    assert bucket.try_acquire()
+
+
+async def test_in_flight_requests_are_capped():
+    governor = Governor("test", max_in_flight=2, max_wait=0.05)
+    await governor.acquire()
+    await governor.acquire()
+
+    with pytest.raises(GovernorTimeout):
+        await governor.acquire()
+
+    governor.release()
+    await governor.acquire()
+    snapshot = governor.snapshot()
+    assert (snapshot["in_flight"], snapshot["admitted"], snapshot["rejected"]) == (2, 3, 1)
+
+
+async def test_queued_request_gets_the_released_slot():
+    governor = Governor("test", max_in_flight=1, max_wait=1.0)
+    await governor.acquire()
+
+    waiter = asyncio.ensure_future(governor.acquire())
+    await asyncio.sleep(0.01)
+    assert governor.waiting == 1
+    governor.release()
+
+    await asyncio.wait_for(waiter, 1)
+    assert governor.in_flight == 1
+
+
+async def test_extra_slot_only_when_one_is_free_right_now():
+    governor = Governor("test", max_in_flight=1)
+    assert await governor.try_acquire_extra()
+    assert governor.in_flight == 1
+
+    assert not await governor.try_acquire_extra()
+    governor.release()
+    assert await governor.try_acquire_extra()
+
+
+async def test_extra_slot_needs_a_rate_token_and_gives_the_slot_back_without_one(clock):
+    governor = Governor("test", rate=1.0, burst=1, max_in_flight=2)
+    await governor.acquire()
+
+    assert not await governor.try_acquire_extra()
+    assert governor.in_flight == 1
+    # The slot was returned: the other one is still free
+    assert not governor._semaphore.locked()
+
+
+def slow_client(delay: float) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={})
+
+    return httpx.AsyncClient(base_url="https://upstream.test", transport=httpx.MockTransport(handler))
+
+
+async def test_hedge_without_a_free_slot_spends_no_budget():
+    governor = Governor("test", max_in_flight=1)
+    await governor.acquire()
+    budget, stats = HedgeBudget(ratio=0, burst=1), HedgeStats()
+
+    async with slow_client(0.05) as client:
+        response = await hedged_get(
+            client, "/books", None, timeout=1, hedge_after=0.01, budget=budget, stats=stats,
+            acquire_extra=governor.try_acquire_extra, release_extra=governor.release,
+        )
+
+    assert response.status_code == 200
+    assert (stats.hedged, stats.throttled) == (0, 1)
+    assert budget.available()
+    assert governor.in_flight == 1
+
+
+async def test_hedge_slot_is_released_after_the_hedge():
+    governor = Governor("test", max_in_flight=2)
+    await governor.acquire()
+    budget, stats = HedgeBudget(ratio=0, burst=1), HedgeStats()
+
+    async with slow_client(0.05) as client:
+        await hedged_get(
+            client, "/books", None, timeout=1, hedge_after=0.01, budget=budget, stats=stats,
+            acquire_extra=governor.try_acquire_extra, release_extra=governor.release,
+        )
+
+    assert stats.hedged == 1
+    assert not budget.available()
+    assert governor.in_flight == 1
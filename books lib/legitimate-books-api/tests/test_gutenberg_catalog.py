@@ -0,0 +1,135 @@
+import json
+import logging
+
+import pytest
+
+from routers import gutenberg
+from services import gutenberg_catalog
+from services.gutenberg_catalog import GutenbergCatalog, ingest, parse_csv_author, read_dump
+
+CSV = """Text#,Type,Issued,Title,Language,Authors,Subjects,LoCC,Bookshelves
+1342,Text,1998-06-01,Pride and Prejudice,en,"Austen, Jane, 1775-1817",Courtship -- Fiction; England -- Fiction,PR,Best Books Ever Listings
+158,Text,1994-08-01,Emma,en,"Austen, Jane, 1775-1817",Young women -- Fiction,PR,
+2000,Text,1999-12-01,Don Quijote,es,"Cervantes Saavedra, Miguel de, 1547-1616",Knights and knighthood -- Fiction,PQ,
+98,Text,1994-01-01,A Tale of Two Cities,en,"Dickens, Charles, 1812-1870",France -- History -- Revolution -- Fiction,PR,
+99999,Sound,2020-01-01,Pride and Prejudice (audio),en,"Austen, Jane",,,
+"""
+
+
+@pytest.fixture
+def csv_catalog(tmp_path):
+    path = tmp_path / "pg_catalog.csv"
+    path.write_text(CSV, encoding="utf-8")
+    db_path = str(tmp_path / "catalog.sqlite")
+    ingest(read_dump(str(path)), db_path)
+    catalog = GutenbergCatalog(db_path)
+    yield catalog
+    catalog.close()
+
+
+@pytest.fixture
+def json_catalog(tmp_path):
+    books = [
+        {"id": 1342, "title": "Pride and Prejudice", "authors": [{"name": "Austen, Jane"}],
+         "languages": ["en"], "download_count": 50000},
+        {"id": 158, "title": "Emma", "authors": [{"name": "Austen, Jane"}],
+         "languages": ["en"], "download_count": 9000},
+        {"id": 98, "title": "A Tale of Two Cities", "authors": [{"name": "Dickens, Charles"}],
+         "languages": ["en"], "download_count": 20000},
+    ]
+    path = tmp_path / "gutendex.json"
+    path.write_text(json.dumps({"count": 3, "results": books}), encoding="utf-8")
+    db_path = str(tmp_path / "catalog.sqlite")
+    ingest(read_dump(str(path)), db_path)
+    catalog = GutenbergCatalog(db_path)
+    yield catalog
+    catalog.close()
+
+
+def ids(data: dict) -> list:
+    return [book["id"] for book in data["results"]]
+
+
+def test_parse_csv_author():
+    assert parse_csv_author("Austen, Jane, 1775-1817") == {"name": "Austen, Jane", "birth_year": 1775, "death_year": 1817}
+    assert parse_csv_author("Homer, 751? BCE-651? BCE [Translator]")["name"] == "Homer"
+
+
+def test_csv_ingest_keeps_texts_only(csv_catalog):
+    assert csv_catalog.size == 4
+    assert not csv_catalog.has_downloads
+    book = csv_catalog.get(1342)
+    assert book["authors"][0]["name"] == "Austen, Jane"
+    assert book["subjects"] == ["Courtship -- Fiction", "England -- Fiction"]
+    assert csv_catalog.get(99999) is None
+
+
+def test_search_topic_and_language_filters(csv_catalog):
+    assert ids(csv_catalog.query({"search": "prid", "sort": "ascending"})) == [1342]
+    assert ids(csv_catalog.query({"search": "austen", "sort": "ascending"})) == [158, 1342]
+    assert ids(csv_catalog.query({"topic": "fiction", "languages": "es", "sort": "ascending"})) == [2000]
+    assert ids(csv_catalog.query({"languages": "en", "sort": "descending"})) == [1342, 158, 98]
+
+
+@pytest.mark.parametrize("params", [
+    {"search": "austen"},
+    {"topic": "fiction", "sort": "popular"},
+])
+def test_popularity_order_needs_download_counts(csv_catalog, params):
+    with pytest.raises(ValueError):
+        csv_catalog.query(params)
+
+
+def test_author_lists_need_download_counts(csv_catalog):
+    with pytest.raises(ValueError):
+        csv_catalog.books_by_author("austen")
+
+
+@pytest.mark.parametrize("params", [
+    {"search": "!!!", "sort": "ascending"},
+    {"topic": " -- ", "sort": "ascending"},
+    {"search": "emma", "author_year_start": 1800},
+])
+def test_queries_the_catalog_cannot_answer_raise_value_error(csv_catalog, params):
+    with pytest.raises(ValueError):
+        csv_catalog.query(params)
+
+
+def test_catalog_with_download_counts_orders_by_popularity(json_catalog):
+    assert json_catalog.has_downloads
+    assert ids(json_catalog.query({})) == [1342, 98, 158]
+    assert ids(json_catalog.query({"search": "austen"})) == [1342, 158]
+    assert [book["id"] for book in json_catalog.books_by_author("jane austen")] == [1342, 158]
+
+
+def test_pages_hold_32_books(tmp_path):
+    books = [{"id": i, "title": f"Book {i}", "download_count": 1000 - i} for i in range(1, 41)]
+    db_path = str(tmp_path / "catalog.sqlite")
+    ingest(books, db_path)
+    catalog = GutenbergCatalog(db_path)
+
+    second = catalog.query({"page": 2})
+
+    assert second["count"] == 40
+    assert ids(second) == list(range(33, 41))
+    catalog.close()
+
+
+@pytest.mark.anyio
+async def test_route_falls_back_to_gutendex_quietly(csv_catalog, monkeypatch, caplog):
+    fetched = []
+
+    async def fetch_gutendex(endpoint: str, params: dict = None) -> dict:
+        fetched.append(params)
+        return {"count": 0, "results": []}
+
+    monkeypatch.setattr(gutenberg_catalog, "catalog", csv_catalog)
+    monkeypatch.setattr(gutenberg, "fetch_gutendex", fetch_gutendex)
+
+    with caplog.at_level(logging.WARNING):
+        await gutenberg.query_books({"search": "!!!", "page": 1})
+        await gutenberg.query_books({"search": "austen", "page": 1})
+        await gutenberg.query_books({"search": "austen", "sort": "ascending", "page": 1})
+
+    assert fetched == [{"search": "!!!", "page": 1}, {"search": "austen", "page": 1}]
+    assert caplog.records == []
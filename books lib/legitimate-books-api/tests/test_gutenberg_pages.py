@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+
+from routers import gutenberg
+from services.gutenberg_catalog import PAGE_SIZE
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def gutendex_pages(monkeypatch):
+    """Gutendex /books with `total` books in 32-book pages, 404 past the last page"""
+    state = {"total": 70, "requested": []}
+
+    async def query_books(params: dict) -> dict:
+        page = params["page"]
+        state["requested"].append(page)
+        start = (page - 1) * PAGE_SIZE
+        if page > 1 and start >= state["total"]:
+            raise HTTPException(status_code=404, detail="Invalid page.")
+        ids = range(start + 1, min(start + PAGE_SIZE, state["total"]) + 1)
+        return {"count": state["total"], "results": [{"id": i} for i in ids]}
+
+    monkeypatch.setattr(gutenberg, "query_books", query_books)
+    return state
+
+
+async def test_slice_spanning_two_upstream_pages(gutendex_pages):
+    data = await gutenberg.assemble_page({"sort": "popular"}, page=2, limit=20)
+
+    assert data["count"] == 70
+    assert [book["id"] for book in data["results"]] == list(range(21, 41))
+    assert gutendex_pages["requested"] == [1, 2]
+
+
+async def test_last_partial_page(gutendex_pages):
+    data = await gutenberg.assemble_page({}, page=2, limit=50)
+
+    assert data["count"] == 70
+    assert [book["id"] for book in data["results"]] == list(range(51, 71))
+
+
+async def test_page_past_the_end_keeps_the_total(gutendex_pages):
+    data = await gutenberg.assemble_page({}, page=3, limit=50)
+
+    assert data == {"count": 70, "results": []}
+    assert gutendex_pages["requested"] == [4, 5, 1]
+
+
+async def test_no_results_at_all(gutendex_pages):
+    gutendex_pages["total"] = 0
+
+    data = await gutenberg.assemble_page({"search": "nothing"}, page=1, limit=10)
+
+    assert data == {"count": 0, "results": []}
@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.hedging import HedgeBudget, HedgeStats, hedged_get
+
+pytestmark = pytest.mark.anyio
+
+
+class Upstream:
+    """Mock transport whose n-th request takes delays[n] seconds; records starts and cancellations"""
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self.started = []
+        self.cancelled = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        number = len(self.started)
+        self.started.append(asyncio.get_running_loop().time())
+        try:
+            await asyncio.sleep(self.delays[number])
+        except asyncio.CancelledError:
+            self.cancelled.append(number)
+            raise
+        return httpx.Response(200, json={"request": number})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url="https://upstream.test", transport=httpx.MockTransport(self.handler))
+
+
+async def get(upstream: Upstream, hedge_after, budget=None, stats=None) -> httpx.Response:
+    async with upstream.client() as client:
+        return await hedged_get(
+            client, "/books", {"q": "dune"}, timeout=2, hedge_after=hedge_after,
+            budget=budget or HedgeBudget(), stats=stats or HedgeStats(),
+        )
+
+
+async def test_no_hedge_when_the_primary_answers_in_time():
+    upstream, stats = Upstream(0.01), HedgeStats()
+
+    response = await get(upstream, hedge_after=0.2, stats=stats)
+
+    assert response.json() == {"request": 0}
+    assert len(upstream.started) == 1
+    assert stats.hedged == 0
+
+
+async def test_hedge_fires_after_the_delay_and_cancels_the_loser():
+    upstream, stats = Upstream(1.0, 0.01), HedgeStats()
+
+    response = await get(upstream, hedge_after=0.05, stats=stats)
+    await asyncio.sleep(0)
+
+    assert response.json() == {"request": 1}
+    assert upstream.started[1] - upstream.started[0] >= 0.05
+    assert upstream.cancelled == [0]
+    assert (stats.hedged, stats.hedge_won) == (1, 1)
+
+
+async def test_primary_winning_cancels_the_hedge():
+    upstream, stats = Upstream(0.1, 1.0), HedgeStats()
+
+    response = await get(upstream, hedge_after=0.05, stats=stats)
+    await asyncio.sleep(0)
+
+    assert response.json() == {"request": 0}
+    assert upstream.cancelled == [1]
+    assert (stats.hedged, stats.hedge_won) == (1, 0)
+
+
+async def test_hedges_stay_within_the_budget():
+    budget, stats = HedgeBudget(ratio=0, burst=1), HedgeStats()
+    upstream = Upstream(0.1, 0.01, 0.1)
+
+    await get(upstream, hedge_after=0.02, budget=budget, stats=stats)
+    response = await get(upstream, hedge_after=0.02, budget=budget, stats=stats)
+
+    assert response.json() == {"request": 2}
+    assert len(upstream.started) == 3
+    assert (stats.requests, stats.hedged, stats.budget_exhausted) == (2, 1, 1)
+
+
+def test_budget_earns_a_fraction_of_a_hedge_per_request():
+    budget = HedgeBudget(ratio=0.25, burst=1)
+    assert budget.try_spend()
+    assert not budget.available()
+
+    for _ in range(4):
+        budget.on_request()
+    assert budget.try_spend()
@@ -0,0 +1,30 @@
+import pytest
+
+from services.isbn import clean_isbn, isbn10_to_13, isbn13_to_10, normalize_isbn
+
+
+@pytest.mark.parametrize("raw, isbn_13", [
+    ("0-14-143951-3", "9780141439518"),
+    ("ISBN: 0 306 40615 2", "9780306406157"),
+    ("080442957X", "9780804429573"),
+    ("978-0-306-40615-7", "9780306406157"),
+    ("9791032305690", "9791032305690"),
+    ("0-306-40615-3", None),
+    ("9780306406158", None),
+    ("9770306406157", None),
+    ("12345", None),
+])
+def test_normalize_isbn(raw, isbn_13):
+    assert normalize_isbn(raw) == isbn_13
+
+
+def test_clean_isbn():
+    assert clean_isbn(" isbn:0-8044-2957-x ") == "080442957X"
+
+
+def test_conversion_round_trip():
+    assert isbn10_to_13("0306406152") == "9780306406157"
+    assert isbn13_to_10("9780306406157") == "0306406152"
+    assert isbn13_to_10("9780804429573") == "080442957X"
+    # 979 ISBNs have no ISBN-10 form
+    assert isbn13_to_10("9791032305690") is None
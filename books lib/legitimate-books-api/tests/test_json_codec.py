@@ -0,0 +1,106 @@
+import json
+import logging
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse
+
+from models import BookAuthor, BookBase, BookCover, SearchResult
+from services import json_codec
+from services.fieldsets import result_data, sparse_result
+
+SAMPLE = {"title": "Les Misérables", "count": 2, "ratio": 0.5, "tags": ["a", None, True], "big": 2 ** 70}
+
+
+@pytest.fixture
+def msgspec_installed(monkeypatch):
+    """Pretend msgspec is installed, encoding with the standard library"""
+    fake = SimpleNamespace(json=SimpleNamespace(decode=json.loads, encode=json_codec._stdlib_dumps))
+    monkeypatch.setattr(json_codec, "msgspec", fake, raising=False)
+    monkeypatch.setattr(json_codec, "MSGSPEC_AVAILABLE", True)
+    return fake
+
+
+@pytest.mark.parametrize("orjson, msgspec, expected", [
+    (True, True, "orjson"),
+    (False, True, "msgspec"),
+    (False, False, "stdlib"),
+])
+def test_auto_picks_the_first_available_backend(msgspec_installed, monkeypatch, orjson, msgspec, expected):
+    if orjson and not json_codec.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(json_codec, "ORJSON_AVAILABLE", orjson)
+    monkeypatch.setattr(json_codec, "MSGSPEC_AVAILABLE", msgspec)
+
+    assert json_codec._backend("auto")[0] == expected
+
+
+def test_a_missing_backend_falls_back_to_the_standard_library(monkeypatch, caplog):
+    monkeypatch.setattr(json_codec, "ORJSON_AVAILABLE", False)
+    monkeypatch.setattr(json_codec, "MSGSPEC_AVAILABLE", False)
+
+    with caplog.at_level(logging.WARNING):
+        assert json_codec._backend("orjson")[0] == "stdlib"
+        assert json_codec._backend("stdlib")[0] == "stdlib"
+
+    assert len(caplog.records) == 1
+
+
+def available_backends() -> list:
+    names = ["stdlib", "msgspec"]
+    if json_codec.ORJSON_AVAILABLE:
+        names.insert(0, "orjson")
+    return names
+
+
+@pytest.fixture(params=available_backends())
+def backend(request, msgspec_installed, monkeypatch):
+    name, loads, dumps = json_codec._backend(request.param)
+    assert name == request.param
+    monkeypatch.setattr(json_codec, "_loads", loads)
+    monkeypatch.setattr(json_codec, "_dumps", dumps)
+    return name
+
+
+def test_round_trip_matches_the_standard_library(backend):
+    encoded = json_codec.dumps(SAMPLE)
+
+    assert json_codec.loads(encoded) == SAMPLE == json.loads(encoded)
+    assert json_codec.loads(json_codec._stdlib_dumps(SAMPLE)) == SAMPLE
+
+
+def test_non_str_keys_are_rendered_like_json_response(backend):
+    content = {1: "one", "two": {3: [4]}}
+
+    assert json_codec.FastJSONResponse(content).body == JSONResponse(content).body
+
+
+def test_routes_render_like_json_response(backend):
+    book = BookBase(
+        id="OL1W", title="Les Misérables", authors=["Victor Hugo"], source="Open Library",
+        cover=BookCover(small="s.jpg"), isbn=["9780140444308"],
+    )
+    when = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+    def client(response_class) -> TestClient:
+        app = FastAPI(default_response_class=response_class)
+        app.get("/book", response_model=BookBase)(lambda: book)
+        app.get("/author")(lambda: BookAuthor(name="Victor Hugo", key="/authors/OL1A"))
+        app.get("/plain")(lambda: {"fetched_at": when, 7: "seven", "books": [book]})
+        return TestClient(app)
+
+    fast, stdlib = client(json_codec.FastJSONResponse), client(JSONResponse)
+    for path in ("/book", "/author", "/plain"):
+        assert fast.get(path).content == stdlib.get(path).content, path
+    assert fast.get("/plain").json()["fetched_at"] == when.isoformat()
+
+
+def test_sparse_results_render_like_json_response(backend):
+    book = BookBase(id="OL1W", title="Les Misérables", authors=["Victor Hugo"], source="Open Library")
+    result = SearchResult(query="hugo", total_results=1, sources={"Open Library": 1}, books=[book])
+    fields = frozenset({"id", "title"})
+
+    assert sparse_result(result, fields).body == JSONResponse(result_data(result, fields)).body
@@ -0,0 +1,128 @@
+import pytest
+from fastapi import HTTPException
+
+from models import BookBase, BookCover, GoogleBook, MergedBook, OpenLibraryBook
+from routers import googlebooks, openlibrary, search
+from services.merge import isbn_cache_key, merge_by_isbn, merge_records
+
+
+def book(id: str, isbn=None, source: str = "Open Library", **fields) -> BookBase:
+    return BookBase(id=id, title=fields.pop("title", id), isbn=isbn, source=source, **fields)
+
+
+def test_records_sharing_an_isbn_in_any_form_are_merged():
+    books = [
+        book("ol", ["0-14-143951-3"]),
+        book("gb", ["9780141439518"], source="Google Books"),
+        book("other", ["9780306406157"]),
+    ]
+
+    merged = merge_by_isbn(books)
+
+    assert [b.id for b in merged] == ["ol", "other"]
+    assert isinstance(merged[0], MergedBook)
+    assert merged[0].merged_sources == ["Open Library", "Google Books"]
+    assert merged[0].source_ids == {"Open Library": "ol", "Google Books": "gb"}
+    assert merged[1] is books[2]
+
+
+def test_merges_are_transitive():
+    # a and c share no ISBN, but both share one with b (which comes last)
+    books = [
+        book("a", ["9780306406157"]),
+        book("c", ["9780141439518"], source="Google Books"),
+        book("plain"),
+        book("b", ["0306406152", "0141439513"], source="Project Gutenberg"),
+    ]
+
+    merged = merge_by_isbn(books)
+
+    assert [b.id for b in merged] == ["a", "plain"]
+    assert merged[0].merged_sources == ["Open Library", "Google Books", "Project Gutenberg"]
+    assert merged[0].isbn == ["9780306406157", "9780141439518"]
+    assert merged[0].isbn_13 == "9780306406157"
+
+
+def test_invalid_isbns_do_not_join_records():
+    merged = merge_by_isbn([book("a", ["123"]), book("b", ["123"], source="Google Books")])
+
+    assert [b.id for b in merged] == ["a", "b"]
+
+
+def test_field_precedence():
+    ol = OpenLibraryBook(
+        id="OL1W", key="/works/OL1W", title="Pride and Prejudice", source="Open Library",
+        isbn=["9780141439518"], subjects=["Courtship"], borrow_url="https://openlibrary.org/works/OL1W",
+        description="Short.",
+    )
+    gb = GoogleBook(
+        id="gb1", google_id="gb1", title="Pride & Prejudice", source="Google Books",
+        authors=["Jane Austen"], published_date="2003", pages=480, isbn=["0141439513"],
+        description="A much longer description.", categories=["Fiction", "Courtship"],
+        cover=BookCover(small="s.jpg"), info_link="https://books.google.com/gb1",
+    )
+
+    merged = merge_records([ol, gb])
+
+    # The first record's identity, the first non-empty value of simple
+    # fields and the longest description
+    assert (merged.id, merged.title, merged.source) == ("OL1W", "Pride and Prejudice", "Open Library")
+    assert merged.authors == ["Jane Austen"]
+    assert (merged.published_date, merged.pages) == ("2003", 480)
+    assert merged.description == "A much longer description."
+    assert merged.cover.small == "s.jpg"
+    assert merged.subjects == ["Courtship", "Fiction"]
+    assert merged.links == {
+        "Open Library:borrow_url": "https://openlibrary.org/works/OL1W",
+        "Google Books:info_link": "https://books.google.com/gb1",
+    }
+    assert merged.isbn == ["9780141439518"]
+
+
+@pytest.fixture
+def isbn_sources(monkeypatch):
+    calls = []
+
+    async def fetch_openlibrary(endpoint: str, params: dict = None) -> dict:
+        calls.append(("openlibrary", params))
+        return {"docs": [{"key": "/works/OL1W", "title": "Pride and Prejudice",
+                          "author_name": ["Jane Austen"], "isbn": ["0141439513"]}]}
+
+    async def fetch_google_books(endpoint: str, params: dict = None) -> dict:
+        calls.append(("googlebooks", params))
+        return {"items": [{"id": "gb1", "volumeInfo": {
+            "title": "Pride and Prejudice", "authors": ["Jane Austen"], "pageCount": 480,
+            "industryIdentifiers": [{"type": "ISBN_13", "identifier": "9780141439518"}],
+        }}]}
+
+    monkeypatch.setattr(openlibrary, "fetch_openlibrary", fetch_openlibrary)
+    monkeypatch.setattr(googlebooks, "fetch_google_books", fetch_google_books)
+    return calls
+
+
+@pytest.mark.anyio
+async def test_isbn_route_merges_sources_and_caches_by_isbn_13(isbn_sources, response_cache):
+    merged = await search.get_book_by_isbn("0-14-143951-3")
+
+    assert merged.isbn_13 == "9780141439518"
+    assert merged.merged_sources == ["Open Library", "Google Books"]
+    assert merged.pages == 480
+    assert isbn_sources == [
+        ("openlibrary", {"isbn": "9780141439518"}),
+        ("googlebooks", {"q": "isbn:9780141439518"}),
+    ]
+    assert (await response_cache.get(isbn_cache_key("9780141439518")))["id"] == merged.id
+
+    # The ISBN-13 spelling of the same book is answered from the cache
+    cached = await search.get_book_by_isbn("978-0-14-143951-8")
+    assert cached["merged_sources"] == ["Open Library", "Google Books"]
+    assert len(isbn_sources) == 2
+
+
+@pytest.mark.anyio
+async def test_isbn_route_rejects_invalid_isbns(isbn_sources):
+    with pytest.raises(HTTPException) as error:
+        await search.get_book_by_isbn("0-14-143951-4")
+
+    assert error.value.status_code == 400
+    assert isbn_sources == []
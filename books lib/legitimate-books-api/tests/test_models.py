@@ -0,0 +1,86 @@
+from models import (
+    BookAuthor, BookDetail, GutenbergBook, MergedBook, OpenLibraryBook,
+    OpenLibraryBookDetail, SearchResult,
+)
+
+
+def open_library_book(**extra) -> OpenLibraryBook:
+    return OpenLibraryBook(
+        id="OL1W",
+        key="/works/OL1W",
+        title="Pride and Prejudice",
+        authors=["Jane Austen"],
+        source="Open Library",
+        subjects=["Courtship"],
+        borrow_url="https://openlibrary.org/works/OL1W",
+        **extra,
+    )
+
+
+def gutenberg_book() -> GutenbergBook:
+    return GutenbergBook(
+        id="1342",
+        gutenberg_id=1342,
+        title="Pride and Prejudice",
+        authors=["Austen, Jane"],
+        source="Project Gutenberg",
+        downloads=50000,
+        bookshelves=["Best Books Ever Listings"],
+    )
+
+
+def test_book_detail_keeps_source_fields():
+    detail = BookDetail(
+        book=open_library_book(),
+        authors_detail=[BookAuthor(name="Jane Austen")],
+        related_books=[gutenberg_book()],
+    )
+
+    data = detail.model_dump(mode="json")
+
+    assert data["book"]["subjects"] == ["Courtship"]
+    assert data["book"]["borrow_url"] == "https://openlibrary.org/works/OL1W"
+    assert data["related_books"][0]["downloads"] == 50000
+    assert data["related_books"][0]["bookshelves"] == ["Best Books Ever Listings"]
+
+
+def test_open_library_book_detail_is_flat():
+    book = OpenLibraryBookDetail(
+        **open_library_book().model_dump(),
+        authors_detail=[BookAuthor(name="Jane Austen", key="/authors/OL21594A")],
+    )
+
+    data = book.model_dump(mode="json")
+
+    assert list(data)[:3] == ["id", "title", "authors"]
+    assert data["key"] == "/works/OL1W"
+    assert data["authors_detail"][0]["key"] == "/authors/OL21594A"
+    assert "book" not in data
+
+
+def test_search_result_serializes_merged_records_with_merge_fields():
+    merged = MergedBook(
+        id="9780141439518",
+        title="Pride and Prejudice",
+        source="Merged",
+        merged_sources=["Open Library", "Google Books"],
+        source_ids={"Open Library": "OL1W", "Google Books": "abc"},
+    )
+    result = SearchResult(query="pride", total_results=2, sources={}, books=[merged, gutenberg_book()])
+
+    books = result.model_dump(mode="json")["books"]
+
+    assert books[0]["merged_sources"] == ["Open Library", "Google Books"]
+    assert books[0]["source_ids"]["Google Books"] == "abc"
+    # Other books carry only the common fields
+    assert "downloads" not in books[1]
+
+
+def test_search_result_round_trips_merged_records_from_dicts():
+    merged = MergedBook(id="x", title="Emma", source="Merged", merged_sources=["Open Library"])
+    data = SearchResult(query="emma", total_results=1, sources={}, books=[merged]).model_dump(mode="json")
+
+    restored = SearchResult.model_validate(data)
+
+    assert isinstance(restored.books[0], MergedBook)
+    assert restored.books[0].merged_sources == ["Open Library"]
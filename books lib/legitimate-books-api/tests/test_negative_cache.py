@@ -0,0 +1,110 @@
+import httpx
+import pytest
+
+from services import cache, http_clients, upstream
+from services.negative_cache import NOT_FOUND, BloomFilter, NegativeCache, is_empty_page
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def rotate(bloom: BloomFilter) -> None:
+    """Fill two fresh generations, pushing out everything added before"""
+    for i in range(2 * bloom.capacity):
+        bloom.add(f"filler-{i}")
+
+
+@pytest.mark.parametrize("data, empty", [
+    ({"count": 0, "results": []}, True),
+    ({"totalItems": 0}, True),
+    ({"numFound": 0, "docs": []}, True),
+    ({"count": 3, "results": [{}, {}, {}]}, False),
+    ({"title": "Dune"}, False),
+    ([], False),
+])
+def test_is_empty_page(data, empty):
+    assert is_empty_page(data) is empty
+
+
+def test_bloom_keeps_the_previous_generation_and_drops_older_ones():
+    bloom = BloomFilter(capacity=100)
+    bloom.add("missing")
+    for i in range(100):
+        bloom.add(f"filler-{i}")
+    # Rotated once: "missing" is in the previous generation
+    assert "missing" in bloom
+
+    rotate(bloom)
+    assert "missing" not in bloom
+
+
+async def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    negative = NegativeCache(max_entries=100, ttl=60)
+    await negative.add("gutenberg:/books/999")
+    assert await negative.get("gutenberg:/books/999") is NOT_FOUND
+
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    clock.now = 10 ** 9
+    assert await negative.get("gutenberg:/books/999") is None
+    assert negative.false_positives == 1
+
+
+@pytest.fixture
+def negative_cache(monkeypatch):
+    negative = NegativeCache(max_entries=100, ttl=60)
+    monkeypatch.setattr(upstream, "negative_cache", negative)
+    return negative
+
+
+@pytest.fixture
+def gutendex(monkeypatch):
+    """Mock Gutendex: /books/999 is missing and a search for "zzz" has no results"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/books/999":
+            return httpx.Response(404, json={"detail": "Not found."})
+        return httpx.Response(200, json={"count": 0, "next": None, "results": []})
+
+    client = httpx.AsyncClient(base_url="https://gutendex.com", transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(http_clients.registry._clients, "gutenberg", client)
+    return calls
+
+
+async def test_404_is_answered_from_the_negative_cache(gutendex, negative_cache):
+    for _ in range(3):
+        with pytest.raises(upstream.UpstreamNotFound):
+            await upstream.fetch_json("gutenberg", "/books/999")
+
+    assert gutendex == ["/books/999"]
+    assert negative_cache.hits == 2
+
+
+async def test_empty_page_is_answered_from_the_negative_cache(gutendex, negative_cache, response_cache):
+    first = await upstream.fetch_json("gutenberg", "/books", {"search": "zzz"})
+    second = await upstream.fetch_json("gutenberg", "/books", {"search": "zzz"})
+
+    assert first == second == {"count": 0, "next": None, "results": []}
+    assert gutendex == ["/books"]
+    # Kept only in the short-lived negative cache
+    assert await response_cache.get(cache.make_key("gutenberg", "/books", {"search": "zzz"})) is None
+
+
+async def test_404_is_fetched_again_once_rotated_out(gutendex, negative_cache):
+    with pytest.raises(upstream.UpstreamNotFound):
+        await upstream.fetch_json("gutenberg", "/books/999")
+
+    rotate(negative_cache.bloom)
+    with pytest.raises(upstream.UpstreamNotFound):
+        await upstream.fetch_json("gutenberg", "/books/999")
+
+    assert gutendex == ["/books/999", "/books/999"]
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from config import settings
+from services import rate_limit
+from services.rate_limit import AdmissionMiddleware, AdmissionStats, MemoryBuckets
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubApp:
+    """ASGI app answering 200 and recording the in-flight count it ran with"""
+
+    def __init__(self):
+        self.in_flight = []
+
+    async def __call__(self, scope, receive, send):
+        self.in_flight.append(rate_limit.stats.in_flight)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def admission(monkeypatch, clock):
+    """Middleware over a stub app: 30 requests/min (0.5 tokens/s), burst 3, shedding at 10 in flight"""
+    monkeypatch.setattr(settings, "rate_limit_per_minute", 30)
+    monkeypatch.setattr(settings, "shed_max_in_flight", 10)
+    monkeypatch.setattr(settings, "shed_fanout_fraction", 0.5)
+    monkeypatch.setattr(settings, "shed_retry_after", 2)
+    monkeypatch.setattr(rate_limit, "buckets", MemoryBuckets(per_minute=30, burst=3))
+    monkeypatch.setattr(rate_limit, "stats", AdmissionStats())
+    app = StubApp()
+    return AdmissionMiddleware(app), app
+
+
+async def call(middleware, path: str, client: str = "10.0.0.1"):
+    scope = {"type": "http", "path": path, "headers": [], "client": (client, 5000)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    return start["status"], headers, messages[1]["body"]
+
+
+@pytest.mark.parametrize("path, priority", [
+    ("/health", rate_limit.CRITICAL),
+    ("/api/v1/gutenberg/languages", rate_limit.CRITICAL),
+    ("/api/v1/openlibrary/search", rate_limit.NORMAL),
+    ("/api/v1/search/all", rate_limit.FANOUT),
+    ("/api/v1/search/stream", rate_limit.FANOUT),
+    ("/api/v1/search/suggest", rate_limit.NORMAL),
+])
+def test_classify(path, priority):
+    assert rate_limit.classify(path) == priority
+
+
+async def test_fanout_costs_three_tokens_and_normal_one(admission):
+    middleware, _ = admission
+
+    assert (await call(middleware, "/api/v1/search/all"))[0] == 200
+    # The bucket is empty now: a normal request is limited as well
+    assert (await call(middleware, "/api/v1/openlibrary/search"))[0] == 429
+    assert (await call(middleware, "/api/v1/openlibrary/search", client="10.0.0.2"))[0] == 200
+    assert rate_limit.buckets._buckets["10.0.0.2"][0] == 2
+
+
+async def test_critical_paths_are_never_charged(admission):
+    middleware, _ = admission
+    await call(middleware, "/api/v1/search/all")
+
+    for _ in range(5):
+        assert (await call(middleware, "/health"))[0] == 200
+
+
+async def test_rate_limited_response_headers(admission, clock):
+    middleware, _ = admission
+    await call(middleware, "/api/v1/openlibrary/search")
+
+    status, headers, body = await call(middleware, "/api/v1/search/all")
+
+    assert status == 429
+    # 2 tokens left, 3 needed, 0.5 tokens/s
+    assert headers["retry-after"] == "2"
+    assert headers["x-ratelimit-limit"] == "30"
+    assert headers["x-ratelimit-remaining"] == "2"
+    assert json.loads(body) == {"error": "Rate limit exceeded", "status_code": 429}
+
+    clock.now += 2
+    assert (await call(middleware, "/api/v1/search/all"))[0] == 200
+
+
+async def test_fanout_is_shed_at_its_fraction_of_the_in_flight_limit(admission):
+    middleware, _ = admission
+    rate_limit.stats.in_flight = 5
+
+    status, headers, _ = await call(middleware, "/api/v1/search/all")
+    assert status == 503
+    assert headers["retry-after"] == "2"
+    assert (await call(middleware, "/api/v1/openlibrary/search"))[0] == 200
+    assert rate_limit.stats.shed == {rate_limit.NORMAL: 0, rate_limit.FANOUT: 1}
+
+
+async def test_normal_requests_are_shed_at_the_limit_but_critical_ones_are_not(admission):
+    middleware, _ = admission
+    rate_limit.stats.in_flight = 10
+
+    assert (await call(middleware, "/api/v1/openlibrary/search"))[0] == 503
+    assert (await call(middleware, "/health"))[0] == 200
+
+
+async def test_admitted_requests_count_as_in_flight_while_they_run(admission):
+    middleware, app = admission
+
+    await call(middleware, "/api/v1/openlibrary/search")
+
+    assert app.in_flight == [1]
+    assert rate_limit.stats.in_flight == 0
+
+
+def test_fanout_threshold_is_at_least_one(monkeypatch):
+    monkeypatch.setattr(settings, "shed_max_in_flight", 3)
+    monkeypatch.setattr(settings, "shed_fanout_fraction", 0.1)
+
+    assert rate_limit.shed_threshold(rate_limit.FANOUT) == 1
+    assert rate_limit.shed_threshold(rate_limit.NORMAL) == 3
+    assert rate_limit.shed_threshold(rate_limit.CRITICAL) is None
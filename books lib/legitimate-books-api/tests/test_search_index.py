@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from config import settings
+from models import BookBase
+from services import indexing
+from services.search_index import InvertedIndex, tokenize
+
+
+def ranked(index: InvertedIndex, query: str, **kwargs) -> list:
+    return [payload for _, payload in index.search(query, **kwargs)[1]]
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The Call of the Wild!") == ["call", "wild"]
+
+
+def test_title_matches_outrank_description_matches():
+    index = InvertedIndex()
+    index.add("desc", [("A Sea Story", 3), ("whales and a great white whale", 1)], "desc")
+    index.add("title", [("Whale", 3), ("a sea story", 1)], "title")
+
+    assert ranked(index, "whale") == ["title", "desc"]
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = InvertedIndex()
+    for i in range(10):
+        index.add(i, [(f"history volume {i}", 1)], i)
+    index.add("rare", [("history of byzantium", 1)], "rare")
+    index.add("common", [("history history history", 1)], "common")
+
+    assert ranked(index, "history byzantium")[0] == "rare"
+
+
+def test_shorter_documents_win_ties():
+    index = InvertedIndex()
+    index.add("long", [("dune messiah children of dune god emperor", 1)], "long")
+    index.add("short", [("dune", 1)], "short")
+
+    assert ranked(index, "dune") == ["short", "long"]
+
+
+def test_paging_and_totals():
+    index = InvertedIndex()
+    for i in range(5):
+        index.add(i, [("river " * (i + 1), 1), (f"book {i}", 1)], i)
+    index.add("other", [("mountain", 1)], "other")
+
+    total, first = index.search("river", limit=2)
+    _, rest = index.search("river", limit=2, offset=2)
+
+    assert total == 5
+    assert [payload for _, payload in first + rest] == [4, 3, 2, 1]
+    assert index.search("ocean") == (0, [])
+
+
+def test_duplicate_keys_and_full_index_are_refused():
+    index = InvertedIndex(max_docs=2)
+    assert index.add("a", [("alpha", 1)], "a")
+    assert not index.add("a", [("alpha again", 1)], "a2")
+    assert index.add("b", [("beta", 1)], "b")
+    assert not index.add("c", [("gamma", 1)], "c")
+    assert len(index) == 2
+
+
+def test_postings_count_what_a_search_scores():
+    index = InvertedIndex()
+    index.add(1, [("war and peace", 1)], 1)
+    index.add(2, [("the art of war", 1)], 2)
+
+    assert index.postings("war") == 2
+    assert index.postings("war peace the") == 3
+    assert index.postings("missing") == 0
+
+
+@pytest.fixture
+def local_index(monkeypatch):
+    index = InvertedIndex()
+    monkeypatch.setattr(indexing, "local_index", index)
+    for i in range(30):
+        book = BookBase(id=str(i), title=f"Sea story {i}", authors=["Writer"], source="Open Library")
+        index.add(("Open Library", book.id), [(book.title, 3)], book)
+    return index
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("thread_postings", [0, 10_000])
+async def test_search_local_gives_the_same_page_inline_and_in_a_thread(local_index, monkeypatch, thread_postings):
+    monkeypatch.setattr(settings, "local_search_thread_postings", thread_postings)
+    threaded = []
+    to_thread = asyncio.to_thread
+
+    async def tracking_to_thread(func, *args):
+        threaded.append(func)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(indexing.asyncio, "to_thread", tracking_to_thread)
+
+    result = await indexing.search_local("sea story", page=2, limit=10)
+
+    assert result["total_results"] == 30
+    assert [book.id for book in result["books"]] == [
+        book.id for _, book in local_index.search("sea story", limit=10, offset=10)[1]
+    ]
+    assert threaded == ([local_index.search] if thread_postings == 0 else [])
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from models import BookBase
+from routers import search
+
+pytestmark = pytest.mark.anyio
+
+
+def fake_source(name: str, total: int, delay: float = 0.0, max_limit: int = 100):
+    """
+    A search source with `total` distinct books, paged like the real helpers
+    (pages start at (page - 1) * limit but hold at most `max_limit` books)
+    """
+    calls = []
+
+    async def run(q: str, page: int, limit: int) -> dict:
+        calls.append(page)
+        await asyncio.sleep(delay)
+        start = (page - 1) * limit
+        books = [
+            BookBase(id=f"{name}-{i}", title=f"{name} title {i}", authors=[f"Writer {name}{i}"], source=name)
+            for i in range(start, min(start + min(limit, max_limit), total))
+        ]
+        return {"books": books, "total_results": total}
+
+    run.calls = calls
+    return run
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    installed = {}
+
+    def install(**fakes):
+        for name, fake in fakes.items():
+            monkeypatch.setitem(search.SOURCE_SEARCHES, name, fake)
+            installed[name] = fake
+        return installed
+
+    return install
+
+
+def deadline_in(seconds: float) -> float:
+    return asyncio.get_running_loop().time() + seconds
+
+
+async def test_fill_window_reports_only_sources_pending_at_the_deadline(sources):
+    sources(fast=fake_source("fast", 50), slow=fake_source("slow", 50, delay=5))
+
+    window, timed_out = await search.fill_window("q", ["fast", "slow"], 5, 0, deadline_in(0.2))
+
+    assert timed_out == ["slow"]
+    assert {book["source"] for book in window["books"]} == {"fast"}
+    assert window["offsets"] == {"fast": 5, "slow": 0}
+
+
+async def test_first_window_missing_a_timed_out_source_is_not_cached(sources, response_cache):
+    sources(fast=fake_source("fast", 50), slow=fake_source("slow", 50, delay=5))
+
+    await search.fill_window("q", ["fast", "slow"], 5, 0, deadline_in(0.2))
+
+    assert await response_cache.get(search.window_key("q", ["fast", "slow"], 5)) is None
+
+
+async def test_deadline_passed_before_an_extension_reports_nothing(sources):
+    fakes = sources(a=fake_source("a", 50), b=fake_source("b", 50))
+
+    window, timed_out = await search.fill_window("q", ["a", "b"], 5, 0, deadline_in(-1))
+
+    assert timed_out == []
+    assert window["books"] == []
+    assert fakes["a"].calls == fakes["b"].calls == []
+
+
+async def test_fill_window_extends_until_the_page_is_covered(sources, response_cache):
+    fakes = sources(a=fake_source("a", 50), b=fake_source("b", 50))
+
+    window, timed_out = await search.fill_window("q", ["a", "b"], 5, 20, deadline_in(5))
+
+    assert timed_out == []
+    assert len(window["books"]) >= 25
+    assert fakes["a"].calls == [1, 2, 3]
+    assert await response_cache.get(search.window_key("q", ["a", "b"], 5)) is not None
+
+
+async def test_exhausted_sources_are_not_fetched_again(sources):
+    fakes = sources(a=fake_source("a", 7), b=fake_source("b", 50))
+
+    window, _ = await search.fill_window("q", ["a", "b"], 5, 30, deadline_in(5))
+
+    assert fakes["a"].calls == [1, 2]
+    assert window["exhausted"] == ["a"]
+    assert window["counts"]["a"] == 7
+
+
+async def test_source_capping_its_page_size_skips_nothing(sources, monkeypatch):
+    sources(capped=fake_source("capped", 200, max_limit=40))
+    monkeypatch.setitem(search.SOURCE_PAGE_LIMITS, "capped", 40)
+
+    window, _ = await search.fill_window("q", ["capped"], 50, 150, deadline_in(5))
+
+    assert sorted(int(book["id"].split("-")[1]) for book in window["books"]) == list(range(200))
+    assert window["exhausted"] == ["capped"]
+
+
+async def test_short_page_continues_with_the_next_one(sources):
+    paged = fake_source("a", 20)
+
+    async def lossy(q: str, page: int, limit: int) -> dict:
+        # Page 1 loses a record while parsing: 4 of 5 books, more to come
+        result = await paged(q, page, limit)
+        if page == 1:
+            result["books"] = result["books"][:-1]
+        return result
+
+    sources(a=lossy)
+    window, _ = await search.fill_window("q", ["a"], 5, 0, deadline_in(5))
+
+    assert [book["id"] for book in window["books"]] == [f"a-{i}" for i in [0, 1, 2, 3, 5, 6, 7, 8, 9]]
+    assert paged.calls == [1, 1, 2]
+    assert window["offsets"] == {"a": 10}
+
+
+async def test_extension_drops_duplicates_of_books_already_in_the_window(sources):
+    titles = ["Dune", "Emma", "Ulysses", "Beloved", "Middlemarch", "Dune", "Walden", "Persuasion"]
+
+    async def reprinted(q: str, page: int, limit: int) -> dict:
+        # Page 2 repeats "Dune" from page 1 under another id
+        start = (page - 1) * limit
+        books = [
+            BookBase(id=f"r-{i}", title=titles[i], authors=["Frank Herbert"], source="r")
+            for i in range(start, min(start + limit, len(titles)))
+        ]
+        return {"books": books, "total_results": len(titles)}
+
+    sources(r=reprinted)
+    window, _ = await search.fill_window("q", ["r"], 5, 5, deadline_in(5))
+
+    assert sorted(book["id"] for book in window["books"]) == ["r-0", "r-1", "r-2", "r-3", "r-4", "r-6", "r-7"]
+    assert len(window["dedup_keys"]) == 7
+
+
+def test_cursor_round_trip_and_validation():
+    key = search.window_key("dune", ["a", "b"], 5)
+    other = search.window_key("emma", ["a", "b"], 5)
+    cursor = search.encode_cursor(15, key)
+
+    assert search.decode_cursor(cursor, key) == 15
+    with pytest.raises(HTTPException) as wrong_query:
+        search.decode_cursor(cursor, other)
+    assert wrong_query.value.status_code == 400
+    with pytest.raises(HTTPException):
+        search.decode_cursor("not-a-cursor", key)
+
+
+async def all_page(**params):
+    options = {"page": 1, "limit": 5, "sources": "a,b", "cursor": None, "deadline_ms": 5000, "fields": None}
+    options.update(params)
+    return await search.search_all_sources(q="dune", **options)
+
+
+async def test_cursor_pages_are_contiguous_and_match_page_numbers(sources):
+    sources(a=fake_source("a", 12), b=fake_source("b", 9))
+
+    seen, cursor = [], None
+    while True:
+        result = await all_page(cursor=cursor)
+        seen.extend(book.id for book in result.books)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 21
+    third = await all_page(page=3)
+    assert [book.id for book in third.books] == seen[10:15]
+    assert third.page == 3
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert flight.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "value"
+
+    first = asyncio.ensure_future(flight.do("key", fetch))
+    second = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_call_finishes_when_every_caller_is_cancelled():
+    flight = SingleFlight()
+    finished = asyncio.Event()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        finished.set()
+        return "value"
+
+    caller = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    caller.cancel()
+
+    await asyncio.wait_for(finished.wait(), 1)
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    attempts = 0
+
+    async def fetch():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(
+        flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True
+    )
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+    with pytest.raises(ValueError):
+        await flight.do("key", fetch)
+    assert attempts == 2
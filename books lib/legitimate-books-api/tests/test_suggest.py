@@ -0,0 +1,103 @@
+import pytest
+
+from models import BookBase
+from services import indexing, suggest
+from services.search_index import InvertedIndex
+from services.suggest import PrefixIndex, author_variants, normalize
+
+
+def texts(results: list) -> list:
+    return [(r["text"], r["type"]) for r in results]
+
+
+def test_normalize_and_author_variants():
+    assert normalize("  Pride & Prejudice! ") == "pride prejudice"
+    assert author_variants("Austen, Jane") == ["Austen, Jane", "Jane Austen"]
+    assert author_variants("Homer") == ["Homer"]
+
+
+@pytest.mark.parametrize("prefix", ["pr", "pride and"])
+def test_prefix_hits_ranked_by_popularity(prefix):
+    # "pr" is answered from the short-prefix tops, "pride and" by bisecting the keys
+    index = PrefixIndex()
+    index.add_books([
+        ("Pride and Prejudice", ["Austen, Jane"], 500),
+        ("Pride and Prejudice and Zombies", ["Grahame-Smith, Seth"], 50),
+        ("Pride and Joy", [], 200),
+        ("Persuasion", ["Austen, Jane"], 300),
+    ])
+
+    assert texts(index.suggest(prefix)) == [
+        ("Pride and Prejudice", "title"),
+        ("Pride and Joy", "title"),
+        ("Pride and Prejudice and Zombies", "title"),
+    ]
+    assert index.suggest(prefix, limit=1)[0]["popularity"] == 500
+    assert index.suggest("zz") == []
+    assert index.suggest("!!") == []
+
+
+def test_leading_articles_and_author_name_order():
+    index = PrefixIndex()
+    index.add_books([("The Great Gatsby", ["Fitzgerald, F. Scott"], 10)])
+
+    assert texts(index.suggest("great gat")) == [("The Great Gatsby", "title")]
+    assert texts(index.suggest("f scott")) == [("F. Scott Fitzgerald", "author")]
+    assert texts(index.suggest("fitzgerald")) == [("Fitzgerald, F. Scott", "author")]
+
+
+def test_rerank_keeps_the_higher_popularity():
+    index = PrefixIndex()
+    index.add_title("Emma", 10)
+    index.add_title("Emerald City", 20)
+    index.add_title("Emma", 5)
+    assert texts(index.suggest("em")) == [("Emerald City", "title"), ("Emma", "title")]
+
+    index.add_title("Emma", 30)
+    assert texts(index.suggest("em")) == [("Emma", "title"), ("Emerald City", "title")]
+    assert len(index) == 2
+
+
+def test_full_index_refuses_new_keys():
+    index = PrefixIndex(max_entries=1)
+    index.add_title("Dune", 1)
+    index.add_title("Dracula", 1)
+
+    assert len(index) == 1
+    assert index.suggest("d") == [{"text": "Dune", "type": "title", "popularity": 1}]
+
+
+def test_memo_is_kept_until_the_index_changes():
+    index = PrefixIndex()
+    index.add_title("Moby Dick", 10)
+    first = index.suggest("moby")
+    assert index.suggest("moby") is first
+
+    # Re-observing a known book changes nothing and keeps the memo
+    index.add_books([("Moby Dick", [], 10)])
+    assert index.suggest("moby") is first
+
+    index.add_books([("Moby Dick; or, The Whale", [], 20)])
+    assert texts(index.suggest("moby")) == [("Moby Dick; or, The Whale", "title"), ("Moby Dick", "title")]
+
+
+def test_memo_is_cleared_once_full(monkeypatch):
+    monkeypatch.setattr(suggest, "MEMO_SIZE", 2)
+    index = PrefixIndex()
+    index.add_title("Moby Dick", 10)
+    first = index.suggest("moby")
+    index.suggest("mob")
+    index.suggest("mo")
+
+    assert index.suggest("moby") is not first
+    assert len(index._memo) == 1
+
+
+def test_observed_books_invalidate_the_memo(monkeypatch):
+    monkeypatch.setattr(indexing, "local_index", InvertedIndex())
+    monkeypatch.setattr(indexing, "suggest_index", PrefixIndex())
+    indexing.observe_books([BookBase(id="1", title="Dracula", authors=["Stoker, Bram"], source="Open Library")])
+    assert texts(indexing.suggest_index.suggest("dra")) == [("Dracula", "title")]
+
+    indexing.observe_books([BookBase(id="2", title="Dragonflight", authors=[], source="Open Library")])
+    assert texts(indexing.suggest_index.suggest("dra")) == [("Dracula", "title"), ("Dragonflight", "title")]
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import cache, http_clients, upstream
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def gutendex(monkeypatch):
+    """Mock Gutendex answering /books/{id} with an increasing download count"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"id": 1, "title": "Fresh", "download_count": len(calls)})
+
+    client = httpx.AsyncClient(base_url="https://gutendex.com", transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(http_clients.registry._clients, "gutenberg", client)
+    return calls
+
+
+async def wait_for(predicate, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def test_stale_entry_is_served_and_refreshed_in_background(gutendex):
+    key = cache.make_key("gutenberg", "/books/1")
+    # Expired a second ago, still inside the stale window
+    await cache.response_cache.set(key, {"id": 1, "title": "Stale"}, ttl=-1)
+
+    value = await upstream.fetch_json("gutenberg", "/books/1")
+
+    assert value["title"] == "Stale"
+    await wait_for(lambda: len(gutendex) == 1)
+    await wait_for(lambda: not upstream.refresher.stats()["refreshing"])
+    assert (await cache.response_cache.get(key))["title"] == "Fresh"
+
+
+async def test_fresh_entry_is_served_without_upstream_call(gutendex):
+    key = cache.make_key("gutenberg", "/books/2")
+    await cache.response_cache.set(key, {"id": 2, "title": "Cached"}, ttl=60)
+
+    value = await upstream.fetch_json("gutenberg", "/books/2")
+
+    assert value["title"] == "Cached"
+    await asyncio.sleep(0.01)
+    assert gutendex == []
+
+
+async def test_miss_is_fetched_once_for_concurrent_callers(gutendex):
+    results = await asyncio.gather(*(upstream.fetch_json("gutenberg", "/books/3") for _ in range(3)))
+
+    assert [result["title"] for result in results] == ["Fresh"] * 3
+    assert len(gutendex) == 1